@@ -0,0 +1,58 @@
+# Project
+from quickfeatures.commit_scheduler import CommitScheduler
+
+# qgis
+from qgis.core import QgsVectorLayer
+
+# PyQt
+from qgis.PyQt.QtWidgets import QDialog, QDialogButtonBox, QFormLayout, QLabel, QSpinBox
+
+
+class AutoCommitDialog(QDialog):
+
+    # Edits a layer's auto-commit policy, and shows the layer's commit statistics
+
+    def __init__(self, commit_scheduler: CommitScheduler, map_lyr: QgsVectorLayer, parent=None):
+        super().__init__(parent)
+
+        self.commit_scheduler = commit_scheduler
+        self.map_lyr = map_lyr
+
+        self.setWindowTitle(f"Auto-commit: {map_lyr.name()}")
+
+        policy = commit_scheduler.get_policy(map_lyr)
+
+        self.features_spin_box = QSpinBox(self)
+        self.features_spin_box.setRange(0, 100000)
+        self.features_spin_box.setSpecialValueText("Off")
+        self.features_spin_box.setSuffix(" features")
+        self.features_spin_box.setValue(policy.max_features)
+
+        self.seconds_spin_box = QSpinBox(self)
+        self.seconds_spin_box.setRange(0, 86400)
+        self.seconds_spin_box.setSpecialValueText("Off")
+        self.seconds_spin_box.setSuffix(" s")
+        self.seconds_spin_box.setValue(policy.max_seconds)
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+
+        layout = QFormLayout(self)
+        layout.addRow("Commit every", self.features_spin_box)
+        layout.addRow("or after", self.seconds_spin_box)
+
+        metrics = commit_scheduler.get_metrics(map_lyr)
+        if metrics is not None:
+            last_commit = metrics['last_commit_seconds']
+            layout.addRow("Uncommitted features", QLabel(str(metrics['buffered_features'])))
+            layout.addRow("Commits", QLabel(f"{metrics['commits']} ({metrics['committed_features']} features)"))
+            layout.addRow("Last commit", QLabel(f"{last_commit * 1000:.0f} ms" if last_commit is not None else "-"))
+
+        layout.addRow(self.button_box)
+
+    def accept(self):
+
+        self.commit_scheduler.set_policy(self.map_lyr, self.features_spin_box.value(), self.seconds_spin_box.value())
+
+        super().accept()
@@ -0,0 +1,117 @@
+# Misc
+from typing import Dict, Iterable, List, Optional, Set
+
+# PyQt
+from qgis.PyQt.QtCore import QObject, QTimer, QAbstractItemModel
+
+
+class ChangeCoalescer(QObject):
+
+    # Collects the cells of a table model that change during a turn of the event loop, and lets
+    # views know with as few 'dataChanged' signals as possible once control returns to the loop.
+    # Rows must not move while changes are pending: call 'flush' before rows are inserted in
+    # front of others or removed, and 'discard' before the model is cleared
+
+    def __init__(self, model: QAbstractItemModel):
+        super().__init__(model)
+
+        self.model = model
+
+        # Row: first and last column that changed
+        self.dirty: Dict[int, List[int]] = {}
+
+        # Roles that changed. Empty with 'all_roles' if any change didn't name its roles
+        self.roles: Set[int] = set()
+        self.all_roles = False
+
+        # Whether every cell changed
+        self.all_rows = False
+
+        # Number of 'dataChanged' signals emitted, to measure repaints
+        self.emit_count = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.flush)
+
+    def mark(self, row: int, first_column: int = 0, last_column: Optional[int] = None,
+             roles: Optional[Iterable[int]] = None) -> None:
+
+        if last_column is None:
+            last_column = self.model.columnCount() - 1
+
+        span = self.dirty.get(row)
+
+        if span is None:
+            self.dirty[row] = [first_column, last_column]
+        else:
+            span[0] = min(span[0], first_column)
+            span[1] = max(span[1], last_column)
+
+        self.add_roles(roles)
+
+    def mark_all(self, roles: Optional[Iterable[int]] = None) -> None:
+
+        self.all_rows = True
+        self.add_roles(roles)
+
+    def add_roles(self, roles: Optional[Iterable[int]]) -> None:
+
+        if roles is None:
+            self.all_roles = True
+        else:
+            self.roles.update(roles)
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self) -> None:
+
+        self.timer.stop()
+
+        # Rows are only checked against the model's row count here, so that marking a row stays cheap
+        rows = sorted(row for row in self.dirty if row < self.model.rowCount())
+
+        if not rows and not self.all_rows:
+            self.discard()
+            return
+
+        roles = [] if self.all_roles else sorted(self.roles)
+        last_column = self.model.columnCount() - 1
+
+        if self.all_rows:
+            if self.model.rowCount() > 0:
+                self.emit_range(0, self.model.rowCount() - 1, 0, last_column, roles)
+        else:
+            # Runs of consecutive rows are notified together, over the union of their columns
+            first_row = rows[0]
+            first_column, last_column = self.dirty[first_row]
+
+            for prev_row, row in zip(rows, rows[1:]):
+                span = self.dirty[row]
+                if row == prev_row + 1:
+                    first_column = min(first_column, span[0])
+                    last_column = max(last_column, span[1])
+                else:
+                    self.emit_range(first_row, prev_row, first_column, last_column, roles)
+                    first_row = row
+                    first_column, last_column = span
+
+            self.emit_range(first_row, rows[-1], first_column, last_column, roles)
+
+        self.discard()
+
+    def emit_range(self, first_row: int, last_row: int, first_column: int, last_column: int, roles: List[int]) -> None:
+
+        self.emit_count += 1
+        self.model.dataChanged.emit(self.model.index(first_row, first_column), self.model.index(last_row, last_column),
+                                    roles)
+
+    def discard(self) -> None:
+
+        self.timer.stop()
+        self.dirty.clear()
+        self.roles.clear()
+        self.all_roles = False
+        self.all_rows = False
@@ -0,0 +1,305 @@
+# Project
+from quickfeatures.layer_index import VectorLayerIndex
+from quickfeatures.tracing import tracer
+from quickfeatures.__about__ import __title__
+
+# Misc
+from typing import Dict, List, Optional
+from time import perf_counter
+
+# qgis
+from qgis.core import QgsVectorLayer, QgsMessageLog, Qgis
+from qgis.gui import QgsMapToolCapture
+from qgis.utils import iface
+
+# PyQt
+from qgis.PyQt.QtCore import QObject, QTimer, pyqtSignal
+from qgis.PyQt.QtWidgets import QApplication
+
+# Layer properties holding a layer's auto-commit policy. They are saved with the project
+MAX_FEATURES_PROPERTY = 'quickfeatures/auto_commit_features'
+MAX_SECONDS_PROPERTY = 'quickfeatures/auto_commit_seconds'
+
+
+class CommitPolicy:
+
+    # Commit a layer's edits once 'max_features' features have been added, or 'max_seconds' seconds
+    # after the first feature that hasn't been committed. A value of 0 turns that limit off
+
+    __slots__ = ('max_features', 'max_seconds')
+
+    def __init__(self, max_features: int = 0, max_seconds: int = 0):
+
+        self.max_features = max_features
+        self.max_seconds = max_seconds
+
+    def is_enabled(self) -> bool:
+
+        return self.max_features > 0 or self.max_seconds > 0
+
+
+class CommitScheduler(QObject):
+
+    # Commits the edits of layers that have an auto-commit policy, so that long digitizing sessions
+    # don't pile up in the layers' edit buffers. Edits are only committed at idle moments (i.e., not
+    # while a feature is being drawn or its attribute form is open), and the layers stay in editing
+    # mode, so the active template and the map tool are kept
+
+    committed = pyqtSignal(QgsVectorLayer, int, float)
+
+    # How often (in milliseconds) pending layers are checked while they have uncommitted features
+    CHECK_INTERVAL = 1000
+
+    def __init__(self, parent, lyr_index: VectorLayerIndex):
+        super().__init__(parent)
+
+        self.lyr_index = lyr_index
+
+        # Layer ID: policy, for the layers that have one
+        self.policies: Dict[str, CommitPolicy] = {}
+        self.lyrs: Dict[str, QgsVectorLayer] = {}
+
+        # Layer ID: time of the first feature added since the last commit
+        self.pending_since: Dict[str, float] = {}
+
+        # Layer ID: number of features added to the layer's edit buffer and not committed yet. It is
+        # kept up to date from the layer's signals, since reading the edit buffer copies its features
+        self.buffered: Dict[str, int] = {}
+
+        # Layer ID: number of buffered features when the layer's last commit failed
+        self.failed_features: Dict[str, int] = {}
+
+        # Layer ID: commit statistics
+        self.metrics: Dict[str, Dict] = {}
+
+        self.committing = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.CHECK_INTERVAL)
+        self.timer.timeout.connect(self.commit_due)
+
+        self.load_policies(list(self.lyr_index.lyrs_by_id.values()))
+
+        self.lyr_index.layersAdded.connect(self.load_policies)
+        self.lyr_index.layersRemoved.connect(self.forget_lyrs)
+
+    def load_policies(self, map_lyrs: List[QgsVectorLayer]) -> None:
+
+        for map_lyr in map_lyrs:
+            policy = CommitPolicy(int(map_lyr.customProperty(MAX_FEATURES_PROPERTY, 0)),
+                                  int(map_lyr.customProperty(MAX_SECONDS_PROPERTY, 0)))
+            if policy.is_enabled():
+                self.watch_lyr(map_lyr, policy)
+
+    def get_policy(self, map_lyr: QgsVectorLayer) -> CommitPolicy:
+
+        return self.policies.get(map_lyr.id(), CommitPolicy())
+
+    def set_policy(self, map_lyr: QgsVectorLayer, max_features: int, max_seconds: int) -> None:
+
+        policy = CommitPolicy(max_features, max_seconds)
+
+        if policy.is_enabled():
+            map_lyr.setCustomProperty(MAX_FEATURES_PROPERTY, max_features)
+            map_lyr.setCustomProperty(MAX_SECONDS_PROPERTY, max_seconds)
+            self.watch_lyr(map_lyr, policy)
+        else:
+            map_lyr.removeCustomProperty(MAX_FEATURES_PROPERTY)
+            map_lyr.removeCustomProperty(MAX_SECONDS_PROPERTY)
+            self.unwatch_lyr(map_lyr)
+
+    def watch_lyr(self, map_lyr: QgsVectorLayer, policy: CommitPolicy) -> None:
+
+        lyr_id = map_lyr.id()
+
+        if lyr_id not in self.lyrs:
+            map_lyr.featureAdded.connect(self.feature_added)
+            map_lyr.featureDeleted.connect(self.feature_deleted)
+            map_lyr.afterCommitChanges.connect(self.edits_ended)
+            map_lyr.afterRollBack.connect(self.edits_ended)
+            map_lyr.editingStopped.connect(self.edits_ended)
+            self.lyrs[lyr_id] = map_lyr
+
+        self.policies[lyr_id] = policy
+        self.metrics.setdefault(lyr_id, {'commits': 0, 'committed_features': 0, 'last_commit_seconds': None,
+                                         'max_commit_seconds': None})
+
+    def unwatch_lyr(self, map_lyr: QgsVectorLayer) -> None:
+
+        lyr_id = map_lyr.id()
+
+        if lyr_id in self.lyrs:
+            map_lyr.featureAdded.disconnect(self.feature_added)
+            map_lyr.featureDeleted.disconnect(self.feature_deleted)
+            map_lyr.afterCommitChanges.disconnect(self.edits_ended)
+            map_lyr.afterRollBack.disconnect(self.edits_ended)
+            map_lyr.editingStopped.disconnect(self.edits_ended)
+
+        self.forget_lyrs([lyr_id])
+
+    def forget_lyrs(self, lyr_ids: List[str]) -> None:
+
+        for lyr_id in lyr_ids:
+            self.lyrs.pop(lyr_id, None)
+            self.policies.pop(lyr_id, None)
+            self.pending_since.pop(lyr_id, None)
+            self.buffered.pop(lyr_id, None)
+            self.failed_features.pop(lyr_id, None)
+            self.metrics.pop(lyr_id, None)
+
+        if not self.pending_since:
+            self.timer.stop()
+
+    def feature_added(self, fid: int) -> None:
+
+        if self.committing:
+            return
+
+        lyr_id = self.sender().id()
+
+        self.buffered[lyr_id] = self.buffered.get(lyr_id, 0) + 1
+        self.pending_since.setdefault(lyr_id, perf_counter())
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+        # Commit right after the feature has been added, if it's the last one the policy allows
+        if 0 < self.policies[lyr_id].max_features <= self.new_features(lyr_id):
+            QTimer.singleShot(0, self.commit_due)
+
+    def feature_deleted(self, fid: int) -> None:
+
+        # Features that haven't been committed have negative IDs. This includes undoing their addition
+        lyr_id = self.sender().id()
+
+        if fid < 0 and lyr_id in self.buffered:
+            self.buffered[lyr_id] = max(self.buffered[lyr_id] - 1, 0)
+
+    def edits_ended(self) -> None:
+
+        # The layer's edits were committed (by the user or by 'commit'), rolled back or stopped
+        lyr_id = self.sender().id()
+
+        self.pending_since.pop(lyr_id, None)
+        self.buffered.pop(lyr_id, None)
+        self.failed_features.pop(lyr_id, None)
+
+    def new_features(self, lyr_id: str) -> int:
+
+        # Number of buffered features that count towards the policy's features limit, i.e., that were
+        # added since the layer's last failed commit
+        return self.buffered.get(lyr_id, 0) - self.failed_features.get(lyr_id, 0)
+
+    def commit_due(self) -> None:
+
+        now = perf_counter()
+
+        for lyr_id in list(self.pending_since):
+
+            policy = self.policies[lyr_id]
+            map_lyr = self.lyrs[lyr_id]
+
+            if self.buffered.get(lyr_id, 0) == 0:
+                # Features were deleted by the user
+                self.pending_since.pop(lyr_id)
+                self.failed_features.pop(lyr_id, None)
+                continue
+
+            due = (0 < policy.max_features <= self.new_features(lyr_id)
+                   or 0 < policy.max_seconds <= now - self.pending_since[lyr_id])
+
+            if due and is_idle(map_lyr):
+                self.commit(map_lyr)
+
+        if not self.pending_since:
+            self.timer.stop()
+
+    def commit(self, map_lyr: QgsVectorLayer) -> bool:
+
+        lyr_id = map_lyr.id()
+
+        if not map_lyr.isEditable():
+            # Edits were committed or discarded by the user
+            self.pending_since.pop(lyr_id, None)
+            self.buffered.pop(lyr_id, None)
+            self.failed_features.pop(lyr_id, None)
+            return False
+
+        n_features = self.buffered.get(lyr_id, 0)
+
+        self.committing = True
+        start_time = perf_counter()
+
+        # Keep the layer in editing mode
+        committed = map_lyr.commitChanges(False)
+
+        seconds = perf_counter() - start_time
+        self.committing = False
+
+        if not committed:
+            QgsMessageLog.logMessage(f"Auto-commit of '{map_lyr.name()}' failed: {'; '.join(map_lyr.commitErrors())}",
+                                     tag=__title__, level=Qgis.Warning)
+
+            # Try again once the policy's limits have been reached again
+            self.failed_features[lyr_id] = self.buffered.get(lyr_id, 0)
+            self.pending_since[lyr_id] = perf_counter()
+            return False
+
+        self.pending_since.pop(lyr_id, None)
+        self.buffered.pop(lyr_id, None)
+        self.failed_features.pop(lyr_id, None)
+
+        metrics = self.metrics[lyr_id]
+        metrics['commits'] += 1
+        metrics['committed_features'] += n_features
+        metrics['last_commit_seconds'] = seconds
+        metrics['max_commit_seconds'] = max(seconds, metrics['max_commit_seconds'] or 0)
+
+        if tracer.enabled:
+            tracer.record('auto_commit', seconds)
+
+        self.committed.emit(map_lyr, n_features, seconds)
+
+        return True
+
+    def get_metrics(self, map_lyr: QgsVectorLayer) -> Optional[Dict]:
+
+        # Commit statistics, and the number of features waiting in the layer's edit buffer
+        metrics = self.metrics.get(map_lyr.id())
+
+        if metrics is None:
+            return None
+
+        return {**metrics, 'buffered_features': buffered_features(map_lyr)}
+
+    def clean_up(self) -> None:
+
+        self.timer.stop()
+
+        for map_lyr in list(self.lyrs.values()):
+            self.unwatch_lyr(map_lyr)
+
+        self.lyr_index.layersAdded.disconnect(self.load_policies)
+        self.lyr_index.layersRemoved.disconnect(self.forget_lyrs)
+
+
+def buffered_features(map_lyr: QgsVectorLayer) -> int:
+
+    # Number of features added to the layer's edit buffer, which is only there while it's editable
+    edit_buffer = map_lyr.editBuffer()
+
+    return 0 if edit_buffer is None else len(edit_buffer.addedFeatures())
+
+
+def is_idle(map_lyr: QgsVectorLayer) -> bool:
+
+    # Don't commit while an attribute form or another dialog is open
+    if QApplication.activeModalWidget() is not None:
+        return False
+
+    # ... or while a feature of the layer is being drawn
+    map_tool = iface.mapCanvas().mapTool()
+    if isinstance(map_tool, QgsMapToolCapture) and map_tool.size() > 0 and iface.activeLayer() is map_lyr:
+        return False
+
+    return True
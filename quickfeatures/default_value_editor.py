@@ -1,31 +1,40 @@
 from quickfeatures.__about__ import __title__
 
 # Project
-from quickfeatures.default_value_option_table_model import DefaultValueOptionTableModel, DefaultValueOptionDelegate
+from quickfeatures.default_value_option_table_model import DefaultValueOptionTableModel, DefaultValueOptionDelegate, \
+    OptionColumn
+from quickfeatures.distinct_values import DistinctValueCache
+from quickfeatures.gui import load_form_class
 
 # Misc
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 # qgis
 from qgis.core import QgsDefaultValue, QgsVectorLayer, QgsMessageLog, Qgis
+from qgis.gui import QgsFilterLineEdit
 from qgis.utils import iface
 
 # PyQt
-from qgis.PyQt import uic
-from qgis.PyQt.QtCore import Qt, QPoint
+from qgis.PyQt.QtCore import Qt, QPoint, QSortFilterProxyModel
 from qgis.PyQt.QtGui import QCursor, QPixmap
-from qgis.PyQt.QtWidgets import QDialog, QHeaderView
+from qgis.PyQt.QtWidgets import QDialog, QHeaderView, QAbstractItemView
 
-class DefaultValueEditor(QDialog):
+FORM_CLASS = load_form_class(Path(__file__).stem, 'Ui_Dialog')
 
-    def __init__(self, parent=None):
+
+class DefaultValueEditor(QDialog, FORM_CLASS):
+
+    def __init__(self, parent=None, distinct_values: Optional[DistinctValueCache] = None):
         super().__init__(parent)
 
+        # Values of the layers' fields, used to complete the values that are typed
+        self.distinct_values = distinct_values
+
         root_path = Path(__file__).parent
 
-        # Load UI file
-        uic.loadUi(root_path / "gui/{}.ui".format(Path(__file__).stem), self)
+        # Set up UI
+        self.setupUi(self)
 
         # Set icon
         metadata_icon = QPixmap(f"{root_path}/resources/icons/mActionPropertiesWidget.svg")
@@ -37,9 +46,17 @@ class DefaultValueEditor(QDialog):
 
         # Initialize table
         self.table_model = None
+        self.table_proxy_model = None
         self.default_value_option_delegate = None
         self.init_table()
 
+        # Filter fields by name
+        self.filter_box = QgsFilterLineEdit(self)
+        self.filter_box.setShowSearchIcon(True)
+        self.filter_box.setPlaceholderText("Filter fields")
+        self.filter_box.textChanged.connect(self.table_proxy_model.setFilterFixedString)
+        self.vertical_layout.insertWidget(0, self.filter_box)
+
         self.accept_button.clicked.connect(self.accept)
         self.cancel_button.clicked.connect(self.reject)
 
@@ -63,27 +80,32 @@ class DefaultValueEditor(QDialog):
         return self.table_model.get_selected_default_values()
 
     def populate_table(self, map_lyr: QgsVectorLayer, default_values: Dict[str, QgsDefaultValue]):
+        self.filter_box.clear()
         self.table_model.set_default_values(map_lyr, default_values)
         #self.table_model.set_selected_default_values(default_values)
 
     def init_table(self):
         # Create model
         self.table_model = DefaultValueOptionTableModel(self)
-        self.table_model.rowsInserted.connect(self.rows_inserted)
 
-        # Connect view and model
-        self.table_view.setModel(self.table_model)
+        # Connect view and model, through a filter on the fields' names
+        self.table_proxy_model = QSortFilterProxyModel(self)
+        self.table_proxy_model.setSourceModel(self.table_model)
+        self.table_proxy_model.setFilterKeyColumn(OptionColumn.FIELD)
+        self.table_proxy_model.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.table_view.setModel(self.table_proxy_model)
+
+        # Values are painted, and edited with a single click. Fixed row heights let the view skip measuring rows
+        self.table_view.setEditTriggers(QAbstractItemView.AllEditTriggers)
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
 
         # Set delegates
-        self.default_value_option_delegate = DefaultValueOptionDelegate(self.table_view)
-        self.table_view.setItemDelegateForColumn(2, self.default_value_option_delegate)
+        self.default_value_option_delegate = DefaultValueOptionDelegate(self.table_view, self.distinct_values)
+        self.table_view.setItemDelegateForColumn(OptionColumn.VALUE, self.default_value_option_delegate)
 
         # Set Column sizes
         header = self.table_view.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-
-    def rows_inserted(self, parent, first, last):
-        for row in range(first, last + 1):
-            self.table_view.openPersistentEditor(self.table_model.index(row, 2))
+        header.setResizeContentsPrecision(100)
+        header.setSectionResizeMode(OptionColumn.SELECT, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(OptionColumn.FIELD, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(OptionColumn.VALUE, QHeaderView.ResizeMode.Stretch)
@@ -1,5 +1,7 @@
 class DefaultValueOption():
 
+    __slots__ = ('value', 'selected', 'valid', 'name')
+
     def __init__(self, name: str, selected = False, valid = True, value = None):
         self.value = value
         self.selected = selected
@@ -1,17 +1,28 @@
 # Project
 from quickfeatures.__about__ import __title__
-from quickfeatures.default_value_option import *
+from quickfeatures.default_value_option import DefaultValueOption
+from quickfeatures.table_styles import DISABLED_BRUSH
+from quickfeatures.distinct_values import DistinctValueCache
 
 # Misc
-from typing import Dict
+from typing import Callable, Dict, List, Optional
+from enum import IntEnum
 
 # qgis
 from qgis.core import QgsVectorLayer, QgsMessageLog, Qgis
 
 # PyQt
-from qgis.PyQt.QtCore import Qt, QModelIndex, QVariant, QAbstractTableModel, pyqtSlot
-from qgis.PyQt.QtWidgets import QStyledItemDelegate, QLineEdit
-from qgis.PyQt.QtGui import QColor
+from qgis.PyQt.QtCore import Qt, QModelIndex, QVariant, QAbstractTableModel, QAbstractProxyModel, pyqtSlot
+from qgis.PyQt.QtWidgets import QStyledItemDelegate, QLineEdit, QCompleter
+from qgis.PyQt.QtGui import QBrush, QStandardItemModel, QStandardItem
+
+
+class OptionColumn(IntEnum):
+
+    SELECT = 0
+    FIELD = 1
+    VALUE = 2
+
 
 class DefaultValueOptionTableModel(QAbstractTableModel):
     header_labels = [
@@ -20,10 +31,28 @@ class DefaultValueOptionTableModel(QAbstractTableModel):
         "Value"
     ]
 
+    # Item flags of each column
+    column_flags = [
+        Qt.ItemIsEnabled | Qt.ItemIsUserCheckable,
+        Qt.ItemIsEnabled,
+        Qt.ItemIsEnabled | Qt.ItemIsEditable,
+    ]
+
     def __init__(self, parent):
         super().__init__(parent)
         self.default_values_options = []
 
+        # Layer of the template whose values are edited
+        self.map_lyr = None
+
+        # Role: function that returns the data of a row's option, for each column
+        self.data_handlers: Dict[int, List[Optional[Callable]]] = {
+            Qt.CheckStateRole: [check_state, None, None],
+            Qt.DisplayRole: [None, DefaultValueOption.get_name, DefaultValueOption.get_value],
+            Qt.EditRole: [None, None, DefaultValueOption.get_value],
+            Qt.ForegroundRole: [None, foreground, None],
+        }
+
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if orientation == Qt.Horizontal and role == Qt.DisplayRole:
             return self.header_labels[section]
@@ -37,51 +66,23 @@ class DefaultValueOptionTableModel(QAbstractTableModel):
 
     def data(self, index, role=Qt.DisplayRole):
 
-        if not index.isValid():
-            return QVariant()
-
-        row = index.row()
-        default_val = self.default_values_options[row]
+        handlers = self.data_handlers.get(role)
+        if handlers is None or not index.isValid():
+            return None
 
-        column = index.column()
-        column_header_label = self.header_labels[column]
+        handler = handlers[index.column()]
 
-        if role == Qt.CheckStateRole:
-            if column_header_label == "Select":
-                if default_val.is_selected():
-                    return Qt.Checked
-                else:
-                    return Qt.Unchecked
+        if handler is None:
+            return None
 
-        if role == Qt.DisplayRole:
-            if column_header_label == "Field":
-                return default_val.get_name()
-
-        if role == Qt.ForegroundRole:
-            if column_header_label == "Field":
-                if not default_val.is_valid():
-                    return QColor(180, 180, 180)
+        return handler(self.default_values_options[index.row()])
 
     def flags(self, index):
 
         if not index.isValid():
             return Qt.NoItemFlags
 
-        row = index.row()
-        default_val = self.default_values_options[row]
-
-        col = index.column()
-        column_header_label = self.header_labels[col]
-
-        if column_header_label == 'Select':
-            return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
-        elif column_header_label == 'Field':
-            return Qt.ItemIsEnabled
-        elif column_header_label == 'Value':
-            return Qt.ItemIsEnabled | Qt.ItemIsEditable
-        else:
-            return Qt.ItemIsEnabled
-
+        return self.column_flags[index.column()]
 
     def setData(self, index, value, role=Qt.EditRole):
 
@@ -92,16 +93,17 @@ class DefaultValueOptionTableModel(QAbstractTableModel):
         default_value_option = self.default_values_options[row]
 
         col = index.column()
-        column_header_label = self.header_labels[col]
 
-        # QgsMessageLog.logMessage(f"setData: header '{column_header_label}', row: '{row}', value: '{value}'", tag=__title__, level=Qgis.Info)
+        # QgsMessageLog.logMessage(f"setData: column '{col}', row: '{row}', value: '{value}'", tag=__title__, level=Qgis.Info)
 
-        if column_header_label == 'Select' and role == Qt.CheckStateRole:
+        if col == OptionColumn.SELECT and role == Qt.CheckStateRole:
             default_value_option.toggle_selected()
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
             return True
 
-        if column_header_label == 'Value' and role == Qt.EditRole:
+        if col == OptionColumn.VALUE and role == Qt.EditRole:
             default_value_option.set_value(value)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
             return True
 
     def set_default_values(self, map_lyr: QgsVectorLayer, default_values: Dict) -> None:
@@ -113,37 +115,29 @@ class DefaultValueOptionTableModel(QAbstractTableModel):
 
         # Begin by clearing the table
         self.clear_default_values()
+        self.map_lyr = map_lyr
 
-        default_values_to_set = []
+        # Field name: option. Fields of the map layer come first, in the layer's order
+        options = {}
 
         # Get fields from map layer
         if map_lyr:
+            for field_name in map_lyr.fields().names():
+                options[field_name] = DefaultValueOption(name=field_name, selected=False, valid=True)
 
-            field_list = map_lyr.fields().toList()
-
-            for field in field_list:
-                default_values_to_set.append(
-                    DefaultValueOption(name=field.name(), selected=False, valid=True)
-                )
-
-        # Get fields from default values
-        for field_name in default_values:
-
-            value = default_values[field_name]
-
-            add_invalid_default_value = True
+        # Get fields from default values. Fields that aren't in the map layer are invalid
+        for field_name, value in default_values.items():
 
-            for existing_default_value in default_values_to_set:
-                if existing_default_value.get_name() == field_name:
-                    existing_default_value.set_selected(True)
-                    existing_default_value.set_value(value)
-                    add_invalid_default_value = False
+            option = options.get(field_name)
 
-            if add_invalid_default_value:
+            if option is None:
+                options[field_name] = DefaultValueOption(name=field_name, selected=True, valid=False, value=value)
+            else:
+                option.set_selected(True)
+                option.set_value(value)
 
-                default_values_to_set.append(
-                    DefaultValueOption(name=field_name, selected=True, valid=False, value=value)
-                )
+        # Selected fields are listed first
+        default_values_to_set = sorted(options.values(), key=lambda option: not option.is_selected())
 
         # Add rows to model
         if default_values_to_set:
@@ -180,14 +174,39 @@ class DefaultValueOptionTableModel(QAbstractTableModel):
         return out_values
 
 
+def check_state(default_value_option: DefaultValueOption) -> Qt.CheckState:
+
+    return Qt.Checked if default_value_option.is_selected() else Qt.Unchecked
+
+
+def foreground(default_value_option: DefaultValueOption) -> Optional[QBrush]:
+
+    return None if default_value_option.is_valid() else DISABLED_BRUSH
+
+
 class DefaultValueOptionDelegate(QStyledItemDelegate):
 
-    def __init__(self, parent):
+    def __init__(self, parent, distinct_values: Optional[DistinctValueCache] = None):
         super().__init__(parent)
 
+        # Values of the layer's fields, to complete what is typed
+        self.distinct_values = distinct_values
+
     def createEditor(self, parent, option, index):
 
         editor = QLineEdit(parent)
+
+        # The index may belong to the editor's filter model
+        option_model = index.model()
+        while isinstance(option_model, QAbstractProxyModel):
+            option_model = option_model.sourceModel()
+
+        map_lyr = option_model.map_lyr
+        field_name = index.sibling(index.row(), OptionColumn.FIELD).data()
+
+        if self.distinct_values is not None and map_lyr is not None and map_lyr.fields().indexOf(field_name) >= 0:
+            editor.setCompleter(ValueCompleter(editor, self.distinct_values, map_lyr, field_name))
+
         return editor
 
     def setModelData(self, editor, model, index):
@@ -204,9 +223,8 @@ class DefaultValueOptionDelegate(QStyledItemDelegate):
 
     def setEditorData(self, editor, index):
 
-        default_value_option = index.model().default_values_options[index.row()]
-
-        value = default_value_option.get_value()
+        # The index may belong to the editor's filter model
+        value = index.data(Qt.EditRole)
 
         # QgsMessageLog.logMessage(f"Setting value {value}", tag=__title__, level=Qgis.Info)
 
@@ -218,3 +236,55 @@ class DefaultValueOptionDelegate(QStyledItemDelegate):
                 pass
 
 
+class ValueCompleter(QCompleter):
+
+    # Completes a value with the distinct values of its field, quoted as expressions. What is typed
+    # is matched against the start of the values, with or without their opening quote. If the
+    # values are still being read, they are added once they are ready
+
+    def __init__(self, parent, distinct_values: DistinctValueCache, map_lyr: QgsVectorLayer, field_name: str):
+        super().__init__(parent)
+
+        self.distinct_values = distinct_values
+        self.map_lyr = map_lyr
+        self.field_name = field_name
+
+        self.setModel(QStandardItemModel(self))
+        self.setCompletionRole(Qt.UserRole)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+
+        values = distinct_values.get_values(map_lyr, field_name)
+
+        if values is None:
+            distinct_values.valuesReady.connect(self.values_ready)
+        else:
+            self.set_values(values)
+
+    def set_values(self, values: List[str]) -> None:
+
+        model = self.model()
+        model.clear()
+
+        for value in values:
+            item = QStandardItem(value)
+            item.setData(unquote(value), Qt.UserRole)
+            model.appendRow(item)
+
+    def values_ready(self, lyr_id: str, field_name: str) -> None:
+
+        if lyr_id == self.map_lyr.id() and field_name == self.field_name:
+            self.distinct_values.valuesReady.disconnect(self.values_ready)
+            self.set_values(self.distinct_values.get_values(self.map_lyr, field_name))
+
+    def splitPath(self, path: str) -> List[str]:
+
+        return [unquote(path)]
+
+    def pathFromIndex(self, index: QModelIndex) -> str:
+
+        return index.data(Qt.DisplayRole)
+
+
+def unquote(value: str) -> str:
+
+    return value[1:] if value.startswith("'") else value
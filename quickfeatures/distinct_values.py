@@ -0,0 +1,206 @@
+# Project
+from quickfeatures.layer_index import VectorLayerIndex
+
+# Misc
+from typing import Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+from functools import partial
+
+# qgis
+from qgis.core import QgsTask, QgsApplication, QgsVectorLayer, QgsVectorLayerFeatureSource, QgsFeatureRequest, \
+    QgsExpression
+
+# PyQt
+from qgis.PyQt.QtCore import QObject, QVariant, QDate, QDateTime, QTime, Qt, pyqtSignal
+
+
+class DistinctValuesTask(QgsTask):
+
+    # Reads the distinct values of a layer's field in the background, and quotes them as expressions.
+    # Features are read from a copy of the layer's feature source, which is made in the main thread
+
+    def __init__(self, map_lyr: QgsVectorLayer, field_name: str, max_values: int):
+        super().__init__(f"Reading the values of '{field_name}'", QgsTask.CanCancel | QgsTask.Silent)
+
+        self.lyr_id = map_lyr.id()
+        self.field_name = field_name
+        self.max_values = max_values
+
+        self.field_id = map_lyr.fields().indexOf(field_name)
+        self.field_type = map_lyr.fields().at(self.field_id).type()
+        self.n_features = max(map_lyr.featureCount(), 1)
+        self.source = QgsVectorLayerFeatureSource(map_lyr)
+
+        self.values: List[str] = []
+
+    def run(self) -> bool:
+
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([self.field_id])
+
+        values = set()
+
+        for i, feature in enumerate(self.source.getFeatures(request)):
+
+            if self.isCanceled():
+                return False
+
+            value = feature.attributes()[self.field_id]
+
+            if not is_null(value):
+                values.add(value)
+                if len(values) >= self.max_values:
+                    break
+
+            if i % 1000 == 0:
+                self.setProgress(100 * i / self.n_features)
+
+        self.values = sorted(quote_value(value, self.field_type) for value in values)
+
+        return True
+
+
+class DistinctValueCache(QObject):
+
+    # Distinct values of layers' fields, quoted as expressions, to complete the values typed in the
+    # default value editor. Values are read by a background task the first time a field is asked for.
+    # The least recently used fields are dropped once the cache holds 'MAX_FIELDS' of them, and a
+    # layer's fields are dropped when its features are added or its committed values change
+
+    valuesReady = pyqtSignal(str, str)
+
+    # Number of fields kept, and of values read per field
+    MAX_FIELDS = 64
+    MAX_VALUES = 1000
+
+    def __init__(self, parent, lyr_index: VectorLayerIndex):
+        super().__init__(parent)
+
+        self.lyr_index = lyr_index
+
+        # (Layer ID, field name): values, from the least to the most recently used
+        self.values: OrderedDict = OrderedDict()
+
+        # (Layer ID, field name): task that is reading its values
+        self.tasks: Dict[Tuple[str, str], DistinctValuesTask] = {}
+
+        # Tasks that haven't ended, including cancelled ones. They are referenced until then, since
+        # the task manager runs their Python 'run' method
+        self.running: Set[DistinctValuesTask] = set()
+
+        # Layer ID: layer, for the layers whose signals are connected
+        self.lyrs: Dict[str, QgsVectorLayer] = {}
+
+        self.lyr_index.layersRemoved.connect(self.forget_lyrs)
+
+    def get_values(self, map_lyr: QgsVectorLayer, field_name: str) -> Optional[List[str]]:
+
+        # The field's values, or None if they are being read. 'valuesReady' is emitted once they are
+        key = (map_lyr.id(), field_name)
+
+        values = self.values.get(key)
+
+        if values is not None:
+            self.values.move_to_end(key)
+            return values
+
+        if key not in self.tasks and map_lyr.fields().indexOf(field_name) >= 0:
+            self.watch_lyr(map_lyr)
+
+            task = DistinctValuesTask(map_lyr, field_name, self.MAX_VALUES)
+            task.taskCompleted.connect(partial(self.task_completed, task))
+            task.taskTerminated.connect(partial(self.task_ended, task))
+
+            self.tasks[key] = task
+            self.running.add(task)
+            QgsApplication.taskManager().addTask(task)
+
+        return None
+
+    def task_completed(self, task: DistinctValuesTask) -> None:
+
+        key = (task.lyr_id, task.field_name)
+
+        self.running.discard(task)
+
+        # Tasks of fields that were invalidated while they ran are dropped
+        if self.tasks.get(key) is not task:
+            return
+
+        del self.tasks[key]
+
+        self.values[key] = task.values
+
+        while len(self.values) > self.MAX_FIELDS:
+            self.values.popitem(last=False)
+
+        self.valuesReady.emit(task.lyr_id, task.field_name)
+
+    def task_ended(self, task: DistinctValuesTask) -> None:
+
+        key = (task.lyr_id, task.field_name)
+
+        self.running.discard(task)
+
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+
+    def watch_lyr(self, map_lyr: QgsVectorLayer) -> None:
+
+        if map_lyr.id() not in self.lyrs:
+            self.lyrs[map_lyr.id()] = map_lyr
+            map_lyr.featureAdded.connect(self.lyr_changed)
+            map_lyr.committedAttributeValuesChanges.connect(self.lyr_changed)
+
+    def unwatch_lyr(self, map_lyr: QgsVectorLayer) -> None:
+
+        map_lyr.featureAdded.disconnect(self.lyr_changed)
+        map_lyr.committedAttributeValuesChanges.disconnect(self.lyr_changed)
+
+    def lyr_changed(self, *args) -> None:
+
+        self.invalidate(self.sender().id())
+
+    def invalidate(self, lyr_id: str) -> None:
+
+        for key in [key for key in self.values if key[0] == lyr_id]:
+            del self.values[key]
+
+        for key in [key for key in self.tasks if key[0] == lyr_id]:
+            self.tasks.pop(key).cancel()
+
+    def forget_lyrs(self, lyr_ids: List[str]) -> None:
+
+        # Removed layers are deleted, so their signals don't need to be disconnected
+        for lyr_id in lyr_ids:
+            self.invalidate(lyr_id)
+            self.lyrs.pop(lyr_id, None)
+
+    def clean_up(self) -> None:
+
+        for task in self.running:
+            task.cancel()
+
+        for map_lyr in self.lyrs.values():
+            self.unwatch_lyr(map_lyr)
+
+        self.tasks.clear()
+        self.values.clear()
+        self.lyrs.clear()
+
+        self.lyr_index.layersRemoved.disconnect(self.forget_lyrs)
+
+
+def is_null(value) -> bool:
+
+    return value is None or (isinstance(value, QVariant) and value.isNull())
+
+
+def quote_value(value, field_type: QVariant.Type) -> str:
+
+    # Dates are written in ISO format, which is what the expression engine reads back
+    if isinstance(value, (QDate, QDateTime, QTime)):
+        return QgsExpression.quotedString(value.toString(Qt.ISODate))
+
+    return QgsExpression.quotedValue(value, field_type)
@@ -0,0 +1,156 @@
+# Misc
+from typing import Dict, Optional, Set
+
+# qgis
+from qgis.core import QgsExpression, QgsExpressionContext, QgsExpressionContextUtils, QgsDefaultValue, \
+    QgsVectorLayer, QgsFeature
+
+
+class ExpressionCache:
+
+    # Parsed and prepared expressions for a template's default values.
+    # Expressions are parsed as soon as they are set, so that syntax errors are found before any
+    # feature is digitized. They are prepared against the template's layer on first use, and
+    # prepared again whenever the layer or its fields change. Expressions that don't depend on the
+    # feature, the layer or any variable (e.g., '6', 'John Smith', 2 * 3) are evaluated once and
+    # folded into literal values.
+
+    def __init__(self):
+
+        self.map_lyr = None
+
+        # Field name: parsed expression
+        self.expressions: Dict[str, QgsExpression] = {}
+
+        # Field name: error message
+        self.parser_errors: Dict[str, str] = {}
+        self.eval_errors: Dict[str, str] = {}
+
+        # Populated when the expressions are prepared
+        self.prepared = False
+        self.context = None
+        self.literals: Dict[str, object] = {}
+        self.lyr_default_values: Dict[str, QgsDefaultValue] = {}
+
+    def set_expressions(self, values: Dict[str, str]) -> None:
+
+        self.expressions = {}
+        self.parser_errors = {}
+
+        for field_name, value in values.items():
+
+            expression = QgsExpression(value if value is not None else '')
+
+            if expression.hasParserError():
+                self.parser_errors[field_name] = expression.parserErrorString()
+            else:
+                self.expressions[field_name] = expression
+
+        self.invalidate()
+
+    def set_map_lyr(self, map_lyr: Optional[QgsVectorLayer]) -> None:
+
+        self.map_lyr = map_lyr
+        self.invalidate()
+
+    def invalidate(self) -> None:
+
+        self.prepared = False
+        self.context = None
+        self.literals = {}
+        self.eval_errors = {}
+        self.lyr_default_values = {}
+
+    def prepare(self) -> bool:
+
+        if self.prepared:
+            return True
+
+        if self.map_lyr is None:
+            return False
+
+        self.context = QgsExpressionContext(QgsExpressionContextUtils.globalProjectLayerScopes(self.map_lyr))
+
+        for field_name, expression in self.expressions.items():
+
+            if not expression.prepare(self.context):
+                self.eval_errors[field_name] = expression.evalErrorString()
+                continue
+
+            if is_constant(expression):
+                value = expression.evaluate(self.context)
+                if expression.hasEvalError():
+                    self.eval_errors[field_name] = expression.evalErrorString()
+                else:
+                    self.literals[field_name] = value
+
+        # Default value definitions that are set on the layer when the template is active
+        for field_name, expression in self.expressions.items():
+            if field_name in self.literals:
+                self.lyr_default_values[field_name] = QgsDefaultValue(QgsExpression.quotedValue(self.literals[field_name]))
+            else:
+                self.lyr_default_values[field_name] = QgsDefaultValue(expression.expression())
+
+        self.prepared = True
+
+        return True
+
+    def has_errors(self) -> bool:
+
+        return len(self.parser_errors) > 0 or len(self.eval_errors) > 0
+
+    def get_errors(self) -> Dict[str, str]:
+
+        return {**self.parser_errors, **self.eval_errors}
+
+    def get_lyr_default_values(self) -> Dict[str, QgsDefaultValue]:
+
+        self.prepare()
+
+        return self.lyr_default_values
+
+    def get_literals(self) -> Dict[str, object]:
+
+        self.prepare()
+
+        return self.literals
+
+    def get_referenced_columns(self) -> Set[str]:
+
+        # Fields needed to evaluate the expressions that weren't folded into literals
+        self.prepare()
+
+        columns = set()
+        for field_name, expression in self.expressions.items():
+            if field_name not in self.literals:
+                columns.update(expression.referencedColumns())
+
+        return columns
+
+    def needs_geometry(self) -> bool:
+
+        self.prepare()
+
+        return any(expression.needsGeometry() for field_name, expression in self.expressions.items()
+                   if field_name not in self.literals)
+
+    def evaluate(self, field_name: str, feature: QgsFeature):
+
+        self.prepare()
+
+        if field_name in self.literals:
+            return self.literals[field_name]
+
+        self.context.setFeature(feature)
+
+        return self.expressions[field_name].evaluate(self.context)
+
+
+def is_constant(expression: QgsExpression) -> bool:
+
+    # Function calls are never folded, since some of them aren't deterministic (e.g., 'now()', 'rand()')
+
+    return (not expression.referencedColumns()
+            and not expression.referencedVariables()
+            and not expression.referencedFunctions()
+            and not expression.needsGeometry())
@@ -0,0 +1,208 @@
+# Project
+from quickfeatures.template_record import TemplateRecord
+
+# Misc
+from typing import Dict, List, Optional
+from collections import deque
+from time import monotonic
+
+# qgis
+from qgis.core import QgsVectorLayer
+
+# PyQt
+from qgis.PyQt.QtCore import QObject, pyqtSignal
+from qgis.PyQt.QtXml import QDomDocument, QDomElement
+
+
+class FeatureCounter:
+
+    # Number of features created with a template, in total and during this session, and the times
+    # of those created during the last minute
+
+    __slots__ = ('count', 'session_count', 'session_start', 'recent')
+
+    # Length (in seconds) of the window of the rolling rate
+    WINDOW = 60
+
+    def __init__(self, count: int = 0):
+
+        self.count = count
+        self.session_count = 0
+        self.session_start = None
+        self.recent = deque()
+
+    def add(self, now: float) -> None:
+
+        self.count += 1
+        self.session_count += 1
+
+        if self.session_start is None:
+            self.session_start = now
+
+        self.recent.append(now)
+        self.trim(now)
+
+    def trim(self, now: float) -> None:
+
+        while self.recent and self.recent[0] <= now - self.WINDOW:
+            self.recent.popleft()
+
+    def features_per_minute(self, now: Optional[float] = None) -> float:
+
+        # Rolling rate over the last minute
+        now = monotonic() if now is None else now
+        self.trim(now)
+
+        return len(self.recent) * 60 / self.WINDOW
+
+    def features_per_hour(self, now: Optional[float] = None) -> float:
+
+        # Average rate since the first feature of this session
+        now = monotonic() if now is None else now
+
+        if self.session_start is None or now <= self.session_start:
+            return 0.0
+
+        return self.session_count * 3600 / max(now - self.session_start, self.WINDOW)
+
+
+class FeatureCounters(QObject):
+
+    # Counts the features created with each template. Each layer's 'featureAdded' signal is
+    # connected once, and new features are attributed to the active template. Since only the active
+    # template counts features, a layer's signal is connected the first time one of its templates is
+    # activated, not when the template is bound
+
+    countChanged = pyqtSignal(TemplateRecord)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+
+        self.counters: Dict[TemplateRecord, FeatureCounter] = {}
+
+        # Layer ID: layer, for the layers whose 'featureAdded' signal is connected
+        self.lyrs: Dict[str, QgsVectorLayer] = {}
+
+        self.active_record = None
+        self.active_lyr_id = None
+
+    def set_active(self, record: Optional[TemplateRecord], map_lyr: Optional[QgsVectorLayer]) -> None:
+
+        if record is None or map_lyr is None:
+            self.active_record = None
+            self.active_lyr_id = None
+            return
+
+        self.active_record = record
+        self.active_lyr_id = map_lyr.id()
+
+        if self.active_lyr_id not in self.lyrs:
+            self.lyrs[self.active_lyr_id] = map_lyr
+            map_lyr.featureAdded.connect(self.feature_added)
+            map_lyr.willBeDeleted.connect(self.unwatch_lyr)
+
+    def unwatch_lyr(self) -> None:
+
+        map_lyr = self.sender()
+
+        self.lyrs.pop(map_lyr.id(), None)
+        map_lyr.featureAdded.disconnect(self.feature_added)
+        map_lyr.willBeDeleted.disconnect(self.unwatch_lyr)
+
+        if self.active_lyr_id == map_lyr.id():
+            self.active_record = None
+            self.active_lyr_id = None
+
+    def feature_added(self, fid: int) -> None:
+
+        record = self.active_record
+
+        if record is None or self.sender().id() != self.active_lyr_id:
+            return
+
+        counter = self.counters.get(record)
+        if counter is None:
+            counter = self.counters[record] = FeatureCounter()
+
+        counter.add(monotonic())
+
+        self.countChanged.emit(record)
+
+    def get_counter(self, record: TemplateRecord) -> Optional[FeatureCounter]:
+
+        return self.counters.get(record)
+
+    def get_count(self, record: TemplateRecord) -> int:
+
+        counter = self.counters.get(record)
+
+        return counter.count if counter is not None else 0
+
+    def remove(self, record: TemplateRecord) -> None:
+
+        self.counters.pop(record, None)
+
+        if record is self.active_record:
+            self.active_record = None
+            self.active_lyr_id = None
+
+    def clear(self) -> None:
+
+        self.counters.clear()
+        self.active_record = None
+        self.active_lyr_id = None
+
+    def clean_up(self) -> None:
+
+        for map_lyr in self.lyrs.values():
+            map_lyr.featureAdded.disconnect(self.feature_added)
+            map_lyr.willBeDeleted.disconnect(self.unwatch_lyr)
+
+        self.lyrs.clear()
+        self.clear()
+
+    def to_xml(self, doc: QDomDocument, records: List[TemplateRecord]) -> QDomElement:
+
+        # Counts are saved by the template's ID, which is saved with the template
+        counts_elem = doc.createElement('feature_counts')
+
+        for record in records:
+
+            count = self.get_count(record)
+
+            if count > 0:
+                count_elem = doc.createElement('feature_count')
+                count_elem.setAttribute('uid', record.get_uid())
+                count_elem.setAttribute('count', str(count))
+                counts_elem.appendChild(count_elem)
+
+        return counts_elem
+
+    def from_xml(self, elem: QDomElement, records: List[TemplateRecord]) -> None:
+
+        self.counters.clear()
+
+        # Templates with the same ID (e.g., imported twice) share the count of the first one
+        records_by_uid = {}
+        for record in records:
+            records_by_uid.setdefault(record.get_uid(), record)
+
+        count_elems = elem.childNodes()
+
+        for i in range(count_elems.length()):
+
+            count_attr = count_elems.item(i).attributes()
+
+            uid = count_attr.namedItem('uid').nodeValue()
+            count = int(count_attr.namedItem('count').nodeValue())
+
+            if uid:
+                record = records_by_uid.get(uid)
+            else:
+                # Older projects save counts by the template's row, with its name to check that they match
+                row = int(count_attr.namedItem('row').nodeValue())
+                name = count_attr.namedItem('name').nodeValue()
+                record = records[row] if row < len(records) and (records[row].get_name() or '') == name else None
+
+            if record is not None:
+                self.counters[record] = FeatureCounter(count)
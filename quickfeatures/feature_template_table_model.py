@@ -1,24 +1,70 @@
 # Project
-from quickfeatures.default_value_editor import *
-from quickfeatures.feature_templates import FeatureTemplate
+from quickfeatures.default_value_editor import DefaultValueEditor
+from quickfeatures.feature_templates import FeatureTemplate, get_field_ids
+from quickfeatures.shortcut_registry import ShortcutRegistry
+from quickfeatures.save_dispatcher import LayerSaveDispatcher
+from quickfeatures.layer_index import VectorLayerIndex, lyr_ref, lyr_ref_keys
+from quickfeatures.form_suppression import FormSuppressionManager
+from quickfeatures.commit_scheduler import CommitScheduler
+from quickfeatures.feature_counters import FeatureCounters
+from quickfeatures.warm_up import LayerWarmUp
+from quickfeatures.change_coalescer import ChangeCoalescer
+from quickfeatures.distinct_values import DistinctValueCache
+from quickfeatures.table_styles import DISABLED_BRUSH
+from quickfeatures.template_library import TemplateLibrary, write_library
+from quickfeatures.template_record import TemplateRecord
+from quickfeatures.tracing import traced
 from quickfeatures.__about__ import __title__
 
 # Misc
-from typing import List
+from typing import Callable, Dict, List, Optional, Set
+from enum import IntEnum
 from pathlib import Path
 import json
 
 # qgis
 from qgis.gui import QgsMapLayerComboBox
-from qgis.core import QgsProject, QgsMapLayerProxyModel, QgsMessageLog, Qgis, QgsVectorLayer
+from qgis.core import QgsProject, QgsMapLayerProxyModel, QgsMessageLog, Qgis, QgsVectorLayer, QgsIconUtils, \
+    QgsSettings, QgsFeatureRequest, QgsFeature
+from qgis.utils import iface
 
 # PyQt
-from qgis.PyQt.QtCore import QModelIndex, Qt, QAbstractTableModel, QVariant, QSize, pyqtSlot
-from qgis.PyQt.QtGui import QColor
-from qgis.PyQt.QtWidgets import QItemDelegate, QStyledItemDelegate, QDialog, QPushButton
+from qgis.PyQt.QtCore import QModelIndex, QPersistentModelIndex, Qt, QAbstractTableModel, QAbstractProxyModel, \
+    QSize, QEvent, QTimer, QAbstractItemModel, pyqtSlot, pyqtSignal
+from qgis.PyQt.QtGui import QBrush, QIcon
+from qgis.PyQt.QtWidgets import QStyledItemDelegate, QApplication, QStyle, QStyleOptionButton
 from qgis.PyQt.QtXml import QDomElement
 
 
+# Whether the templates' layers are warmed up after templates are loaded
+WARM_UP_SETTING = 'quickfeatures/warm_up_layers'
+
+
+class TemplateColumn(IntEnum):
+
+    ACTIVE = 0
+    NAME = 1
+    SHORTCUT = 2
+    LAYER = 3
+    FEATURES = 4
+    VALUES = 5
+    REMOVE = 6
+
+
+class RowDisplay:
+
+    # What a template's row displays about its layer, and whether the template is valid
+
+    __slots__ = ('lyr_id', 'lyr_name', 'lyr_icon', 'valid')
+
+    def __init__(self, map_lyr: Optional[QgsVectorLayer], valid: bool):
+
+        self.lyr_id = map_lyr.id() if map_lyr is not None else None
+        self.lyr_name = map_lyr.name() if map_lyr is not None else 'None'
+        self.lyr_icon = QgsIconUtils.iconForLayer(map_lyr) if map_lyr is not None else None
+        self.valid = valid
+
+
 class FeatureTemplateTableModel(QAbstractTableModel):
 
     header_labels = [
@@ -26,23 +72,83 @@ class FeatureTemplateTableModel(QAbstractTableModel):
         "Name",
         "Shortcut",
         "Layer",
+        "Features",
         "Values",
         "Remove",
     ]
 
-    def __init__(self, parent):
+    # Item flags of each column
+    column_flags = [
+        Qt.ItemIsEnabled | Qt.ItemIsUserCheckable,
+        Qt.ItemIsEnabled | Qt.ItemIsEditable,
+        Qt.ItemIsEnabled | Qt.ItemIsEditable,
+        Qt.ItemIsEnabled | Qt.ItemIsEditable,
+        # These columns are painted as buttons by their delegates and have no editor
+        Qt.ItemIsEnabled,
+        Qt.ItemIsEnabled,
+        Qt.ItemIsEnabled,
+    ]
+
+    def __init__(self, parent, shortcut_registry: ShortcutRegistry, save_dispatcher: LayerSaveDispatcher):
         super().__init__(parent)
 
-        self.templates = []
+        # Template records, in the order of the table's rows, and the row of each record
+        self.templates: List[TemplateRecord] = []
+        self.rows: Dict[TemplateRecord, int] = {}
+
+        # Changes to the templates' rows are notified once per turn of the event loop
+        self.changes = ChangeCoalescer(self)
+
+        # Record: binding, for the templates that are bound to Qt (see 'get_template'). Templates are
+        # bound while they are active or have shortcut keys, and released once they are idle
+        self.bindings: Dict[TemplateRecord, FeatureTemplate] = {}
+
+        # Records whose binding was created by the caller (see 'add_templates'). These stay bound
+        self.pinned: Set[TemplateRecord] = set()
+
+        self.active_template = None
+        self.shortcut_registry = shortcut_registry
+        self.save_dispatcher = save_dispatcher
         self.highlight_brush = parent.palette().highlight()
 
+        # Reads and writes the layers' form suppression settings
+        self.form_suppression = FormSuppressionManager(self)
+
+        # Index of the project's vector layers, used to resolve the templates' layers
+        self.lyr_index = VectorLayerIndex(self, QgsProject.instance())
+        self.lyr_index.layersAdded.connect(self.rebind_orphans)
+        self.lyr_index.layersRemoved.connect(self.refresh_unbound_templates)
+        self.lyr_index.layerRenamed.connect(self.refresh_lyr_templates)
+
+        # Commits the edits of layers that have an auto-commit policy
+        self.commit_scheduler = CommitScheduler(self, self.lyr_index)
+
+        # Number of features created with each template
+        self.feature_counters = FeatureCounters(self)
+        self.feature_counters.countChanged.connect(self.refresh_count)
+
+        # Prepares the templates' layers in idle time after templates are loaded
+        self.warm_up = LayerWarmUp(self, self.warm_up_lyr)
+
+        # Distinct values of the layers' fields, to complete the values typed in the default value editor
+        self.distinct_values = DistinctValueCache(self, self.lyr_index)
+
+        # Templates whose layer was removed, indexed by the ID, source and name of that layer
+        self.orphans: Dict[tuple, List[FeatureTemplate]] = {}
+        self.orphan_keys: Dict[FeatureTemplate, List[tuple]] = {}
+
+        # Record: what its row displays. Only rows that have been painted are cached
+        self.display_cache: Dict[TemplateRecord, RowDisplay] = {}
+        self.lyr_index.layerFieldsChanged.connect(self.refresh_lyr_fields)
+
+        self.data_handlers = self.build_data_handlers()
+
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if orientation == Qt.Horizontal and role == Qt.DisplayRole:
-            header_name = self.header_labels[section]
-            if header_name == 'Active':
+            if section == TemplateColumn.ACTIVE:
                 return None
             else:
-                return header_name
+                return self.header_labels[section]
         return super().headerData(section, orientation, role)
 
     def rowCount(self, index=QModelIndex(), **kwargs) -> int:
@@ -51,203 +157,613 @@ class FeatureTemplateTableModel(QAbstractTableModel):
     def columnCount(self, index=QModelIndex(), **kwargs) -> int:
         return len(self.header_labels)
 
+    def build_data_handlers(self) -> Dict[int, List[Optional[Callable]]]:
+
+        # Role: function that returns the data of a row's record, for each column. Roles that no
+        # column provides are left out, so 'data' returns as early as possible
+        handlers = {
+            Qt.DisplayRole: {
+                TemplateColumn.NAME: TemplateRecord.get_name,
+                TemplateColumn.SHORTCUT: TemplateRecord.get_shortcut_str,
+                TemplateColumn.LAYER: self.display_lyr_name,
+                TemplateColumn.FEATURES: self.feature_counters.get_count,
+            },
+            Qt.ToolTipRole: {
+                TemplateColumn.FEATURES: self.count_tooltip,
+            },
+            Qt.DecorationRole: {
+                TemplateColumn.LAYER: self.display_lyr_icon,
+            },
+            Qt.CheckStateRole: {
+                TemplateColumn.ACTIVE: self.check_state,
+            },
+            Qt.BackgroundRole: {column: self.background for column in TemplateColumn},
+            Qt.ForegroundRole: {**{column: self.foreground for column in TemplateColumn},
+                                TemplateColumn.SHORTCUT: self.shortcut_foreground},
+        }
+
+        return {role: [column_handlers.get(column) for column in TemplateColumn]
+                for role, column_handlers in handlers.items()}
+
     def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid():
-            return QVariant()
 
+        handlers = self.data_handlers.get(role)
+        if handlers is None or not index.isValid():
+            return None
+
+        handler = handlers[index.column()]
         row = index.row()
-        column = index.column()
-        column_header_label = self.header_labels[column]
 
-        if row >= len(self.templates):
-            return QVariant()
+        if handler is None or row >= len(self.templates):
+            return None
+
+        return handler(self.templates[row])
+
+    def get_display(self, record: TemplateRecord) -> 'RowDisplay':
+
+        # Layer name, icon and validity of a record, kept until its row changes
+        display = self.display_cache.get(record)
+
+        if display is None:
+            map_lyr = self.get_map_lyr(record)
+            display = RowDisplay(map_lyr, self.is_valid(record))
+            self.display_cache[record] = display
+
+        return display
+
+    def invalidate_display(self, record: TemplateRecord) -> None:
+
+        self.display_cache.pop(record, None)
+
+    def display_lyr_name(self, record: TemplateRecord) -> str:
+
+        return self.get_display(record).lyr_name
+
+    def display_lyr_icon(self, record: TemplateRecord) -> Optional[QIcon]:
+
+        return self.get_display(record).lyr_icon
 
-        template = self.templates[row]
+    def count_tooltip(self, record: TemplateRecord) -> Optional[str]:
 
-        if role == Qt.DisplayRole:
-            if column_header_label == "Name":
-                return template.get_name()
+        counter = self.feature_counters.get_counter(record)
 
-            elif column_header_label == "Shortcut":
-                return template.get_shortcut_str()
+        if counter is None:
+            return None
 
-        if role == Qt.CheckStateRole:
-            if column_header_label == "Active":
-                if template.is_active():
-                    return Qt.Checked
-                else:
-                    return Qt.Unchecked
+        return (f"{counter.session_count} features this session\n"
+                f"{counter.features_per_minute():.1f} features per minute (last minute)\n"
+                f"{counter.features_per_hour():.0f} features per hour (this session)")
 
-        if role == Qt.BackgroundRole:
-            if template.is_active():
-                return self.highlight_brush
+    def check_state(self, record: TemplateRecord) -> Qt.CheckState:
 
-        if role == Qt.ForegroundRole:
-            if not template.is_valid():
-                return QColor(180, 180, 180)
+        return Qt.Checked if self.is_active(record) else Qt.Unchecked
 
-            if column_header_label == "Shortcut":
-                if template.shortcut.key().toString() == "":
-                    return QColor(180, 180, 180)
+    def background(self, record: TemplateRecord) -> Optional[QBrush]:
+
+        return self.highlight_brush if self.is_active(record) else None
+
+    def foreground(self, record: TemplateRecord) -> Optional[QBrush]:
+
+        return None if self.get_display(record).valid else DISABLED_BRUSH
+
+    def shortcut_foreground(self, record: TemplateRecord) -> Optional[QBrush]:
+
+        if record.shortcut_str is None:
+            return DISABLED_BRUSH
+
+        return self.foreground(record)
 
     def flags(self, index):
         if not index.isValid():
             return Qt.NoItemFlags
 
-        column_header_label = self.header_labels[index.column()]
-
-        if column_header_label == 'Active':
-            return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
-        else:
-            return Qt.ItemIsEnabled | Qt.ItemIsEditable
+        return self.column_flags[index.column()]
 
     def setData(self, index, value, role=Qt.EditRole):
         if not index.isValid():
             return False
 
-        column_header_label = self.header_labels[index.column()]
-        template = self.templates[index.row()]
+        column = index.column()
+        template = self.get_template(index.row())
 
-        if column_header_label == 'Active' and role == Qt.CheckStateRole:
+        if column == TemplateColumn.ACTIVE and role == Qt.CheckStateRole:
             template.toggle_active()
+            self.release_template(template.record)
             return True
 
-        if column_header_label == 'Layer' and role == Qt.EditRole:
+        if column == TemplateColumn.LAYER and role == Qt.EditRole:
             template.set_map_lyr(value)
+            self.release_template(template.record)
             self.dataChanged.emit(index, index)
             return True
 
-        if column_header_label == 'Shortcut':
-            if value == "":
-                value = None
-            return template.set_shortcut(value)
+        if value == "":
+            value = None
+
+        if column == TemplateColumn.SHORTCUT:
+            changed = template.set_shortcut(value)
+        elif column == TemplateColumn.NAME:
+            changed = template.set_name(value)
+        elif column == TemplateColumn.VALUES:
+            changed = template.set_default_values(value)
+        else:
+            return False
+
+        self.release_template(template.record)
+        self.invalidate_display(template.record)
+
+        # Let proxy models (i.e., the search index) know about the change
+        if changed:
+            self.dataChanged.emit(index, index)
+
+        return changed
+
+    def create_template(self, name: str, shortcut_str: str, map_lyr: QgsVectorLayer,
+                        default_values: Dict, map_lyr_ref: Dict = None) -> FeatureTemplate:
+
+        record = TemplateRecord(name, map_lyr_ref, shortcut_str, dict(default_values))
 
-        if column_header_label == 'Name':
-            if value == "":
-                value = None
-            return template.set_name(value)
+        return self.bind_record(record, map_lyr)
 
-        if column_header_label == 'Values':
-            if value == "":
-                value = None
-            return template.set_default_values(value)
+    def bind_record(self, record: TemplateRecord, map_lyr: Optional[QgsVectorLayer],
+                    deferred: bool = False) -> FeatureTemplate:
 
-    def add_templates(self, templates: List[FeatureTemplate]) -> None:
+        return FeatureTemplate(parent=self, widget=self.parent(), record=record, map_lyr=map_lyr,
+                               shortcut_registry=self.shortcut_registry, save_dispatcher=self.save_dispatcher,
+                               form_suppression=self.form_suppression, deferred=deferred)
+
+    def add_templates(self, templates: List) -> None:
+
+        # Rows are added as template records. Templates that are passed in already bound (i.e., made
+        # with 'create_template') keep their binding
         row = self.rowCount()
 
         self.beginInsertRows(QModelIndex(), row, row + len(templates) - 1)
 
         for template in templates:
-            self.templates.append(template)
 
-            template.beginActivation.connect(self.deactivate_other_templates)
+            if isinstance(template, FeatureTemplate):
+                self.add_binding(template)
+                self.pinned.add(template.record)
+                template = template.record
 
-            template.activateChanged.connect(self.refresh_template)
-            template.validChanged.connect(self.refresh_template)
+            self.rows[template] = len(self.templates)
+            self.templates.append(template)
 
         self.endInsertRows()
 
+    def add_binding(self, template: FeatureTemplate) -> None:
+
+        self.bindings[template.record] = template
+
+        template.beginActivation.connect(self.deactivate_other_templates)
+
+        template.activateChanged.connect(self.track_active_template)
+        template.activateChanged.connect(self.refresh_activation)
+        template.validChanged.connect(self.refresh_validity)
+
+        template.mapLyrChanged.connect(self.refresh_template)
+        template.mapLyrChanged.connect(self.update_orphan)
+        self.index_orphan(template)
+
+    def get_template(self, row: int) -> FeatureTemplate:
+
+        # Bind the template of a row, so that it can be activated or edited
+        record = self.templates[row]
+        template = self.bindings.get(record)
+
+        if template is None:
+            template = self.build_templates([record])[0]
+            self.add_binding(template)
+
+            # The template's fields and expressions have now been validated
+            self.invalidate_display(record)
+            self.changes.mark(row, roles=[Qt.ForegroundRole])
+
+        return template
+
+    def release_template(self, record: TemplateRecord) -> None:
+
+        # Templates that aren't active and have no shortcut keys don't need to be bound
+        template = self.bindings.get(record)
+
+        if template is None or record in self.pinned or template.is_active() or record.shortcut_str:
+            return
+
+        del self.bindings[record]
+        self.unindex_orphan(template)
+        template.delete_template()
+
+        # Unbound templates are only checked against their layer's fields
+        self.invalidate_display(record)
+
+    def get_map_lyr(self, record: TemplateRecord) -> Optional[QgsVectorLayer]:
+
+        template = self.bindings.get(record)
+
+        if template is not None:
+            return template.get_map_lyr()
+
+        map_lyr_ref = record.map_lyr_ref
+
+        return self.lyr_index.resolve(map_lyr_ref.get('id'), map_lyr_ref.get('source'), map_lyr_ref.get('name'))
+
+    def map_lyr_name(self, record: TemplateRecord) -> str:
+
+        map_lyr = self.get_map_lyr(record)
+
+        if map_lyr:
+            return map_lyr.name()
+        else:
+            return 'None'
+
+    def is_active(self, record: TemplateRecord) -> bool:
+
+        template = self.bindings.get(record)
+
+        return template is not None and template.is_active()
+
+    def is_valid(self, record: TemplateRecord) -> bool:
+
+        template = self.bindings.get(record)
+
+        if template is not None:
+            return template.is_valid()
+
+        # Templates that aren't bound are checked against their layer's fields. Their expressions
+        # are checked once they are bound
+        map_lyr = self.get_map_lyr(record)
+
+        if map_lyr is None:
+            return False
+
+        if record.default_values is None:
+            return True
+
+        return record.default_values.keys() <= set(map_lyr.fields().names())
+
     @pyqtSlot()
     def refresh_template(self) -> None:
         # QgsMessageLog.logMessage(f"Loaded map layer '{self.sender()}'", tag=__title__, level=Qgis.Info)
-        row = self.templates.index(self.sender())
+        record = self.sender().record
+
+        self.invalidate_display(record)
+        self.changes.mark(self.rows[record])
+
+    @pyqtSlot(bool)
+    def refresh_activation(self, active: bool) -> None:
+
+        # The whole row is highlighted while the template is active
+        self.changes.mark(self.rows[self.sender().record], roles=[Qt.CheckStateRole, Qt.BackgroundRole])
+
+    @pyqtSlot(bool)
+    def refresh_validity(self, valid: bool) -> None:
+
+        record = self.sender().record
+
+        self.invalidate_display(record)
+        self.changes.mark(self.rows[record], roles=[Qt.ForegroundRole])
+
+    def refresh_count(self, record: TemplateRecord) -> None:
+
+        column = TemplateColumn.FEATURES
+        self.changes.mark(self.rows[record], column, column, roles=[Qt.DisplayRole, Qt.ToolTipRole])
+
+    def refresh_lyr_templates(self, map_lyr: QgsVectorLayer) -> None:
+
+        # Layer names are displayed and searched, so rows are refreshed when their layer is renamed
+        for row, record in enumerate(self.templates):
+            if self.get_map_lyr(record) is map_lyr:
+                self.invalidate_display(record)
+                self.changes.mark(row)
+
+    def refresh_lyr_fields(self, map_lyr: QgsVectorLayer) -> None:
+
+        # The validity of unbound templates depends on their layer's fields. Bound templates check
+        # their own validity. Only rows that have been painted need to be refreshed
+        lyr_id = map_lyr.id()
 
-        index1 = self.createIndex(row, 0)
-        index2 = self.createIndex(row, self.columnCount())
+        for record, display in list(self.display_cache.items()):
+            if display.lyr_id == lyr_id and record not in self.bindings:
+                del self.display_cache[record]
+                self.changes.mark(self.rows[record], roles=[Qt.ForegroundRole])
 
-        self.dataChanged.emit(index1, index2)
+    @pyqtSlot(bool)
+    def track_active_template(self, active: bool) -> None:
+        template = self.sender()
+
+        if active:
+            self.active_template = template
+            self.feature_counters.set_active(template.record, template.get_map_lyr())
+        elif self.active_template is template:
+            self.active_template = None
+            self.feature_counters.set_active(None, None)
 
     @pyqtSlot()
     def deactivate_other_templates(self) -> None:
         template = self.sender()
+        active_template = self.active_template
 
-        for row in range(len(self.templates)):
-            if not self.templates[row] == template:
-                self.templates[row].set_active(False)
+        if active_template is None or active_template is template:
+            return
+
+        # Templates on the same layer are swapped without fully reverting the layer
+        if active_template.get_map_lyr() == template.get_map_lyr():
+            template.take_over(active_template)
+        else:
+            active_template.set_active(False)
 
-    def remove_template(self, template: FeatureTemplate) -> None:
-        try:
-            row = self.templates.index(template)
+        self.release_template(active_template.record)
 
-            self.beginRemoveRows(QModelIndex(), row, row)
+    def remove_template(self, record: TemplateRecord) -> None:
+        row = self.rows.get(record)
 
+        if row is None:
+            print(f'Template not found')
+            return
+
+        template = self.bindings.pop(record, None)
+        if template is not None:
             template.delete_template()
+            self.unindex_orphan(template)
 
-            self.templates.remove(template)
+        # Pending changes refer to the rows as they are before the removal
+        self.changes.flush()
 
-            self.endRemoveRows()
+        self.beginRemoveRows(QModelIndex(), row, row)
 
-        except ValueError:
-            print(f'Template not found')
+        self.pinned.discard(record)
+        self.feature_counters.remove(record)
+        self.invalidate_display(record)
+        del self.templates[row]
+        del self.rows[record]
+
+        for i in range(row, len(self.templates)):
+            self.rows[self.templates[i]] = i
+
+        self.endRemoveRows()
 
     def clear_templates(self):
+        self.warm_up.cancel()
+
         if len(self.templates) > 0:
 
             self.beginRemoveRows(QModelIndex(), 0, self.rowCount() - 1)
 
-            for template in self.templates:
-                template.delete_template()
+            with self.form_suppression.batch():
+                for template in self.bindings.values():
+                    template.delete_template()
 
             self.templates.clear()
+            self.rows.clear()
+            self.display_cache.clear()
+            self.bindings.clear()
+            self.pinned.clear()
+            self.feature_counters.clear()
+            self.active_template = None
+            self.orphans.clear()
+            self.orphan_keys.clear()
+
+            # Including the changes of the templates that were just deactivated
+            self.changes.discard()
 
             self.endRemoveRows()
 
+    def index_orphan(self, template: FeatureTemplate) -> None:
+
+        self.unindex_orphan(template)
+
+        if template.is_orphaned():
+            keys = lyr_ref_keys(template.get_map_lyr_ref())
+            self.orphan_keys[template] = keys
+            for key in keys:
+                self.orphans.setdefault(key, []).append(template)
+
+    def unindex_orphan(self, template: FeatureTemplate) -> None:
+
+        for key in self.orphan_keys.pop(template, []):
+            orphans = self.orphans[key]
+            orphans.remove(template)
+            if not orphans:
+                del self.orphans[key]
+
+    @pyqtSlot()
+    def update_orphan(self) -> None:
+        self.index_orphan(self.sender())
+
+    def rebind_orphans(self, map_lyrs: List[QgsVectorLayer]) -> None:
+
+        # Bind orphaned templates to layers that are added to the project, matching their
+        # layer's ID first, then its source and then its name. Each match is tried against all the
+        # added layers before the next one, so that a template whose layer is in the batch isn't
+        # bound to another layer that comes first and has the same name. Bound templates are no
+        # longer indexed as orphans, so later passes skip them
+
+        lyr_refs = [(map_lyr, lyr_ref(map_lyr)) for map_lyr in map_lyrs]
+
+        for ref_key in ['id', 'source', 'name']:
+            for map_lyr, ref in lyr_refs:
+                for template in list(self.orphans.get((ref_key, ref[ref_key]), [])):
+                    template.set_map_lyr(map_lyr)
+
+        self.refresh_unbound_templates()
+
+    def refresh_unbound_templates(self, lyr_ids: List[str] = None) -> None:
+
+        # Templates that aren't bound resolve their layer when they are displayed
+        if len(self.bindings) < len(self.templates):
+            self.display_cache.clear()
+            self.changes.mark_all()
+
+    def clean_up(self) -> None:
+        self.clear_templates()
+        self.warm_up.cancel()
+        self.commit_scheduler.clean_up()
+        self.feature_counters.clean_up()
+        self.distinct_values.clean_up()
+        self.lyr_index.clean_up()
+
     def print_templates(self) -> None:
-        for tp in self.templates:
-            print({f"Template: '{tp.get_name()}', Active: {str(tp.is_active())}"})
+        for record in self.templates:
+            print({f"Template: '{record.get_name()}', Active: {str(self.is_active(record))}"})
 
-    def get_templates(self):
+    def get_templates(self) -> List[TemplateRecord]:
         return self.templates
 
-    def from_json(self, path: Path):
+    def load_templates(self, template_data: List[Dict]) -> None:
+
+        # Bulk load templates that have already been parsed from a file
+        self.load_records([TemplateRecord.from_dict(d) for d in template_data])
+
+    def load_records(self, records: List[TemplateRecord]) -> None:
+
+        # Only the templates with shortcut keys are bound when they are loaded
+
         self.clear_templates()
 
-        templates = []
+        for i in self.check_shortcuts([record.shortcut_str for record in records]):
+            records[i].shortcut_str = None
 
-        qgs_project = QgsProject().instance()
+        for template in self.build_templates([record for record in records if record.shortcut_str]):
+            self.add_binding(template)
 
-        with open(path) as f:
-            data = json.load(f)
+        self.add_templates(records)
 
-        for d in data:
-            map_lyr = vector_lyr_by_name(qgs_project, d['map_lyr_name'])
+        if QgsSettings().value(WARM_UP_SETTING, False, type=bool):
+            self.start_warm_up()
 
-            template = FeatureTemplate(parent=self, widget=self.parent(), name=d['name'],
-                                       shortcut_str=d['shortcut_str'],
-                                       map_lyr=map_lyr, default_values=d['default_values'])
+    def start_warm_up(self) -> None:
 
-            templates.append(template)
+        # Layers of templates with shortcut keys are warmed up first, since they are the quickest
+        # to activate
+        lyr_ids = {}
 
-        self.add_templates(templates)
+        for template in self.bindings.values():
+            if template.get_map_lyr() is not None:
+                lyr_ids[template.get_map_lyr().id()] = None
 
-    def to_json(self, path: Path):
-        templates = self.get_templates()
+        for record in self.templates:
+            map_lyr = self.get_map_lyr(record)
+            if map_lyr is not None:
+                lyr_ids[map_lyr.id()] = None
+
+        self.warm_up.start(list(lyr_ids))
+
+    def warm_up_lyr(self, lyr_id: str) -> None:
+
+        # Do what a template's first activation on this layer would otherwise do. The layer may have
+        # been removed since the warm-up started
+        map_lyr = self.lyr_index.lyrs_by_id.get(lyr_id)
+
+        if map_lyr is None or map_lyr.dataProvider() is None:
+            return
+
+        # Open the provider and read its capabilities
+        map_lyr.dataProvider().capabilities()
+        map_lyr.getFeatures(QgsFeatureRequest().setLimit(1).setFlags(QgsFeatureRequest.NoGeometry)).nextFeature(QgsFeature())
+
+        # Snapshot of the form configuration
+        self.form_suppression.get_suppress(map_lyr)
 
-        out_list = []
+        # Fields and expressions of the layer's bound templates. Both are cached by the template
+        for template in list(self.bindings.values()):
+            if template.get_map_lyr() is map_lyr:
+                template.get_field_ids()
+                template.expression_cache.prepare()
+
+    def build_templates(self, records: List[TemplateRecord]) -> List[FeatureTemplate]:
+
+        # Layers are resolved once, templates are bound without validation or signal connections,
+        # and then validated in one pass per layer
+
+        templates = []
+
+        for record in records:
+
+            map_lyr = self.lyr_index.resolve(record.map_lyr_ref.get('id'), record.map_lyr_ref.get('source'),
+                                             record.map_lyr_ref.get('name'))
+
+            templates.append(self.bind_record(record, map_lyr, deferred=True))
+
+        self.validate_templates(templates)
 
         for template in templates:
+            template.connect_signals()
+
+        return templates
+
+    @staticmethod
+    def validate_templates(templates: List[FeatureTemplate]) -> None:
+
+        # Group templates by layer so that each layer's field map is only built once
+        templates_by_lyr = {}
+        for template in templates:
+            templates_by_lyr.setdefault(template.get_map_lyr(), []).append(template)
+
+        for map_lyr, lyr_templates in templates_by_lyr.items():
+
+            if map_lyr is None:
+                for template in lyr_templates:
+                    template.set_validity(False)
 
-            template_json = {
-                'name': template.get_name(),
-                'map_lyr_name': template.map_lyr.name(),
-                'default_values': template.get_default_values(),
-                'shortcut_str': template.get_shortcut_str()
-            }
+            else:
+                field_ids = get_field_ids(map_lyr)
+                for template in lyr_templates:
+                    template.set_field_ids(field_ids)
+                    template.set_validity(template.is_valid_for(field_ids.keys()))
+
+    def check_shortcuts(self, shortcut_strs: List[str]) -> Dict[int, str]:
+
+        # Validate the shortcuts of all templates in one pass, against QGIS and against each other.
+        # Conflicts are reported in a single message and returned, so that they can be dropped
+
+        self.shortcut_registry.refresh()
+
+        conflicts = self.shortcut_registry.find_conflicts(shortcut_strs)
+
+        if conflicts:
+            conflict_strs = []
+            for i, owner in conflicts.items():
+                conflict_strs.append(f"'{shortcut_strs[i]}' ({owner})")
+
+            iface.messageBar().pushMessage("Shortcut keys",
+                                           f"The following shortcut keys are already being used: "
+                                           f"{', '.join(conflict_strs)}",
+                                           level=Qgis.Warning)
+
+        return conflicts
+
+    @traced('from_json')
+    def from_json(self, path: Path):
+
+        with open(path) as f:
+            data = json.load(f)
+
+        self.load_templates(data)
 
-            out_list.append(template_json)
+    def to_json(self, path: Path):
+
+        out_list = [record.to_dict() for record in self.get_templates()]
 
         json_object = json.dumps(out_list, indent=4)
 
         with open(path, "w") as outfile:
             outfile.write(json_object)
 
+    @traced('from_library')
+    def from_library(self, path: Path):
 
-    def from_xml(self, elem: QDomElement):
-        self.clear_templates()
+        # Only the library's index is read. Templates' values are read when they are needed
+        self.load_records(TemplateLibrary.open(path).get_entries())
 
-        templates = []
+    def to_library(self, path: Path):
+
+        write_library(path, self.get_templates())
+
+    @traced('from_xml')
+    def from_xml(self, elem: QDomElement):
 
-        qgs_project = QgsProject().instance()
+        template_data = []
 
         template_elems = elem.childNodes()
 
@@ -259,15 +775,22 @@ class FeatureTemplateTableModel(QAbstractTableModel):
             name = template_attr.namedItem('name').nodeValue()
             shortcut_str = template_attr.namedItem('shortcut').nodeValue()
             map_lyr_name = template_attr.namedItem('map_lyr').nodeValue()
+            map_lyr_id = template_attr.namedItem('map_lyr_id').nodeValue()
+            map_lyr_source = template_attr.namedItem('map_lyr_source').nodeValue()
+            uid = template_attr.namedItem('uid').nodeValue()
+
+            # Templates without a layer are saved with a layer name of 'None'
+            if map_lyr_name == 'None' and not map_lyr_id:
+                map_lyr_name = ''
 
             default_values = {}
             default_value_elems = template_elem.namedItem('default_values').childNodes()
 
             # QgsMessageLog.logMessage(f"Template '{name}' has {default_value_elems.length()} default values", tag=__title__, level=Qgis.Warning)
 
-            for i in range(default_value_elems.length()):
+            for j in range(default_value_elems.length()):
 
-                default_value_elem = default_value_elems.item(i)
+                default_value_elem = default_value_elems.item(j)
                 default_value_attr = default_value_elem.attributes()
 
                 field = default_value_attr.namedItem('field').nodeValue()
@@ -275,18 +798,24 @@ class FeatureTemplateTableModel(QAbstractTableModel):
 
                 default_values[field] = value
 
-            map_lyr = vector_lyr_by_name(qgs_project, map_lyr_name)
-
-            template = FeatureTemplate(parent=self, widget=self.parent(), name=name, shortcut_str=shortcut_str,
-                                       map_lyr=map_lyr, default_values=default_values)
-
-            templates.append(template)
+            template_data.append({
+                'name': name,
+                'map_lyr_name': map_lyr_name,
+                'map_lyr_id': map_lyr_id,
+                'map_lyr_source': map_lyr_source,
+                'default_values': default_values,
+                'shortcut_str': shortcut_str,
+                'uid': uid
+            })
 
-        self.add_templates(templates)
+        self.load_templates(template_data)
 
 
 class QgsMapLayerComboDelegate(QStyledItemDelegate):
 
+    # The layer name and icon are provided by the model and painted by the default delegate.
+    # The combo box only exists while the cell is being edited
+
     def __init__(self, parent):
         super().__init__(parent)
 
@@ -294,90 +823,134 @@ class QgsMapLayerComboDelegate(QStyledItemDelegate):
         editor = QgsMapLayerComboBox(parent)
         editor.setFilters(QgsMapLayerProxyModel.VectorLayer)
         editor.setAllowEmptyLayer(True)
-        editor.layerChanged.connect(lambda: self.closeEditor.emit(editor))
+        editor.layerChanged.connect(lambda: self.commit_and_close(editor))
+
+        # Open the drop-down list right away, so that selecting a layer only requires one click
+        QTimer.singleShot(0, editor.showPopup)
         return editor
 
     def setEditorData(self, editor, index):
-        map_lyr = index.model().templates[index.row()].map_lyr
+        index = source_index(index)
+        model = index.model()
+        map_lyr = model.get_map_lyr(model.get_templates()[index.row()])
+
+        # Don't let the initial value commit and close the editor
+        editor.blockSignals(True)
         editor.setLayer(map_lyr)
+        editor.blockSignals(False)
 
     def setModelData(self, editor, model, index):
         data = editor.currentLayer()
         model.setData(index, data)
 
+    def commit_and_close(self, editor):
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
 
-class DefaultValueDelegate(QItemDelegate):
 
-    def __init__(self, parent, table_icon):
+class IconButtonDelegate(QStyledItemDelegate):
+
+    # Paints a push button in its cell instead of hosting a persistent editor widget.
+    # Clicks are caught in 'editorEvent' and emitted as 'buttonClicked'
+
+    buttonClicked = pyqtSignal(QAbstractItemModel, QModelIndex)
+
+    def __init__(self, parent, icon):
         super().__init__(parent)
-        self.table_icon = table_icon
+        self.icon = icon
+        self.icon_size = QSize(20, 20)
+
+    def paint(self, painter, option, index):
+
+        # Paint background (i.e., highlighting of active template)
+        super().paint(painter, option, index)
+
+        button = QStyleOptionButton()
+        button.rect = option.rect
+        button.icon = self.icon
+        button.iconSize = self.icon_size
+        button.state = QStyle.State_Enabled
+
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        return QSize(self.icon_size.width() + 12, self.icon_size.height() + 8)
 
     def createEditor(self, parent, option, index):
-        editor = QPushButton(parent)
+        return None
 
-        editor.setIcon(self.table_icon)
-        editor.setIconSize(QSize(20, 20))
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if option.rect.contains(event.pos()):
+                self.buttonClicked.emit(model, index)
+                return True
 
-        editor.dialog = DefaultValueEditor(parent)
-        editor.dialog.accepted.connect(lambda: self.commitData.emit(editor))
+        return super().editorEvent(event, model, option, index)
 
-        editor.clicked.connect(lambda: self.init_dialog(editor, index))
-        return editor
 
-    def setEditorData(self, editor, index):
-        # This is a bit of a hack, but the editor's data is getting populated in
-        # 'init_diolog' instead, given that I want this to happen every time
-        # the button is clicked
-        ...
+class DefaultValueDelegate(IconButtonDelegate):
 
-    def setModelData(self, editor, model, index):
+    def __init__(self, parent, table_icon):
+        super().__init__(parent, table_icon)
 
-        # Only set model data if dialog was accepted
-        if editor.dialog.result() == QDialog.Accepted:
-            data = editor.dialog.get_editor_default_values()
-            model.setData(index, data)
+        self.buttonClicked.connect(self.button_clicked)
 
-            # Reset result of dialog
-            editor.dialog.setResult(QDialog.Rejected)
+        # A single dialog is shared by all rows. It is created the first time it is needed
+        self.dialog = None
+        self.dialog_model = None
+        self.dialog_index = QPersistentModelIndex()
 
-    # Populate the dialog and then open it`
-    def init_dialog(self, editor, index):
-        template = index.model().templates[index.row()]
-        editor.dialog.populate_table(template.map_lyr, template.get_default_values())
-        editor.dialog.open()
+    def get_dialog(self, distinct_values: DistinctValueCache) -> DefaultValueEditor:
 
+        if self.dialog is None:
+            self.dialog = DefaultValueEditor(self.parent(), distinct_values)
+            self.dialog.accepted.connect(self.dialog_accepted)
 
-class RemoveDelegate(QItemDelegate):
+        return self.dialog
 
-    def __init__(self, parent, delete_icon):
-        super().__init__(parent)
-        self.delete_icon = delete_icon
+    def button_clicked(self, model, index):
 
-    def createEditor(self, parent, option, index):
-        model = index.model()
-        template = model.templates[index.row()]
-        editor = QPushButton(parent)
-        editor.setIcon(self.delete_icon)
-        editor.setIconSize(QSize(20, 20))
-        editor.clicked.connect(lambda: model.remove_template(template))
-        # editor.setWindowFlags(Qt.Popup)
-        return editor
+        template_index = source_index(index)
+        template_model = template_index.model()
+        record = template_model.get_templates()[template_index.row()]
 
-    def setModelData(self, editor, model, index):
-        model.setData(index, True)
+        dialog = self.get_dialog(template_model.distinct_values)
+        dialog.populate_table(template_model.get_map_lyr(record), record.get_default_values())
+
+        # The row may move while the dialog is open
+        self.dialog_model = model
+        self.dialog_index = QPersistentModelIndex(index)
 
+        dialog.open()
+
+    def dialog_accepted(self):
+
+        if self.dialog_index.isValid():
+            data = self.dialog.get_editor_default_values()
+            self.dialog_model.setData(QModelIndex(self.dialog_index), data)
+
+        self.dialog_model = None
+        self.dialog_index = QPersistentModelIndex()
+
+
+class RemoveDelegate(IconButtonDelegate):
+
+    def __init__(self, parent, delete_icon):
+        super().__init__(parent, delete_icon)
 
-def vector_lyr_by_name(qgs_project: QgsProject, name):
+        self.buttonClicked.connect(self.button_clicked)
 
-    # Get all map layers with this name
-    map_lyrs = qgs_project.mapLayersByName(name)
+    def button_clicked(self, model, index):
+        index = source_index(index)
+        record = index.model().get_templates()[index.row()]
+        index.model().remove_template(record)
 
-    # Filter out anything that is not a vector layer
-    vec_lyrs = [map_lyr for map_lyr in map_lyrs if isinstance(map_lyr, QgsVectorLayer)]
 
-    vec_lyr = None
+def source_index(index: QModelIndex) -> QModelIndex:
 
-    if len(vec_lyrs) > 0:
-        vec_lyr = vec_lyrs[0]
+    # The table view may show the templates through a proxy model (e.g., the search filter)
+    while isinstance(index.model(), QAbstractProxyModel):
+        index = index.model().mapToSource(index)
 
-    return vec_lyr
+    return index
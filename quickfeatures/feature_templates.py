@@ -1,40 +1,53 @@
 # Project
-from quickfeatures.__about__ import __title__
+from quickfeatures.shortcut_registry import ShortcutRegistry
+from quickfeatures.save_dispatcher import LayerSaveDispatcher
+from quickfeatures.layer_index import lyr_ref
+from quickfeatures.template_record import TemplateRecord
+from quickfeatures.expression_cache import ExpressionCache
+from quickfeatures.form_suppression import FormSuppressionManager
+from quickfeatures.tracing import tracer, traced
 
 # Misc
-from typing import Dict, List
+from typing import Dict
+from time import perf_counter
 
 # qgis
-from qgis.gui import QgsMapLayerComboBox
-from qgis.core import QgsDefaultValue, QgsProject, Qgis, QgsMapLayerProxyModel, QgsMapLayer, QgsVectorLayer, QgsMessageLog
+from qgis.core import QgsDefaultValue, Qgis, QgsMapLayer, QgsVectorLayer, QgsFeatureRequest
 from qgis.utils import iface
 
 # PyQt
 from qgis.PyQt.QtCore import QObject, pyqtSignal
 from qgis.PyQt.QtGui import QKeySequence
-from qgis.PyQt.QtWidgets import QShortcut,QApplication, QAction
+from qgis.PyQt.QtWidgets import QShortcut
 from qgis.PyQt.QtXml import QDomDocument, QDomElement
 
+
 class FeatureTemplate(QObject):
 
     beginActivation = pyqtSignal()
     activateChanged = pyqtSignal(bool)
     validChanged = pyqtSignal(bool)
+    mapLyrChanged = pyqtSignal()
+
+    # Binds a template record to Qt: its shortcut, its layer's signals and the default value
+    # definitions it applies when it is activated. Changes are written through to the record
 
-    def __init__(self, parent, widget, name: str, shortcut_str: str, map_lyr: QgsVectorLayer,
-                 default_values: Dict):
+    def __init__(self, parent, widget, record: TemplateRecord, map_lyr: QgsVectorLayer,
+                 shortcut_registry: ShortcutRegistry, save_dispatcher: LayerSaveDispatcher,
+                 form_suppression: FormSuppressionManager, deferred: bool = False):
 
         super().__init__(parent)
 
-        self.name = name
+        # ID, data source and name of the template's layer are kept in the record's 'map_lyr_ref'
+        # when the layer is removed from the project, so that the template can be bound to it again
+        # if it is re-added
+        self.record = record
+        self.shortcut_registry = shortcut_registry
+        self.save_dispatcher = save_dispatcher
+        self.form_suppression = form_suppression
 
         # QgsMessageLog.logMessage(f"Template's parent class is: {self.parent().__class__.__name__}", tag=__title__, level=Qgis.Info)
 
-        # Register shortcut
-        self.shortcut = QShortcut(QKeySequence(), widget)
-        self.shortcut.activated.connect(self.toggle_active)
-        self.set_shortcut(shortcut_str)
-
         self.active = False
         self.valid = False
 
@@ -43,52 +56,134 @@ class FeatureTemplate(QObject):
         self.revert_suppress = 0
         self.revert_values = {}
 
-        self.set_map_lyr(map_lyr)
-        self.set_default_values(default_values)
+        # Duration (in seconds) of each step of the last activation
+        self.activation_timings: Dict[str, float] = {}
+
+        # Parsed and prepared default value expressions
+        self.expression_cache = ExpressionCache()
+
+        # Field name: field index, for the template's layer. Built on first use and rebuilt
+        # when the layer's fields change
+        self.field_ids = None
+
+        # Register shortcut
+        self.shortcut = QShortcut(QKeySequence(), widget)
+        self.shortcut.activated.connect(self.toggle_active)
+
+        if deferred:
+            # Used for bulk loads: the shortcut has already been checked, and validation and
+            # signal connections are done afterwards for all templates at once
+            # (see 'FeatureTemplateTableModel.load_templates')
+            self.shortcut_registry.bind(self.shortcut, record.shortcut_str)
+            self.map_lyr = map_lyr
+            if map_lyr is not None:
+                record.map_lyr_ref = lyr_ref(map_lyr)
+            self.default_values = to_default_values(record.get_default_values())
+            self.expression_cache.set_map_lyr(map_lyr)
+            self.expression_cache.set_expressions(record.get_default_values())
+
+        else:
+            self.set_shortcut(record.shortcut_str)
+            self.set_map_lyr(map_lyr, keep_ref=True)
+            self.set_default_values(record.get_default_values())
+            self.connect_signals()
 
-        QgsProject.instance().writeMapLayer.connect(self.prevent_save)
         self.destroyed.connect(self.confirm_deletion)
 
+    def connect_signals(self) -> None:
+
+        if self.map_lyr is not None:
+            self.connect_map_lyr()
+
     def get_name(self) -> str:
 
-        return self.name
+        return self.record.name
 
     def set_name(self, name) -> bool:
 
         if name is None:
             return False
         else:
-            self.name = name
+            self.record.name = name
             return True
 
-    def set_map_lyr(self, map_lyr):
+    def set_map_lyr(self, map_lyr, keep_ref: bool = False):
+
+        # If 'keep_ref' is True, removing the layer keeps the reference to it (i.e., the template
+        # is orphaned rather than unassigned)
 
         self.set_active(False)
 
+        if self.map_lyr is not None:
+            # QgsMessageLog.logMessage(f"Removed map layer'", tag=__title__, level=Qgis.Info)
+            self.disconnect_map_lyr()
+            self.map_lyr = None
+
         if map_lyr:
             # QgsMessageLog.logMessage(f"Loaded map layer '{map_lyr.name()}'", tag=__title__, level=Qgis.Info)
             self.map_lyr = map_lyr
-            self.map_lyr.willBeDeleted.connect(self.remove_map_lyr)
-            self.map_lyr.attributeAdded.connect(self.check_validity)
-            self.map_lyr.attributeDeleted.connect(self.check_validity)
-        else:
-            # QgsMessageLog.logMessage(f"Removed map layer'", tag=__title__, level=Qgis.Info)
-            if self.map_lyr is not None:
-                self.map_lyr.willBeDeleted.disconnect(self.remove_map_lyr)
-                self.map_lyr.attributeAdded.disconnect(self.check_validity)
-                self.map_lyr.attributeDeleted.disconnect(self.check_validity)
-                self.map_lyr = None
+            self.record.map_lyr_ref = lyr_ref(map_lyr)
+            self.connect_map_lyr()
+
+        elif not keep_ref:
+            self.record.map_lyr_ref = {}
+
+        self.expression_cache.set_map_lyr(self.map_lyr)
+        self.field_ids = None
+
+        self.check_validity()
+
+        self.mapLyrChanged.emit()
 
+    def connect_map_lyr(self) -> None:
+
+        self.map_lyr.willBeDeleted.connect(self.remove_map_lyr)
+        self.map_lyr.attributeAdded.connect(self.fields_changed)
+        self.map_lyr.attributeDeleted.connect(self.fields_changed)
+        self.map_lyr.updatedFields.connect(self.fields_changed)
+
+    def disconnect_map_lyr(self) -> None:
+
+        self.map_lyr.willBeDeleted.disconnect(self.remove_map_lyr)
+        self.map_lyr.attributeAdded.disconnect(self.fields_changed)
+        self.map_lyr.attributeDeleted.disconnect(self.fields_changed)
+        self.map_lyr.updatedFields.disconnect(self.fields_changed)
+
+    def fields_changed(self) -> None:
+
+        # Field indices need to be rebuilt, and expressions prepared again against the layer's new fields
+        self.field_ids = None
+        self.expression_cache.invalidate()
         self.check_validity()
 
+    def get_field_ids(self) -> Dict[str, int]:
+
+        if self.field_ids is None:
+            self.field_ids = get_field_ids(self.map_lyr)
+
+        return self.field_ids
+
+    def set_field_ids(self, field_ids: Dict[str, int]) -> None:
+
+        # Used when validating many templates of the same layer, so they can share one field map
+        self.field_ids = field_ids
+
     def remove_map_lyr(self):
 
-        self.set_map_lyr(None)
+        self.set_map_lyr(None, keep_ref=True)
 
     def get_map_lyr(self) -> QgsVectorLayer:
 
         return self.map_lyr
 
+    def get_map_lyr_ref(self) -> Dict[str, str]:
+
+        return self.record.map_lyr_ref
+
+    def is_orphaned(self) -> bool:
+
+        return self.map_lyr is None and len(self.record.map_lyr_ref) > 0
+
     def map_lyr_name(self) -> str:
 
         if self.map_lyr:
@@ -100,6 +195,7 @@ class FeatureTemplate(QObject):
 
         return self.valid
 
+    @traced('check_validity')
     def check_validity(self) -> bool:
 
         valid = True
@@ -108,12 +204,8 @@ class FeatureTemplate(QObject):
             valid = False
         else:
 
-            # Check if all default value names exist within map layer
-            map_field_names = [field.name() for field in self.map_lyr.fields().toList()]
-            default_value_field_names = [key for key in self.default_values]
-            all_names_valid = all([item in map_field_names for item in default_value_field_names])
-
-            if not all_names_valid:
+            # Check if all default value names exist within map layer and all expressions are valid
+            if not self.is_valid_for(self.get_field_ids().keys()):
                 #QgsMessageLog.logMessage(f"Feature template '{self.get_name()}' invalid: did not have correct attribute fields", tag=__title__, level=Qgis.Warning)
                 valid = False
 
@@ -121,6 +213,16 @@ class FeatureTemplate(QObject):
 
         return valid
 
+    def is_valid_for(self, field_names) -> bool:
+
+        if not self.default_values.keys() <= field_names:
+            return False
+
+        # Prepare expressions now rather than when the first feature is created
+        self.expression_cache.prepare()
+
+        return not self.expression_cache.has_errors()
+
     def set_validity(self, value):
 
         if value:
@@ -140,33 +242,47 @@ class FeatureTemplate(QObject):
 
         self.set_active(not self.is_active())
 
+    @traced('set_active')
     def set_active(self, value) -> None:
 
         if value:
             if not self.is_active() and self.is_valid():
                 # QgsMessageLog.logMessage(f"Activated template '{self.name}'", tag=__title__, level=Qgis.Info)
 
-                # Emit signal
-                self.beginActivation.emit()
+                start_time = perf_counter()
+
+                # Form suppression changes made while switching templates are written once per layer
+                with self.form_suppression.batch():
 
-                # Get values that will be reverted
-                self.revert_values = self.get_lyr_default_definitions()
-                self.revert_suppress = self.get_lyr_form_suppress()
+                    # Emit signal. If another template is active on the same layer, it is handed over
+                    # to this template (see 'take_over'), which leaves this template active
+                    self.beginActivation.emit()
 
-                # Set default definition and suppress form
-                self.set_lyr_default_definitions(self.default_values)
-                self.set_lyr_form_suppress(1)
+                    if not self.is_active():
 
-                # Set this template as active
-                self.active = True
+                        # Get values that will be reverted
+                        self.revert_values = self.get_lyr_default_definitions()
+                        self.revert_suppress = self.get_lyr_form_suppress()
+
+                        # Set default definition and suppress form
+                        self.set_lyr_default_definitions(self.expression_cache.get_lyr_default_values())
+                        self.set_lyr_form_suppress(1)
+
+                        # Set this template as active
+                        self.active = True
+
+                self.save_dispatcher.set_active_template(self)
                 self.activateChanged.emit(True)
 
+                self.activation_timings = {'defaults': perf_counter() - start_time}
+
                 # Set the template's layer as active in the interface
-                map_lyr = self.get_map_lyr()
-                iface.setActiveLayer(map_lyr)
-                if not map_lyr.isEditable():
-                    map_lyr.startEditing()
-                iface.actionAddFeature().trigger()
+                self.start_digitizing()
+
+                if tracer.enabled:
+                    for step, seconds in self.activation_timings.items():
+                        tracer.record(f"set_active.{step}", seconds)
+                    tracer.watch_lyr(self.map_lyr)
 
         else:
             if self.active:
@@ -177,34 +293,106 @@ class FeatureTemplate(QObject):
                 self.set_lyr_form_suppress(self.revert_suppress)
 
                 # Set this template as inactive
-                self.active = False
-                self.activateChanged.emit(False)
+                self.hand_over()
+
+    def start_digitizing(self) -> None:
+
+        # Make the template's layer the active layer, start editing it and select the 'Add Feature'
+        # tool. Each step is skipped if it is already the case, since they trigger layer tree, style
+        # dock and map tool updates in QGIS. When switching templates while digitizing on the same
+        # layer, only the default values are swapped
 
+        map_lyr = self.get_map_lyr()
+        timings = self.activation_timings
+
+        step_time = perf_counter()
+        if iface.activeLayer() != map_lyr:
+            iface.setActiveLayer(map_lyr)
+        timings['active_layer'] = perf_counter() - step_time
+
+        step_time = perf_counter()
+        if not map_lyr.isEditable():
+            map_lyr.startEditing()
+        timings['editing'] = perf_counter() - step_time
+
+        step_time = perf_counter()
+        add_feature_action = iface.actionAddFeature()
+        map_tool = iface.mapCanvas().mapTool()
+        if not (add_feature_action.isChecked() and map_tool is not None and map_tool.action() == add_feature_action):
+            add_feature_action.trigger()
+        timings['map_tool'] = perf_counter() - step_time
+
+    def get_activation_timings(self) -> Dict[str, float]:
+
+        return self.activation_timings
+
+    def take_over(self, other) -> None:
+
+        # Switch from another active template on the same layer. Only the fields whose default
+        # values differ are written to the layer, form suppression is left as it is, and the other
+        # template's snapshot of the layer's original settings is carried over, so that deactivating
+        # this template restores the layer to its state before either template was activated
+
+        current_values = other.expression_cache.get_lyr_default_values()
+        new_values = self.expression_cache.get_lyr_default_values()
+
+        revert_values = dict(other.revert_values)
+
+        field_ids = self.get_field_ids()
+        for field_name in new_values:
+            if field_name not in revert_values:
+                revert_values[field_name] = self.map_lyr.defaultValueDefinition(field_ids[field_name])
+
+        changed_values = {}
+
+        for field_name, default_value in new_values.items():
+            current_value = current_values.get(field_name)
+            if current_value is None or not same_default_value(current_value, default_value):
+                changed_values[field_name] = default_value
+
+        # Fields that were only set by the other template are reverted
+        for field_name in current_values:
+            if field_name not in new_values:
+                changed_values[field_name] = revert_values[field_name]
+
+        self.set_lyr_default_definitions(changed_values)
+
+        self.revert_values = revert_values
+        self.revert_suppress = other.revert_suppress
+
+        other.hand_over()
+
+        self.active = True
+
+    def hand_over(self) -> None:
+
+        # Mark this template as inactive, without touching its layer
+        self.active = False
+        self.revert_values = {}
+        self.save_dispatcher.remove_active_template(self)
+        self.activateChanged.emit(False)
+
+    @traced('set_shortcut')
     def set_shortcut(self, value) -> bool:
 
-        if value:
+        owner = self.shortcut_registry.get_owner(value, self.shortcut)
+
+        if owner is not None:
+            iface.messageBar().pushMessage("Shortcut keys",
+                                           f"The shortcut keys '{value}' is already being used by {owner}",
+                                           level=Qgis.Warning)
+            return False
+
+        if not self.shortcut_registry.bind(self.shortcut, value):
+            return False
+
+        self.record.shortcut_str = self.shortcut.key().toString() or None
 
-            # Get list of existing shortcuts
-            existing_shortcuts = []
-            for widget in QApplication.topLevelWidgets():
-                shortcut_keys = [shortcut.key() for shortcut in widget.findChildren(QShortcut)]
-                action_keys = [action.shortcut() for action in widget.findChildren(QAction)]
-                existing_shortcuts.extend(shortcut_keys)
-                existing_shortcuts.extend(action_keys)
-
-            # Check if shortcut already exists
-            for sc in existing_shortcuts:
-                if sc.toString() and value == sc:
-                    iface.messageBar().pushMessage("Shortcut keys",
-                                                   f"The shortcut keys '{value}' is already being used",
-                                                   level=Qgis.Warning)
-                    return False
-
-        self.shortcut.setKey(QKeySequence(value))
         return True
 
     def delete_shortcut(self) -> None:
 
+        self.shortcut_registry.release(self.shortcut)
         self.shortcut.setParent(None)
         self.shortcut.deleteLater()
 
@@ -228,50 +416,103 @@ class FeatureTemplate(QObject):
         #QgsMessageLog.logMessage(f"Default values set: {values}", tag=__title__, level=Qgis.Info)
         self.set_active(False)
 
-        default_values = {}
-        for key, value in values.items():
-
-            default_values[key] = QgsDefaultValue(value)
-
-        self.default_values = default_values
+        self.record.default_values = dict(values)
+        self.default_values = to_default_values(values)
+        self.expression_cache.set_expressions(values)
 
         self.check_validity()
 
+        # Report invalid expressions right away, rather than when features are created
+        errors = self.expression_cache.get_errors()
+        if errors:
+            error_strs = [f"{field_name} ({error})" for field_name, error in errors.items()]
+            iface.messageBar().pushMessage("Attribute values",
+                                           f"Template '{self.get_name()}' has invalid expressions: "
+                                           f"{', '.join(error_strs)}",
+                                           level=Qgis.Warning)
+
         return True
 
     def set_lyr_default_definitions(self, default_values: Dict[str, QgsDefaultValue]) -> None:
 
-        field_ids = [get_field_id(self.map_lyr, field_name) for field_name in default_values]
-        def_values = [default_values[field_name] for field_name in default_values]
+        field_ids = self.get_field_ids()
 
-        for i in range(len(default_values)):
-            self.map_lyr.setDefaultValueDefinition(field_ids[i], def_values[i])
+        for field_name, default_value in default_values.items():
+            self.map_lyr.setDefaultValueDefinition(field_ids[field_name], default_value)
 
     def get_lyr_default_definitions(self) -> dict:
 
-        field_names = [field_name for field_name in self.default_values]
-
-        field_ids = [get_field_id(self.map_lyr, field_name) for field_name in field_names]
-        default_values = {}
+        field_ids = self.get_field_ids()
 
-        for i in range(len(field_ids)):
-            default_values[field_names[i]] = self.map_lyr.defaultValueDefinition(field_ids[i])
-
-        return default_values
+        return {field_name: self.map_lyr.defaultValueDefinition(field_ids[field_name])
+                for field_name in self.default_values}
 
     def set_lyr_form_suppress(self, suppress: int) -> None:
 
-        edit_form = self.map_lyr.editFormConfig()
-        edit_form.setSuppress(Qgis.AttributeFormSuppression(suppress))
-        self.map_lyr.setEditFormConfig(edit_form)
+        self.form_suppression.set_suppress(self.map_lyr, suppress)
 
     def get_lyr_form_suppress(self) -> int:
 
-        return self.map_lyr.editFormConfig().suppress()
+        return self.form_suppression.get_suppress(self.map_lyr)
+
+    @traced('apply_to_selection')
+    def apply_to_selection(self) -> int:
+
+        # Set the template's values on the layer's selected features, as a single edit command
+        # (i.e., one undo entry). Returns the number of features that were changed, which is 0 if the
+        # layer can't be edited
+
+        if not self.is_valid() or self.map_lyr.selectedFeatureCount() == 0:
+            return 0
+
+        map_lyr = self.map_lyr
+        field_ids = self.get_field_ids()
+        cache = self.expression_cache
+
+        literals = {field_ids[field_name]: value for field_name, value in cache.get_literals().items()}
+        expressions = [(field_ids[field_name], field_name) for field_name in self.default_values
+                       if field_name not in cache.get_literals()]
+
+        # Only fetch the fields that are changed (their old values are passed on, so that the edit buffer
+        # doesn't fetch each feature again) and those that the expressions refer to
+        request = QgsFeatureRequest()
+        columns = cache.get_referenced_columns()
+        if QgsFeatureRequest.ALL_ATTRIBUTES not in columns:
+            request.setSubsetOfAttributes(list(columns) + list(self.default_values), map_lyr.fields())
+        if not cache.needs_geometry():
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+
+        if not map_lyr.isEditable() and not map_lyr.startEditing():
+            iface.messageBar().pushMessage("Apply template", f"The layer '{map_lyr.name()}' can't be edited",
+                                           level=Qgis.Warning)
+            return 0
+
+        map_lyr.beginEditCommand(f"Apply template '{self.get_name()}'")
+
+        count = 0
 
+        for feature in map_lyr.getSelectedFeatures(request):
+
+            new_values = dict(literals)
+            for field_id, field_name in expressions:
+                new_values[field_id] = cache.evaluate(field_name, feature)
+
+            old_values = {field_id: feature.attribute(field_id) for field_id in new_values}
+
+            if map_lyr.changeAttributeValues(feature.id(), new_values, old_values):
+                count += 1
+
+        map_lyr.endEditCommand()
+
+        map_lyr.triggerRepaint()
+
+        return count
+
+    @traced('prevent_save')
     def prevent_save(self, map_lyr: QgsMapLayer, elem: QDomElement, doc: QDomDocument):
 
-        # This method is called when the 'writeMapLayer' signal is emitted
+        # This method is called by the 'LayerSaveDispatcher' when the 'writeMapLayer' signal is emitted
+        # for this template's layer while it is active.
         # The 'elem' QDomElement contains the layer information that will be saved to file
         # This method is needed to prevent the default values that are activated by the
         # template to be saved to file.
@@ -287,39 +528,20 @@ class FeatureTemplate(QObject):
 
             for i in range(defaults_nodes.length()):
                 default_node = defaults_nodes.item(i)
-                field_value = default_node.attributes().namedItem('field').nodeValue()
-                for field_name in revert_values:
-                    if field_value == field_name:
-                        revert_expression = revert_values[field_name].expression()
-                        expression_node = default_node.attributes().namedItem('expression')
-                        expression_node.setNodeValue(revert_expression)
-                        #QgsMessageLog.logMessage(f"Field {field} setting expression: {revert_expression}", tag=__title__, level=Qgis.Info)
+                field_name = default_node.attributes().namedItem('field').nodeValue()
+
+                revert_value = revert_values.get(field_name)
+                if revert_value is not None:
+                    expression_node = default_node.attributes().namedItem('expression')
+                    expression_node.setNodeValue(revert_value.expression())
+                    #QgsMessageLog.logMessage(f"Field {field_name} setting expression: {revert_value.expression()}", tag=__title__, level=Qgis.Info)
 
             featformsuppress_node = elem.namedItem('featformsuppress').namedItem("#text")
             featformsuppress_node.setNodeValue(str(revert_suppress))
 
     def to_xml(self, doc: QDomDocument) -> QDomElement:
-    
-        template_elem = doc.createElement('template')
-        
-        template_elem.setAttribute('name', self.get_name())
-        template_elem.setAttribute('map_lyr', self.map_lyr_name())
-        template_elem.setAttribute('shortcut', self.get_shortcut_str())
-
-        default_values_elem = doc.createElement('default_values')
-        
-        for key, value in self.get_default_values().items():
-                    
-            default_value = doc.createElement('default_value')
-
-            default_value.setAttribute('field', key)
-            default_value.setAttribute('value', str(value))
-            
-            default_values_elem.appendChild(default_value)
-            
-        template_elem.appendChild(default_values_elem)
-        
-        return template_elem
+
+        return self.record.to_xml(doc)
 
     @staticmethod
     def confirm_deletion(self):
@@ -334,11 +556,17 @@ class FeatureTemplate(QObject):
         self.setParent(None)
         self.deleteLater()
 
-def get_field_id(map_lyr: QgsVectorLayer, field_name: str) -> int:
+def to_default_values(values: Dict) -> Dict[str, QgsDefaultValue]:
+
+    return {key: QgsDefaultValue(value) for key, value in values.items()}
+
+
+def same_default_value(value1: QgsDefaultValue, value2: QgsDefaultValue) -> bool:
+
+    return value1.expression() == value2.expression() and value1.applyOnUpdate() == value2.applyOnUpdate()
+
 
-    field_idx = map_lyr.fields().indexFromName(field_name)
+def get_field_ids(map_lyr: QgsVectorLayer) -> Dict[str, int]:
 
-    if field_idx == -1:
-        raise Exception(f"Could not find '{field_name}'")
+    return {field_name: field_id for field_id, field_name in enumerate(map_lyr.fields().names())}
 
-    return field_idx
\ No newline at end of file
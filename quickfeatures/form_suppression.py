@@ -0,0 +1,107 @@
+# Misc
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+# qgis
+from qgis.core import Qgis, QgsVectorLayer
+
+# PyQt
+from qgis.PyQt.QtCore import QObject
+
+
+class FormSuppressionManager(QObject):
+
+    # Reads and writes the 'Suppress attribute form' setting of layers.
+    # Getting or setting it through 'editFormConfig' copies the layer's whole form configuration,
+    # and 'setEditFormConfig' makes QGIS rebuild the layer's forms. The setting is therefore read
+    # once per layer and edit session, writes are skipped when the layer is already in the
+    # requested state, and writes made within a 'batch' are collapsed to one per layer.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Layer ID: known suppression setting
+        self.suppress_states: Dict[str, int] = {}
+
+        # Layer ID: (layer, suppression setting) to write when the current batch ends
+        self.pending: Dict[str, Tuple[QgsVectorLayer, int]] = {}
+        self.batch_depth = 0
+
+        # Whether the manager is writing a layer's form configuration, whose change it already knows
+        self.writing = False
+
+    def get_suppress(self, map_lyr: QgsVectorLayer) -> int:
+
+        lyr_id = map_lyr.id()
+
+        if lyr_id in self.pending:
+            return self.pending[lyr_id][1]
+
+        suppress = self.suppress_states.get(lyr_id)
+
+        if suppress is None:
+            suppress = int(map_lyr.editFormConfig().suppress())
+            self.suppress_states[lyr_id] = suppress
+
+            # Read the setting again if an edit session starts or stops, or if the form configuration is
+            # changed (e.g., in the layer's properties)
+            map_lyr.editingStarted.connect(self.invalidate_lyr)
+            map_lyr.editingStopped.connect(self.invalidate_lyr)
+            map_lyr.editFormConfigChanged.connect(self.invalidate_lyr)
+            map_lyr.willBeDeleted.connect(self.invalidate_lyr)
+
+        return suppress
+
+    def set_suppress(self, map_lyr: QgsVectorLayer, suppress: int) -> None:
+
+        if self.batch_depth > 0:
+            self.pending[map_lyr.id()] = (map_lyr, suppress)
+            return
+
+        self.write_suppress(map_lyr, suppress)
+
+    def write_suppress(self, map_lyr: QgsVectorLayer, suppress: int) -> None:
+
+        if self.get_suppress(map_lyr) == suppress:
+            return
+
+        edit_form = map_lyr.editFormConfig()
+        edit_form.setSuppress(Qgis.AttributeFormSuppression(suppress))
+
+        self.writing = True
+        try:
+            map_lyr.setEditFormConfig(edit_form)
+        finally:
+            self.writing = False
+
+        self.suppress_states[map_lyr.id()] = suppress
+
+    @contextmanager
+    def batch(self):
+
+        self.batch_depth += 1
+
+        try:
+            yield
+
+        finally:
+            self.batch_depth -= 1
+
+            if self.batch_depth == 0:
+                pending = self.pending
+                self.pending = {}
+                for map_lyr, suppress in pending.values():
+                    self.write_suppress(map_lyr, suppress)
+
+    def invalidate_lyr(self) -> None:
+
+        if self.writing:
+            return
+
+        map_lyr = self.sender()
+
+        if self.suppress_states.pop(map_lyr.id(), None) is not None:
+            map_lyr.editingStarted.disconnect(self.invalidate_lyr)
+            map_lyr.editingStopped.disconnect(self.invalidate_lyr)
+            map_lyr.editFormConfigChanged.disconnect(self.invalidate_lyr)
+            map_lyr.willBeDeleted.disconnect(self.invalidate_lyr)
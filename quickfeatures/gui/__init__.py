@@ -0,0 +1,20 @@
+# Standard
+from importlib import import_module
+from pathlib import Path
+
+# PyQt
+from qgis.PyQt import uic
+
+
+def load_form_class(ui_name: str, class_name: str):
+
+    # Forms are compiled to Python modules ('ui_<name>.py') by 'scripts/compile_ui.py'.
+    # If a compiled module is unavailable, the .ui file is compiled at runtime instead
+
+    try:
+        module = import_module(f"{__name__}.ui_{ui_name}")
+        return getattr(module, class_name)
+
+    except (ImportError, AttributeError):
+        form_class, _ = uic.loadUiType(str(Path(__file__).parent / f"{ui_name}.ui"))
+        return form_class
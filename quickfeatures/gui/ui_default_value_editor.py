@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'quickfeatures/gui/default_value_editor.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from qgis.PyQt import QtCore, QtGui, QtWidgets
+
+
+class Ui_Dialog(object):
+    def setupUi(self, Dialog):
+        Dialog.setObjectName("Dialog")
+        Dialog.setWindowModality(QtCore.Qt.NonModal)
+        Dialog.resize(496, 355)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(Dialog.sizePolicy().hasHeightForWidth())
+        Dialog.setSizePolicy(sizePolicy)
+        Dialog.setMinimumSize(QtCore.QSize(0, 0))
+        self.verticalLayout = QtWidgets.QVBoxLayout(Dialog)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontal_layout1 = QtWidgets.QHBoxLayout()
+        self.horizontal_layout1.setObjectName("horizontal_layout1")
+        self.info_icon = QtWidgets.QLabel(Dialog)
+        self.info_icon.setMaximumSize(QtCore.QSize(30, 30))
+        self.info_icon.setText("")
+        self.info_icon.setScaledContents(True)
+        self.info_icon.setObjectName("info_icon")
+        self.horizontal_layout1.addWidget(self.info_icon)
+        self.info_label = QtWidgets.QLabel(Dialog)
+        self.info_label.setWordWrap(True)
+        self.info_label.setObjectName("info_label")
+        self.horizontal_layout1.addWidget(self.info_label)
+        self.verticalLayout.addLayout(self.horizontal_layout1)
+        self.vertical_layout = QtWidgets.QVBoxLayout()
+        self.vertical_layout.setSizeConstraint(QtWidgets.QLayout.SetMinAndMaxSize)
+        self.vertical_layout.setObjectName("vertical_layout")
+        self.table_view = QtWidgets.QTableView(Dialog)
+        self.table_view.setObjectName("table_view")
+        self.table_view.verticalHeader().setVisible(False)
+        self.vertical_layout.addWidget(self.table_view)
+        self.horizontal_layout2 = QtWidgets.QHBoxLayout()
+        self.horizontal_layout2.setObjectName("horizontal_layout2")
+        self.accept_button = QtWidgets.QPushButton(Dialog)
+        self.accept_button.setObjectName("accept_button")
+        self.horizontal_layout2.addWidget(self.accept_button)
+        self.cancel_button = QtWidgets.QPushButton(Dialog)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.cancel_button.sizePolicy().hasHeightForWidth())
+        self.cancel_button.setSizePolicy(sizePolicy)
+        self.cancel_button.setObjectName("cancel_button")
+        self.horizontal_layout2.addWidget(self.cancel_button)
+        self.vertical_layout.addLayout(self.horizontal_layout2)
+        self.verticalLayout.addLayout(self.vertical_layout)
+
+        self.retranslateUi(Dialog)
+        QtCore.QMetaObject.connectSlotsByName(Dialog)
+
+    def retranslateUi(self, Dialog):
+        _translate = QtCore.QCoreApplication.translate
+        Dialog.setWindowTitle(_translate("Dialog", "Attribute Values"))
+        self.info_label.setText(_translate("Dialog", "Attribute values are stored as expressions and must be formatted accordingly. For example, strings should be single-quoted."))
+        self.accept_button.setText(_translate("Dialog", "Accept"))
+        self.cancel_button.setText(_translate("Dialog", "Cancel"))
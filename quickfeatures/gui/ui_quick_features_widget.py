@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'quickfeatures/gui/quick_features_widget.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from qgis.PyQt import QtCore, QtGui, QtWidgets
+
+
+class Ui_plugin_widget(object):
+    def setupUi(self, plugin_widget):
+        plugin_widget.setObjectName("plugin_widget")
+        plugin_widget.resize(567, 378)
+        self.verticalLayout = QtWidgets.QVBoxLayout(plugin_widget)
+        self.verticalLayout.setContentsMargins(0, 0, 0, 0)
+        self.verticalLayout.setSpacing(0)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.toolbar_layout = QtWidgets.QHBoxLayout()
+        self.toolbar_layout.setSpacing(0)
+        self.toolbar_layout.setObjectName("toolbar_layout")
+        self.verticalLayout.addLayout(self.toolbar_layout)
+        self.table_view = QtWidgets.QTableView(plugin_widget)
+        self.table_view.setObjectName("table_view")
+        self.table_view.verticalHeader().setVisible(False)
+        self.verticalLayout.addWidget(self.table_view)
+
+        self.retranslateUi(plugin_widget)
+        QtCore.QMetaObject.connectSlotsByName(plugin_widget)
+
+    def retranslateUi(self, plugin_widget):
+        _translate = QtCore.QCoreApplication.translate
+        plugin_widget.setWindowTitle(_translate("plugin_widget", "Form"))
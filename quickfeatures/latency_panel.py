@@ -0,0 +1,94 @@
+# Project
+from quickfeatures.tracing import LatencyTracer
+
+# Standard
+from pathlib import Path
+
+# PyQt
+from qgis.PyQt.QtCore import QTimer
+from qgis.PyQt.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, \
+    QHeaderView, QFileDialog
+
+
+class LatencyPanel(QWidget):
+
+    # Debug panel showing the latency percentiles recorded by the tracer
+
+    header_labels = [
+        "Operation",
+        "Count",
+        "Mean (ms)",
+        "p50 (ms)",
+        "p90 (ms)",
+        "p99 (ms)",
+        "Max (ms)",
+    ]
+
+    summary_keys = ['mean', 'p50', 'p90', 'p99', 'max']
+
+    def __init__(self, tracer: LatencyTracer, parent=None):
+        super().__init__(parent)
+
+        self.tracer = tracer
+
+        # Table
+        self.table = QTableWidget(0, len(self.header_labels), self)
+        self.table.setHorizontalHeaderLabels(self.header_labels)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        # Buttons
+        self.reset_button = QPushButton("Reset", self)
+        self.reset_button.clicked.connect(self.reset)
+        self.export_button = QPushButton("Export", self)
+        self.export_button.clicked.connect(self.export_dialog)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.reset_button)
+        button_layout.addWidget(self.export_button)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+
+        # Refresh while the panel is visible
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+
+        summary = self.tracer.summary()
+
+        self.table.setRowCount(len(summary))
+
+        for row, (name, stats) in enumerate(summary.items()):
+
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, QTableWidgetItem(str(stats['count'])))
+
+            for col, key in enumerate(self.summary_keys, start=2):
+                value = stats[key]
+                self.table.setItem(row, col, QTableWidgetItem('' if value is None else f"{value * 1000:.3f}"))
+
+    def reset(self):
+        self.tracer.reset()
+        self.refresh()
+
+    def export_dialog(self):
+
+        file_name = QFileDialog.getSaveFileName(self, 'Save file', 'c:\\', "JSON file (*.json)")[0]
+
+        if file_name != '':
+            self.tracer.to_json(Path(file_name))
@@ -0,0 +1,176 @@
+# Misc
+from typing import Dict, List, Optional
+
+# qgis
+from qgis.core import QgsProject, QgsMapLayer, QgsVectorLayer
+
+# PyQt
+from qgis.PyQt.QtCore import QObject, pyqtSignal
+
+
+class VectorLayerIndex(QObject):
+
+    # Index of a project's vector layers by ID, data source and name. It is built once, and then
+    # kept up to date as layers are added, removed or renamed, so that resolving a template's
+    # layer is a dictionary lookup instead of a scan of the project's layers
+
+    layersAdded = pyqtSignal(list)
+    layersRemoved = pyqtSignal(list)
+    layerRenamed = pyqtSignal(QgsVectorLayer)
+    layerFieldsChanged = pyqtSignal(QgsVectorLayer)
+
+    def __init__(self, parent, qgs_project: QgsProject):
+        super().__init__(parent)
+
+        self.qgs_project = qgs_project
+
+        self.lyrs_by_id: Dict[str, QgsVectorLayer] = {}
+        self.lyrs_by_source: Dict[str, List[QgsVectorLayer]] = {}
+        self.lyrs_by_name: Dict[str, List[QgsVectorLayer]] = {}
+
+        # Name and data source under which each layer ID is indexed. Layers can be renamed, and
+        # removed layers are already deleted when 'layersRemoved' is emitted, so neither is read
+        # from the layer when it is removed from the index
+        self.lyr_names: Dict[str, str] = {}
+        self.lyr_sources: Dict[str, str] = {}
+
+        for map_lyr in self.qgs_project.mapLayers().values():
+            self.index_lyr(map_lyr)
+
+        self.qgs_project.layersAdded.connect(self.add_lyrs)
+        self.qgs_project.layersRemoved.connect(self.remove_lyrs)
+
+    def resolve(self, lyr_id: Optional[str] = None, source: Optional[str] = None,
+                name: Optional[str] = None) -> Optional[QgsVectorLayer]:
+
+        # Resolve a layer by ID first, then by data source, then by name. If several layers share
+        # the same data source or name, the first one that was added is used
+
+        if lyr_id:
+            map_lyr = self.lyrs_by_id.get(lyr_id)
+            if map_lyr is not None:
+                return map_lyr
+
+        if source:
+            map_lyrs = self.lyrs_by_source.get(source)
+            if map_lyrs:
+                return map_lyrs[0]
+
+        if name:
+            map_lyrs = self.lyrs_by_name.get(name)
+            if map_lyrs:
+                return map_lyrs[0]
+
+        return None
+
+    def index_lyr(self, map_lyr: QgsMapLayer) -> bool:
+
+        if not isinstance(map_lyr, QgsVectorLayer) or map_lyr.id() in self.lyrs_by_id:
+            return False
+
+        lyr_id = map_lyr.id()
+
+        self.lyrs_by_id[lyr_id] = map_lyr
+        self.lyrs_by_source.setdefault(map_lyr.publicSource(), []).append(map_lyr)
+        self.lyrs_by_name.setdefault(map_lyr.name(), []).append(map_lyr)
+        self.lyr_names[lyr_id] = map_lyr.name()
+        self.lyr_sources[lyr_id] = map_lyr.publicSource()
+
+        map_lyr.nameChanged.connect(self.rename_lyr)
+        map_lyr.updatedFields.connect(self.update_lyr_fields)
+
+        return True
+
+    def add_lyrs(self, map_lyrs: List[QgsMapLayer]) -> None:
+
+        added_lyrs = [map_lyr for map_lyr in map_lyrs if self.index_lyr(map_lyr)]
+
+        if added_lyrs:
+            self.layersAdded.emit(added_lyrs)
+
+    def remove_lyrs(self, lyr_ids: List[str]) -> None:
+
+        removed_ids = []
+
+        for lyr_id in lyr_ids:
+
+            map_lyr = self.lyrs_by_id.pop(lyr_id, None)
+
+            if map_lyr is None:
+                continue
+
+            remove_from(self.lyrs_by_source, self.lyr_sources.pop(lyr_id), map_lyr)
+            remove_from(self.lyrs_by_name, self.lyr_names.pop(lyr_id), map_lyr)
+            removed_ids.append(lyr_id)
+
+        if removed_ids:
+            self.layersRemoved.emit(removed_ids)
+
+    def rename_lyr(self) -> None:
+
+        map_lyr = self.sender()
+        lyr_id = map_lyr.id()
+
+        if lyr_id not in self.lyrs_by_id:
+            return
+
+        remove_from(self.lyrs_by_name, self.lyr_names[lyr_id], map_lyr)
+        self.lyrs_by_name.setdefault(map_lyr.name(), []).append(map_lyr)
+        self.lyr_names[lyr_id] = map_lyr.name()
+
+        self.layerRenamed.emit(map_lyr)
+
+    def update_lyr_fields(self) -> None:
+
+        map_lyr = self.sender()
+
+        if map_lyr.id() in self.lyrs_by_id:
+            self.layerFieldsChanged.emit(map_lyr)
+
+    def clean_up(self) -> None:
+
+        self.qgs_project.layersAdded.disconnect(self.add_lyrs)
+        self.qgs_project.layersRemoved.disconnect(self.remove_lyrs)
+
+        for map_lyr in self.lyrs_by_id.values():
+            map_lyr.nameChanged.disconnect(self.rename_lyr)
+            map_lyr.updatedFields.disconnect(self.update_lyr_fields)
+
+        self.lyrs_by_id.clear()
+        self.lyrs_by_source.clear()
+        self.lyrs_by_name.clear()
+        self.lyr_names.clear()
+        self.lyr_sources.clear()
+
+
+def lyr_ref(map_lyr: Optional[QgsMapLayer]) -> Dict[str, str]:
+
+    # Information needed to find a layer again, either in the same project or in another one
+
+    if map_lyr is None:
+        return {}
+
+    return {
+        'id': map_lyr.id(),
+        'source': map_lyr.publicSource(),
+        'name': map_lyr.name(),
+    }
+
+
+def lyr_ref_keys(ref: Dict[str, str]) -> List[tuple]:
+
+    return [(key, ref[key]) for key in ['id', 'source', 'name'] if ref.get(key)]
+
+
+def remove_from(lyrs_by_key: Dict[str, List[QgsVectorLayer]], key: str, map_lyr: QgsVectorLayer) -> None:
+
+    map_lyrs = lyrs_by_key.get(key)
+
+    if map_lyrs is None:
+        return
+
+    # Layers are compared by identity, since removed layers may already be deleted
+    map_lyrs[:] = [other_lyr for other_lyr in map_lyrs if other_lyr is not map_lyr]
+
+    if not map_lyrs:
+        del lyrs_by_key[key]
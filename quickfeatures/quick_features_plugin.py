@@ -1,36 +1,103 @@
 # Project
 from quickfeatures.__about__ import __title__
-from quickfeatures.quick_features_widget import QuickFeaturesWidget
 
 # qgis
+from qgis.core import QgsProject
 from qgis.gui import QgisInterface
-from qgis.utils import showPluginHelp
 
 # PyQT
 from qgis.PyQt.QtCore import Qt
-from qgis.PyQt.QtGui import QIcon
-from qgis.PyQt.QtWidgets import QAction, QDockWidget
+from qgis.PyQt.QtWidgets import QDockWidget
+from qgis.PyQt.QtXml import QDomDocument
+
+# Object name of the dock, under which QGIS saves whether it is shown
+DOCK_OBJECT_NAME = 'QuickFeaturesDock'
 
 
 class QuickFeaturesPlugin:
 
+    # Only the dock and a project-load hook are set up when QGIS starts. The plugin's widget (and
+    # its template model, shortcut registry and save dispatcher) is built the first time the dock
+    # is shown, or when a project that has templates is loaded
+
     def __init__(self, iface: QgisInterface):
         self.dock_widget = None
+        self.shortcut_registry = None
+        self.save_dispatcher = None
         self.iface = iface
 
     def initGui(self):
 
-        # Load Dock Widget
         self.dock_widget = QDockWidget(__title__, self.iface.mainWindow())
-        self.dock_widget.setWidget(QuickFeaturesWidget(self.iface.mainWindow()))
+        self.dock_widget.setObjectName(DOCK_OBJECT_NAME)
+        self.dock_widget.visibilityChanged.connect(self.dock_visibility_changed)
         self.iface.addDockWidget(Qt.RightDockWidgetArea, self.dock_widget)
 
+        QgsProject.instance().readProject.connect(self.project_load)
+
+    def dock_visibility_changed(self, visible: bool):
+
+        if visible:
+            self.get_widget()
+
+    def project_load(self, doc: QDomDocument):
+
+        # Once built, the widget loads projects itself
+        root = doc.childNodes().item(0)
+
+        if self.dock_widget.widget() is None and not root.namedItem('quick_features').isNull():
+            self.get_widget().project_load(doc)
+
+    def get_widget(self):
+
+        widget = self.dock_widget.widget()
+
+        if widget is None:
+            widget = self.build_widget()
+
+        return widget
+
+    def build_widget(self):
+
+        from quickfeatures.quick_features_widget import QuickFeaturesWidget
+        from quickfeatures.shortcut_registry import ShortcutRegistry
+        from quickfeatures.save_dispatcher import LayerSaveDispatcher
+
+        QgsProject.instance().readProject.disconnect(self.project_load)
+
+        # Registry of shortcut keys used by QGIS and by the plugin's templates
+        self.shortcut_registry = ShortcutRegistry(self.iface.mainWindow())
+
+        # Single handler for the project's 'writeMapLayer' signal
+        self.save_dispatcher = LayerSaveDispatcher(self.iface.mainWindow())
+
+        widget = QuickFeaturesWidget(self.shortcut_registry, self.save_dispatcher, self.iface.mainWindow())
+        self.dock_widget.setWidget(widget)
+
+        return widget
+
     def unload(self):
 
-        # Clean up templates
-        self.dock_widget.widget().clean_up()
+        self.dock_widget.visibilityChanged.disconnect(self.dock_visibility_changed)
+
+        if self.dock_widget.widget() is None:
+            QgsProject.instance().readProject.disconnect(self.project_load)
+        else:
+            # Clean up templates
+            self.dock_widget.widget().clean_up()
 
         # Clean up dock widget
         self.dock_widget.hide()
         self.iface.removeDockWidget(self.dock_widget)
         self.dock_widget.deleteLater()
+
+        # Clean up shortcut registry
+        if self.shortcut_registry is not None:
+            self.shortcut_registry.deleteLater()
+            self.shortcut_registry = None
+
+        # Clean up save dispatcher
+        if self.save_dispatcher is not None:
+            self.save_dispatcher.clean_up()
+            self.save_dispatcher.deleteLater()
+            self.save_dispatcher = None
@@ -1,5 +1,15 @@
 # Project
-from quickfeatures.feature_template_table_model import *
+from quickfeatures.feature_template_table_model import FeatureTemplateTableModel, TemplateColumn, \
+    QgsMapLayerComboDelegate, DefaultValueDelegate, RemoveDelegate, WARM_UP_SETTING
+from quickfeatures.shortcut_registry import ShortcutRegistry
+from quickfeatures.save_dispatcher import LayerSaveDispatcher
+from quickfeatures.gui import load_form_class
+from quickfeatures.latency_panel import LatencyPanel
+from quickfeatures.auto_commit_dialog import AutoCommitDialog
+from quickfeatures.tracing import tracer, traced
+from quickfeatures.template_library import is_library
+from quickfeatures.template_search import TemplateFilterProxyModel
+from quickfeatures.template_record import TemplateRecord
 from quickfeatures.__about__ import __title__
 
 # Standard
@@ -8,30 +18,43 @@ import os
 
 # qgis
 from qgis.core import QgsMessageLog, QgsProject, Qgis, QgsApplication, QgsSettings, QgsMapLayer
+from qgis.gui import QgsFilterLineEdit
+from qgis.utils import iface
 
 # PyQt
-from qgis.PyQt import uic
 from qgis.PyQt.QtCore import QSize
 from qgis.PyQt.QtGui import QIcon
-from qgis.PyQt.QtWidgets import QWidget, QHeaderView, QFileDialog, QPushButton, QToolBar, QAction
+from qgis.PyQt.QtWidgets import QWidget, QHeaderView, QFileDialog, QPushButton, QToolBar, QAction, QProgressBar, \
+    QToolButton, QHBoxLayout
 from qgis.PyQt.QtXml import QDomDocument, QDomElement
 
-class QuickFeaturesWidget(QWidget):
+FORM_CLASS = load_form_class(Path(__file__).stem, 'Ui_plugin_widget')
 
-    def __init__(self, parent=None):
+LIBRARY_SUFFIX = '.qftl'
+LIBRARY_FILTER = f"Template library (*{LIBRARY_SUFFIX})"
+FILE_FILTERS = f"{LIBRARY_FILTER};;JSON file (*.json)"
+
+
+class QuickFeaturesWidget(QWidget, FORM_CLASS):
+
+    def __init__(self, shortcut_registry: ShortcutRegistry, save_dispatcher: LayerSaveDispatcher, parent=None):
 
         super().__init__(parent)
 
+        self.shortcut_registry = shortcut_registry
+        self.save_dispatcher = save_dispatcher
+
         self.icon_dir = os.path.join(os.path.dirname(__file__), "resources/icons")
 
-        # Load UI file
-        uic.loadUi(Path(__file__).parent / "gui/{}.ui".format(Path(__file__).stem), self)
+        # Set up UI
+        self.setupUi(self)
 
         # Deactivate 'Reuse last value' setting
         QgsSettings().setValue('qgis/digitizing/reuseLastValues', False)
 
         # Initialize table
         self.table_model = None
+        self.table_proxy_model = None
         self.table_map_lyr_delegate = None
         self.default_value_delegate = None
         self.init_table()
@@ -53,6 +76,20 @@ class QuickFeaturesWidget(QWidget):
         self.action_save_templates.setStatusTip("Save templates")
         self.action_save_templates.triggered.connect(self.save_templates_dialog)
 
+        self.action_apply_template = QAction(QIcon(QgsApplication.iconPath("mActionCalculateField.svg")), "Apply template to selection", self)
+        self.action_apply_template.setStatusTip("Set the active template's values on the selected features")
+        self.action_apply_template.triggered.connect(self.apply_template)
+
+        self.action_auto_commit = QAction(QIcon(QgsApplication.iconPath("mActionSaveEdits.svg")), "Auto-commit", self)
+        self.action_auto_commit.setStatusTip("Commit the active template's layer every few features or seconds")
+        self.action_auto_commit.triggered.connect(self.auto_commit_dialog)
+
+        self.action_warm_up = QAction(QIcon(QgsApplication.iconPath("mActionRefresh.svg")), "Prepare layers", self)
+        self.action_warm_up.setStatusTip("Prepare the layers of loaded templates in the background")
+        self.action_warm_up.setCheckable(True)
+        self.action_warm_up.setChecked(QgsSettings().value(WARM_UP_SETTING, False, type=bool))
+        self.action_warm_up.toggled.connect(self.set_warm_up)
+
         # Toolbar
         self.toolbar = QToolBar()
         self.toolbar_layout.addWidget(self.toolbar)
@@ -60,8 +97,48 @@ class QuickFeaturesWidget(QWidget):
         self.toolbar.addAction(self.action_clear_templates)
         self.toolbar.addAction(self.action_load_templates)
         self.toolbar.addAction(self.action_save_templates)
+        self.toolbar.addAction(self.action_apply_template)
+        self.toolbar.addAction(self.action_auto_commit)
         self.toolbar.setIconSize(QSize(18,18))
 
+        # Search box. Pressing Enter activates the first template that is shown
+        self.search_box = QgsFilterLineEdit(self)
+        self.search_box.setShowSearchIcon(True)
+        self.search_box.setPlaceholderText("Search templates")
+        self.search_box.textChanged.connect(self.table_proxy_model.set_search_text)
+        self.search_box.returnPressed.connect(self.activate_top_template)
+        self.verticalLayout.insertWidget(1, self.search_box)
+
+        # Progress of the layers' warm-up after templates are loaded
+        self.warm_up_bar = QProgressBar(self)
+        self.warm_up_bar.setFormat("Preparing layers: %v/%m")
+        self.warm_up_cancel = QToolButton(self)
+        self.warm_up_cancel.setIcon(QIcon(QgsApplication.iconPath("mTaskCancel.svg")))
+        self.warm_up_cancel.setToolTip("Stop preparing layers")
+        self.warm_up_cancel.clicked.connect(self.table_model.warm_up.cancel)
+        self.warm_up_widget = QWidget(self)
+        warm_up_layout = QHBoxLayout(self.warm_up_widget)
+        warm_up_layout.setContentsMargins(0, 0, 0, 0)
+        warm_up_layout.addWidget(self.warm_up_bar)
+        warm_up_layout.addWidget(self.warm_up_cancel)
+        self.warm_up_widget.hide()
+        self.verticalLayout.insertWidget(2, self.warm_up_widget)
+        self.table_model.warm_up.progressChanged.connect(self.warm_up_progress)
+        self.table_model.warm_up.finished.connect(self.warm_up_widget.hide)
+
+        # Latency tracing (opt-in debug panel)
+        self.latency_panel = LatencyPanel(tracer, self)
+        self.latency_panel.hide()
+        self.verticalLayout.addWidget(self.latency_panel)
+
+        self.action_trace_latency = QAction(QIcon(QgsApplication.iconPath("mIndicatorBadLayer.svg")), "Trace latency", self)
+        self.action_trace_latency.setStatusTip("Record and show the latency of template operations")
+        self.action_trace_latency.setCheckable(True)
+        self.action_trace_latency.toggled.connect(self.set_latency_tracing)
+        self.toolbar.addSeparator()
+        self.toolbar.addAction(self.action_warm_up)
+        self.toolbar.addAction(self.action_trace_latency)
+
         # On project load/save
         QgsProject.instance().readProject.connect(self.project_load)
         QgsProject.instance().writeProject.connect(self.project_save)
@@ -71,71 +148,134 @@ class QuickFeaturesWidget(QWidget):
 
     def init_table(self):
 
-        # Set row height
+        # Set row height. Fixed heights let the view skip measuring rows
         self.table_view.verticalHeader().setDefaultSectionSize(30)
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
 
         # Set table's model
-        self.table_model = FeatureTemplateTableModel(parent=self)
-        self.table_model.rowsInserted.connect(self.table_rows_inserted)
+        self.table_model = FeatureTemplateTableModel(parent=self, shortcut_registry=self.shortcut_registry,
+                                                     save_dispatcher=self.save_dispatcher)
+
+        # Connect model to view, through the search filter
+        self.table_proxy_model = TemplateFilterProxyModel(self, self.table_model)
+        self.table_view.setModel(self.table_proxy_model)
 
-        # Connect model to view
-        self.table_view.setModel(self.table_model)
+        # Cells are painted by delegates. Editors are only created while a cell is being edited
+        self.table_view.clicked.connect(self.table_clicked)
 
         # Set delegate for map layer column
-        col_map_lyr = 3
         self.table_map_lyr_delegate = QgsMapLayerComboDelegate(self.table_view)
-        self.table_view.setItemDelegateForColumn(col_map_lyr, self.table_map_lyr_delegate)
+        self.table_view.setItemDelegateForColumn(TemplateColumn.LAYER, self.table_map_lyr_delegate)
 
         # Set delegate for default values column
-        col_default_value = 4
         table_icon = QIcon(os.path.join(self.icon_dir, 'mActionEditTable.svg'))
         self.default_value_delegate = DefaultValueDelegate(self.table_view, table_icon)
-        self.table_view.setItemDelegateForColumn(col_default_value, self.default_value_delegate)
+        self.table_view.setItemDelegateForColumn(TemplateColumn.VALUES, self.default_value_delegate)
 
         # Set delegate for remove template column
-        col_remove = 5
         delete_icon = QIcon(os.path.join(self.icon_dir, 'mActionDeleteSelected.svg'))
         self.remove_delegate = RemoveDelegate(self.table_view, delete_icon)
-        self.table_view.setItemDelegateForColumn(col_remove, self.remove_delegate)
+        self.table_view.setItemDelegateForColumn(TemplateColumn.REMOVE, self.remove_delegate)
 
-        # Set column sizes
+        # Set column sizes. Only a sample of rows is measured when resizing to contents
         header = self.table_view.horizontalHeader()
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.table_view.setColumnWidth(col_map_lyr, 150)
-        for col_num in [0, 2, col_default_value, col_remove]:
-            header.setSectionResizeMode(col_num, QHeaderView.ResizeMode.ResizeToContents)
+        header.setResizeContentsPrecision(100)
+        header.setSectionResizeMode(TemplateColumn.NAME, QHeaderView.ResizeMode.Stretch)
+        self.table_view.setColumnWidth(TemplateColumn.LAYER, 150)
+        for column in [TemplateColumn.ACTIVE, TemplateColumn.SHORTCUT, TemplateColumn.FEATURES, TemplateColumn.VALUES,
+                       TemplateColumn.REMOVE]:
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+
+    def set_latency_tracing(self, enabled: bool):
+
+        tracer.set_enabled(enabled, iface.mapCanvas())
+        self.latency_panel.setVisible(enabled)
+
+    def set_warm_up(self, enabled: bool):
+
+        # Also applies to the templates that are already loaded
+        QgsSettings().setValue(WARM_UP_SETTING, enabled)
+
+        if enabled:
+            self.table_model.start_warm_up()
+        else:
+            self.table_model.warm_up.cancel()
 
-    def table_rows_inserted(self, parent, first, last):
+    def activate_top_template(self):
 
-        for row in range(first, last + 1):
-            for col in [3, 4, 5]:  # These are the columns with persistent widgets
-                self.table_view.openPersistentEditor(self.table_model.index(row, col))
+        template = self.table_proxy_model.top_template()
+
+        if template is not None:
+            template.set_active(True)
+
+    def warm_up_progress(self, done: int, total: int):
+
+        self.warm_up_bar.setMaximum(total)
+        self.warm_up_bar.setValue(done)
+        self.warm_up_widget.setVisible(done < total)
+
+    def table_clicked(self, index):
+
+        # Open the layer selector with a single click
+        if index.column() == TemplateColumn.LAYER:
+            self.table_view.edit(index)
 
     def add_template_dialog(self):
 
-        template = FeatureTemplate(parent=self.table_model, widget=self, name=None, shortcut_str=None, map_lyr=None, default_values={})
+        self.table_model.add_templates([TemplateRecord(default_values={})])
+
+    def apply_template(self):
+
+        template = self.table_model.active_template
 
-        self.table_model.add_templates([template])
+        if template is None:
+            iface.messageBar().pushMessage("Apply template", "No template is active", level=Qgis.Info)
+            return
+
+        count = template.apply_to_selection()
+
+        iface.messageBar().pushMessage("Apply template",
+                                       f"Template '{template.get_name()}' was applied to {count} features",
+                                       level=Qgis.Info)
+
+    def auto_commit_dialog(self):
+
+        template = self.table_model.active_template
+
+        if template is None:
+            iface.messageBar().pushMessage("Auto-commit", "No template is active", level=Qgis.Info)
+            return
+
+        AutoCommitDialog(self.table_model.commit_scheduler, template.get_map_lyr(), self).open()
 
     def clean_up(self):
 
-        self.table_model.clear_templates()
+        tracer.set_enabled(False)
+        self.table_model.clean_up()
 
     def load_templates_dialog(self):
 
-        file_name = QFileDialog.getOpenFileName(self, 'Open file', 'c:\\', "JSON file (*.json)")[0]
+        file_name = QFileDialog.getOpenFileName(self, 'Open file', 'c:\\', FILE_FILTERS)[0]
 
         if file_name != '':
-            self.table_model.from_json(Path(file_name))
+            path = Path(file_name)
+            if is_library(path):
+                self.table_model.from_library(path)
+            else:
+                self.table_model.from_json(path)
 
-        self.table_view.resizeColumnToContents(1)
+        self.table_view.resizeColumnToContents(TemplateColumn.NAME)
 
     def save_templates_dialog(self):
 
-        file_name = QFileDialog.getSaveFileName(self, 'Save file', 'c:\\', "JSON file (*.json)")[0]
+        file_name, file_filter = QFileDialog.getSaveFileName(self, 'Save file', 'c:\\', FILE_FILTERS)
 
         if file_name != '':
-            self.table_model.to_json(Path(file_name))
+            path = Path(file_name)
+            if path.suffix == LIBRARY_SUFFIX or (path.suffix != '.json' and file_filter == LIBRARY_FILTER):
+                self.table_model.to_library(path)
+            else:
+                self.table_model.to_json(path)
 
     def project_load(self, doc: QDomDocument):
 
@@ -147,6 +287,11 @@ class QuickFeaturesWidget(QWidget):
             feature_templates_elem = plugin_elem.namedItem('feature_templates')
             self.table_model.from_xml(feature_templates_elem)
 
+            feature_counts_elem = plugin_elem.namedItem('feature_counts')
+            if not feature_counts_elem.isNull():
+                self.table_model.feature_counters.from_xml(feature_counts_elem, self.table_model.get_templates())
+
+    @traced('project_save')
     def project_save(self, doc: QDomDocument):
 
         templates = self.table_model.get_templates()
@@ -162,6 +307,7 @@ class QuickFeaturesWidget(QWidget):
                 templates_elem.appendChild(template_xml)
 
             plugin_elem.appendChild(templates_elem)
+            plugin_elem.appendChild(self.table_model.feature_counters.to_xml(doc, templates))
             root.appendChild(plugin_elem)
 
 
@@ -187,7 +333,7 @@ class QuickFeaturesWidget(QWidget):
     #
     #     test_data_path = QgsProject.instance().readPath("./") + '/template_group.json'
     #     self.table_model.from_json(Path(test_data_path))
-    #     self.table_view.resizeColumnToContents(1)
+    #     self.table_view.resizeColumnToContents(TemplateColumn.NAME)
     #
     # def debug(self):
     #     QgsMessageLog.logMessage(f"Debug message", tag=__title__, level=Qgis.Info)
@@ -0,0 +1,50 @@
+# Misc
+from typing import Dict
+
+# qgis
+from qgis.core import QgsProject, QgsMapLayer
+
+# PyQt
+from qgis.PyQt.QtCore import QObject
+from qgis.PyQt.QtXml import QDomDocument, QDomElement
+
+
+class LayerSaveDispatcher(QObject):
+
+    # Prevents the default values and form suppression set by active templates from being saved
+    # to the project file. A single connection to 'writeMapLayer' is shared by all templates, and
+    # only layers that currently have an active template are handed over to that template
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Layer ID: active template
+        self.active_templates: Dict[str, QObject] = {}
+
+        QgsProject.instance().writeMapLayer.connect(self.write_map_lyr)
+
+    def set_active_template(self, template) -> None:
+
+        self.active_templates[template.get_map_lyr().id()] = template
+
+    def remove_active_template(self, template) -> None:
+
+        map_lyr_id = template.get_map_lyr().id()
+
+        if self.active_templates.get(map_lyr_id) is template:
+            del self.active_templates[map_lyr_id]
+
+    def write_map_lyr(self, map_lyr: QgsMapLayer, elem: QDomElement, doc: QDomDocument) -> None:
+
+        if not self.active_templates:
+            return
+
+        template = self.active_templates.get(map_lyr.id())
+
+        if template is not None:
+            template.prevent_save(map_lyr, elem, doc)
+
+    def clean_up(self) -> None:
+
+        QgsProject.instance().writeMapLayer.disconnect(self.write_map_lyr)
+        self.active_templates.clear()
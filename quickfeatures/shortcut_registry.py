@@ -0,0 +1,142 @@
+# Project
+from quickfeatures.__about__ import __title__
+
+# Misc
+from typing import Dict, List, Optional
+
+# PyQt
+from qgis.PyQt.QtCore import QObject
+from qgis.PyQt.QtGui import QKeySequence
+from qgis.PyQt.QtWidgets import QShortcut, QApplication, QAction
+
+
+class ShortcutRegistry(QObject):
+
+    # Keeps track of which key sequences are taken, either by QGIS (and other plugins) or by
+    # this plugin's templates. The QGIS widget tree is only scanned once (or when 'refresh' is
+    # called), after which conflict checks are dictionary lookups.
+
+    QGIS_OWNER = 'QGIS'
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Key sequences used outside of this plugin. Built lazily on first use
+        self.external_keys = None
+
+        # Key sequences used by this plugin, mapped to the QShortcut that holds them
+        self.plugin_keys: Dict[str, QShortcut] = {}
+        self.plugin_shortcuts: Dict[QShortcut, str] = {}
+
+    def refresh(self) -> None:
+
+        # Rebuild the set of key sequences used outside of this plugin
+        external_keys = set()
+
+        for widget in QApplication.topLevelWidgets():
+            for shortcut in widget.findChildren(QShortcut):
+                if shortcut not in self.plugin_shortcuts:
+                    external_keys.add(normalize_key(shortcut.key()))
+            for action in widget.findChildren(QAction):
+                for key in action.shortcuts():
+                    external_keys.add(normalize_key(key))
+
+        external_keys.discard('')
+
+        self.external_keys = external_keys
+
+    def get_external_keys(self) -> set:
+
+        if self.external_keys is None:
+            self.refresh()
+
+        return self.external_keys
+
+    def get_owner(self, value, shortcut: Optional[QShortcut] = None) -> Optional[str]:
+
+        # Returns who is using a key sequence ('QGIS' or 'Quick Features'), or None if it is free.
+        # The 'shortcut' argument is the QShortcut being assigned, which never conflicts with itself
+
+        key = normalize_key(value)
+
+        if key == '':
+            return None
+
+        owner_shortcut = self.plugin_keys.get(key)
+        if owner_shortcut is not None and owner_shortcut is not shortcut:
+            return __title__
+
+        if key in self.get_external_keys():
+            return self.QGIS_OWNER
+
+        return None
+
+    def is_taken(self, value, shortcut: Optional[QShortcut] = None) -> bool:
+
+        return self.get_owner(value, shortcut) is not None
+
+    def bind(self, shortcut: QShortcut, value) -> bool:
+
+        # Assign a key sequence to one of the plugin's shortcuts
+
+        if self.is_taken(value, shortcut):
+            return False
+
+        self.release(shortcut)
+
+        key = normalize_key(value)
+        shortcut.setKey(QKeySequence(key))
+
+        if key != '':
+            self.plugin_keys[key] = shortcut
+            self.plugin_shortcuts[shortcut] = key
+
+        return True
+
+    def release(self, shortcut: QShortcut) -> None:
+
+        key = self.plugin_shortcuts.pop(shortcut, None)
+
+        if key is not None and self.plugin_keys.get(key) is shortcut:
+            del self.plugin_keys[key]
+
+    def find_conflicts(self, values: List) -> Dict[int, str]:
+
+        # Batch validation for bulk loads. Checks a list of key sequences against QGIS, against
+        # the plugin's existing shortcuts and against each other. Returns a dictionary of
+        # {position in list: owner of the conflicting key sequence}. Within the list, the
+        # first occurrence of a key sequence is kept and later ones are flagged
+
+        conflicts = {}
+        seen = {}
+
+        for i, value in enumerate(values):
+
+            key = normalize_key(value)
+
+            if key == '':
+                continue
+
+            owner = self.get_owner(key)
+
+            if owner is None and key in seen:
+                owner = seen[key]
+
+            if owner is None:
+                seen[key] = __title__
+            else:
+                conflicts[i] = owner
+
+        return conflicts
+
+
+def normalize_key(value) -> str:
+
+    if value is None:
+        return ''
+
+    if not isinstance(value, QKeySequence):
+        value = QKeySequence(value)
+
+    return value.toString(QKeySequence.PortableText)
+
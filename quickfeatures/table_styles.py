@@ -0,0 +1,7 @@
+# PyQt
+from qgis.PyQt.QtGui import QBrush, QColor
+
+# Text of invalid templates and fields, and of templates without shortcut keys. The tables' models
+# share these rather than making new ones on every paint
+DISABLED_COLOR = QColor(180, 180, 180)
+DISABLED_BRUSH = QBrush(DISABLED_COLOR)
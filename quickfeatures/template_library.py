@@ -0,0 +1,118 @@
+# Project
+from quickfeatures.template_record import TemplateRecord, to_map_lyr_ref
+
+# Misc
+from typing import Dict, List
+from pathlib import Path
+import json
+
+LIBRARY_FORMAT = 'quickfeatures-template-library'
+LIBRARY_VERSION = 1
+
+# Keys of a template record that are copied into the library's index
+INDEX_KEYS = ['name', 'map_lyr_name', 'map_lyr_id', 'map_lyr_source', 'shortcut_str', 'uid']
+
+
+class TemplateLibrary:
+
+    # A template library is a file made of a one-line JSON header followed by one JSON record per
+    # template. The header holds the library's index: the name, layer and shortcut of every
+    # template, and the position of its record in the file. Opening a library only reads the
+    # header. Records (i.e., the templates' default values) are read when they are needed
+
+    def __init__(self, path: Path, header: Dict, records_start: int):
+
+        self.path = Path(path)
+
+        # Byte position of the first record. Record offsets are relative to this position
+        self.records_start = records_start
+
+        self.entries = [LibraryEntry(self, item) for item in header['index']]
+
+    @classmethod
+    def open(cls, path: Path) -> 'TemplateLibrary':
+
+        with open(path, 'rb') as f:
+            header_line = f.readline()
+
+        header = json.loads(header_line)
+
+        if header.get('format') != LIBRARY_FORMAT:
+            raise ValueError(f"'{path}' is not a template library")
+
+        if header.get('version', 0) > LIBRARY_VERSION:
+            raise ValueError(f"'{path}' was written by a newer version of this plugin")
+
+        return cls(path, header, len(header_line))
+
+    def get_entries(self) -> List['LibraryEntry']:
+
+        return self.entries
+
+    def read_record(self, entry: 'LibraryEntry') -> Dict:
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.records_start + entry.offset)
+            record = json.loads(f.read(entry.length))
+
+        return record
+
+
+class LibraryEntry(TemplateRecord):
+
+    # A template record whose default values are read from the library the first time they are
+    # needed. Until then, it only holds what the library's index provides
+
+    __slots__ = ('library', 'offset', 'length')
+
+    def __init__(self, library: TemplateLibrary, item: Dict):
+
+        super().__init__(item.get('name'), to_map_lyr_ref(item), item.get('shortcut_str'), uid=item.get('uid'))
+
+        self.library = library
+        self.offset = item['offset']
+        self.length = item['length']
+
+    def load_default_values(self) -> Dict[str, str]:
+
+        return self.library.read_record(self).get('default_values', {})
+
+
+def write_library(path: Path, records: List[TemplateRecord]) -> None:
+
+    record_lines = []
+    index = []
+    offset = 0
+
+    for record in records:
+
+        record = record.to_dict()
+
+        line = json.dumps(record).encode('utf-8') + b'\n'
+
+        item = {key: record.get(key) for key in INDEX_KEYS}
+        item['offset'] = offset
+        item['length'] = len(line)
+
+        record_lines.append(line)
+        index.append(item)
+        offset += len(line)
+
+    header = {
+        'format': LIBRARY_FORMAT,
+        'version': LIBRARY_VERSION,
+        'index': index,
+    }
+
+    with open(path, 'wb') as f:
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        f.writelines(record_lines)
+
+
+def is_library(path: Path) -> bool:
+
+    # Template libraries start with their header, whereas plain JSON template files are lists
+    with open(path, 'rb') as f:
+        start = f.read(64).lstrip()
+
+    return start.startswith(b'{')
@@ -0,0 +1,118 @@
+# Misc
+from typing import Dict, Optional
+from uuid import uuid4
+
+# PyQt
+from qgis.PyQt.QtXml import QDomDocument, QDomElement
+
+
+class TemplateRecord:
+
+    # Everything that defines a template: its name, a reference to its layer, its shortcut keys and
+    # its default value expressions. This is what the template table lists and what gets saved.
+    # Qt resources (signals, the QShortcut, layer connections and QgsDefaultValue objects) belong
+    # to the template's binding (see 'FeatureTemplate'), which only exists while it is needed
+
+    __slots__ = ('name', 'map_lyr_ref', 'shortcut_str', 'default_values', 'uid')
+
+    def __init__(self, name: Optional[str] = None, map_lyr_ref: Optional[Dict[str, str]] = None,
+                 shortcut_str: Optional[str] = None, default_values: Optional[Dict[str, str]] = None,
+                 uid: Optional[str] = None):
+
+        self.name = name
+
+        # Identifies the template in saved data (e.g., its feature count), whatever its row or name.
+        # Templates saved by older versions get a new one when they are loaded
+        self.uid = uid or uuid4().hex
+
+        # ID, data source and name of the template's layer
+        self.map_lyr_ref = dict(map_lyr_ref or {})
+
+        # Older template files save templates without shortcut keys as 'None'
+        self.shortcut_str = shortcut_str if shortcut_str not in ('', 'None') else None
+
+        # Field name: expression. None if they haven't been read yet (see 'LibraryEntry')
+        self.default_values = default_values
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'TemplateRecord':
+
+        return cls(d.get('name'), to_map_lyr_ref(d), d.get('shortcut_str'), dict(d.get('default_values') or {}),
+                   d.get('uid'))
+
+    def get_name(self) -> str:
+
+        return self.name
+
+    def get_uid(self) -> str:
+
+        return self.uid
+
+    def get_shortcut_str(self) -> str:
+
+        return self.shortcut_str or 'None'
+
+    def get_map_lyr_ref(self) -> Dict[str, str]:
+
+        return self.map_lyr_ref
+
+    def get_default_values(self) -> Dict[str, str]:
+
+        if self.default_values is None:
+            self.default_values = self.load_default_values()
+
+        return self.default_values
+
+    def load_default_values(self) -> Dict[str, str]:
+
+        return {}
+
+    def to_dict(self) -> Dict:
+
+        return {
+            'name': self.name,
+            'map_lyr_name': self.map_lyr_ref.get('name'),
+            'map_lyr_id': self.map_lyr_ref.get('id'),
+            'map_lyr_source': self.map_lyr_ref.get('source'),
+            'default_values': self.get_default_values(),
+            'shortcut_str': self.get_shortcut_str(),
+            'uid': self.uid
+        }
+
+    def to_xml(self, doc: QDomDocument) -> QDomElement:
+
+        template_elem = doc.createElement('template')
+
+        template_elem.setAttribute('name', self.name)
+        template_elem.setAttribute('map_lyr', self.map_lyr_ref.get('name', 'None'))
+        template_elem.setAttribute('map_lyr_id', self.map_lyr_ref.get('id', ''))
+        template_elem.setAttribute('map_lyr_source', self.map_lyr_ref.get('source', ''))
+        template_elem.setAttribute('shortcut', self.get_shortcut_str())
+        template_elem.setAttribute('uid', self.uid)
+
+        default_values_elem = doc.createElement('default_values')
+
+        for key, value in self.get_default_values().items():
+
+            default_value = doc.createElement('default_value')
+
+            default_value.setAttribute('field', key)
+            default_value.setAttribute('value', str(value))
+
+            default_values_elem.appendChild(default_value)
+
+        template_elem.appendChild(default_values_elem)
+
+        return template_elem
+
+
+def to_map_lyr_ref(d: Dict) -> Dict[str, str]:
+
+    # Older template files only have the layer's name
+    map_lyr_ref = {
+        'id': d.get('map_lyr_id'),
+        'source': d.get('map_lyr_source'),
+        'name': d.get('map_lyr_name'),
+    }
+
+    return {key: value for key, value in map_lyr_ref.items() if value}
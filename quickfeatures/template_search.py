@@ -0,0 +1,261 @@
+# Project
+from quickfeatures.feature_template_table_model import FeatureTemplateTableModel, TemplateColumn
+from quickfeatures.template_record import TemplateRecord
+from quickfeatures.tracing import traced
+
+# Misc
+from typing import Dict, List, Optional, Set
+import re
+
+# PyQt
+from qgis.PyQt.QtCore import Qt, QModelIndex, QSortFilterProxyModel
+
+WORD_PATTERN = re.compile(r'\w+')
+
+SEARCHED_COLUMNS = [TemplateColumn.NAME, TemplateColumn.LAYER, TemplateColumn.VALUES]
+
+# Roles whose changes can change a template's text
+SEARCHED_ROLES = {Qt.DisplayRole, Qt.EditRole}
+
+
+class TemplateSearchIndex:
+
+    # Incremental search index over the templates' names, layer names and default values.
+    # Search terms of three characters or more are looked up by trigram, and then checked against
+    # the template's text. Shorter terms are matched against the start of words
+
+    def __init__(self):
+
+        # Template: lower case text that is searched
+        self.texts: Dict[object, str] = {}
+
+        # Trigram or word prefix: templates that contain it
+        self.trigrams: Dict[str, Set[object]] = {}
+        self.prefixes: Dict[str, Set[object]] = {}
+
+    def add(self, template, text: str) -> None:
+
+        text = text.lower()
+        self.texts[template] = text
+
+        for trigram in get_trigrams(text):
+            self.trigrams.setdefault(trigram, set()).add(template)
+
+        for prefix in get_prefixes(text):
+            self.prefixes.setdefault(prefix, set()).add(template)
+
+    def remove(self, template) -> None:
+
+        text = self.texts.pop(template, None)
+
+        if text is None:
+            return
+
+        for trigram in get_trigrams(text):
+            discard_from(self.trigrams, trigram, template)
+
+        for prefix in get_prefixes(text):
+            discard_from(self.prefixes, prefix, template)
+
+    def update(self, template, text: str) -> None:
+
+        if self.texts.get(template) != text.lower():
+            self.remove(template)
+            self.add(template, text)
+
+    def clear(self) -> None:
+
+        self.texts.clear()
+        self.trigrams.clear()
+        self.prefixes.clear()
+
+    def search(self, terms: List[str]) -> Set[object]:
+
+        # Templates that match all of the search terms
+        matches = None
+
+        for term in sorted(terms, key=len, reverse=True):
+
+            term_matches = self.search_term(term)
+
+            matches = term_matches if matches is None else matches & term_matches
+
+            if not matches:
+                break
+
+        return matches if matches is not None else set(self.texts)
+
+    def search_term(self, term: str) -> Set[object]:
+
+        if len(term) < 3:
+            return set(self.prefixes.get(term, ()))
+
+        # Start from the rarest trigram
+        candidates = sorted((self.trigrams.get(trigram, set()) for trigram in get_trigrams(term)), key=len)
+        matches = candidates[0].intersection(*candidates[1:])
+
+        return {template for template in matches if term in self.texts[template]}
+
+    def matches(self, template, terms: List[str]) -> bool:
+
+        text = self.texts.get(template, '')
+        words = get_words(text)
+
+        for term in terms:
+            if len(term) < 3:
+                if not any(word.startswith(term) for word in words):
+                    return False
+            elif term not in text:
+                return False
+
+        return True
+
+
+class TemplateFilterProxyModel(QSortFilterProxyModel):
+
+    # Filters the template table with a search index, instead of comparing every row's data with
+    # the search text on each keystroke. The index is kept up to date as templates are added,
+    # removed or changed in the source model
+
+    def __init__(self, parent, source_model: FeatureTemplateTableModel):
+        super().__init__(parent)
+
+        self.search_index = TemplateSearchIndex()
+
+        # Template records of the source model, in the order of its rows
+        self.row_items: List[TemplateRecord] = []
+
+        self.terms = []
+        self.search_matches: Optional[Set[object]] = None
+
+        # The index has to be updated before the proxy filters new or changed rows,
+        # so these are connected before the source model is set
+        source_model.rowsInserted.connect(self.index_rows)
+        source_model.rowsAboutToBeRemoved.connect(self.unindex_rows)
+        source_model.dataChanged.connect(self.reindex_rows)
+
+        self.setSourceModel(source_model)
+        self.index_rows(QModelIndex(), 0, source_model.rowCount() - 1)
+
+    def index_rows(self, parent: QModelIndex, first: int, last: int) -> None:
+
+        templates = self.sourceModel().get_templates()[first:last + 1]
+        self.row_items[first:first] = templates
+
+        for template in templates:
+            self.index_template(template)
+
+    def unindex_rows(self, parent: QModelIndex, first: int, last: int) -> None:
+
+        if first == 0 and last == len(self.row_items) - 1:
+            self.search_index.clear()
+            if self.search_matches is not None:
+                self.search_matches.clear()
+        else:
+            for template in self.row_items[first:last + 1]:
+                self.unindex_template(template)
+
+        del self.row_items[first:last + 1]
+
+    def reindex_rows(self, top_left: QModelIndex, bottom_right: QModelIndex, roles: List[int] = ()) -> None:
+
+        # Only the name, layer and values are searched. Changes of other roles (e.g., colors) are skipped
+        if roles and not SEARCHED_ROLES.intersection(roles):
+            return
+
+        if not any(top_left.column() <= column <= bottom_right.column() for column in SEARCHED_COLUMNS):
+            return
+
+        for template in self.row_items[top_left.row():bottom_right.row() + 1]:
+            self.index_template(template)
+
+    def index_template(self, template: TemplateRecord) -> None:
+
+        self.search_index.update(template, template_text(self.sourceModel(), template))
+
+        if self.search_matches is not None:
+            if self.search_index.matches(template, self.terms):
+                self.search_matches.add(template)
+            else:
+                self.search_matches.discard(template)
+
+    def unindex_template(self, template: TemplateRecord) -> None:
+
+        self.search_index.remove(template)
+
+        if self.search_matches is not None:
+            self.search_matches.discard(template)
+
+    @traced('search')
+    def set_search_text(self, text: str) -> None:
+
+        self.terms = WORD_PATTERN.findall(text.lower())
+
+        if self.terms:
+            self.search_matches = self.search_index.search(self.terms)
+        else:
+            self.search_matches = None
+
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+
+        if self.search_matches is None:
+            return True
+
+        return self.row_items[source_row] in self.search_matches
+
+    def top_template(self):
+
+        # First template that is shown, built if needed
+        if self.rowCount() == 0:
+            return None
+
+        source_row = self.mapToSource(self.index(0, 0)).row()
+
+        return self.sourceModel().get_template(source_row)
+
+
+def template_text(model: FeatureTemplateTableModel, record: TemplateRecord) -> str:
+
+    # Library entries whose values haven't been read are searched by name and layer name only
+    parts = [record.get_name() or '', model.map_lyr_name(record)]
+
+    if record.default_values is not None:
+        parts.extend(record.default_values.values())
+
+    return '\n'.join(parts)
+
+
+def get_words(text: str) -> List[str]:
+
+    return WORD_PATTERN.findall(text)
+
+
+def get_trigrams(text: str) -> Set[str]:
+
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def get_prefixes(text: str) -> Set[str]:
+
+    prefixes = set()
+
+    for word in get_words(text):
+        prefixes.add(word[:1])
+        prefixes.add(word[:2])
+
+    return prefixes
+
+
+def discard_from(templates_by_key: Dict[str, Set[object]], key: str, template) -> None:
+
+    templates = templates_by_key.get(key)
+
+    if templates is None:
+        return
+
+    templates.discard(template)
+
+    if not templates:
+        del templates_by_key[key]
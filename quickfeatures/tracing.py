@@ -0,0 +1,182 @@
+# Misc
+from functools import wraps
+from math import floor, log10
+from time import perf_counter
+from typing import Dict, Optional
+import json
+
+# qgis
+from qgis.core import QgsVectorLayer
+
+# PyQt
+from qgis.PyQt.QtCore import QObject, QEvent
+
+
+class LatencyHistogram:
+
+    # Log-scale histogram of durations, from 1 microsecond to 100 seconds with 20 buckets per
+    # decade (about 12% resolution). Memory use doesn't grow with the number of samples
+
+    MIN_SECONDS = 1e-6
+    BUCKETS_PER_DECADE = 20
+    N_BUCKETS = 8 * BUCKETS_PER_DECADE + 1
+
+    def __init__(self):
+        self.buckets = [0] * self.N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds: float) -> None:
+
+        if seconds <= self.MIN_SECONDS:
+            bucket = 0
+        else:
+            bucket = min(int(floor(log10(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_DECADE)), self.N_BUCKETS - 1)
+
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+
+        if self.count == 0:
+            return None
+
+        rank = percent / 100 * self.count
+        cumulative = 0
+
+        for bucket, bucket_count in enumerate(self.buckets):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count > 0:
+                # Upper bound of the bucket, capped by the largest sample
+                upper = self.MIN_SECONDS * 10 ** ((bucket + 1) / self.BUCKETS_PER_DECADE)
+                return min(upper, self.max)
+
+        return self.max
+
+    def summary(self) -> Dict:
+
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class LatencyTracer(QObject):
+
+    # Opt-in timing of the plugin's operations. While disabled, instrumented functions only pay
+    # for a check of 'enabled'.
+    # Feature creation latency is measured from the last mouse release on the map canvas to the
+    # layer's 'featureAdded' signal
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.enabled = False
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+        self.canvas = None
+        self.last_click_time = None
+        self.watched_lyrs = set()
+
+    def set_enabled(self, enabled: bool, canvas=None) -> None:
+
+        self.enabled = enabled
+
+        if enabled and canvas is not None and self.canvas is None:
+            self.canvas = canvas
+            self.canvas.viewport().installEventFilter(self)
+
+        if not enabled and self.canvas is not None:
+            self.canvas.viewport().removeEventFilter(self)
+            self.canvas = None
+            self.last_click_time = None
+
+    def record(self, name: str, seconds: float) -> None:
+
+        histogram = self.histograms.get(name)
+
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+
+        histogram.add(seconds)
+
+    def reset(self) -> None:
+
+        self.histograms.clear()
+
+    def summary(self) -> Dict[str, Dict]:
+
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def to_json(self, path) -> None:
+
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=4)
+
+    def watch_lyr(self, map_lyr: QgsVectorLayer) -> None:
+
+        # Measure feature creation latency on this layer (connected once per layer)
+
+        if map_lyr.id() in self.watched_lyrs:
+            return
+
+        self.watched_lyrs.add(map_lyr.id())
+        map_lyr.featureAdded.connect(self.feature_added)
+        map_lyr.willBeDeleted.connect(self.unwatch_lyr)
+
+    def unwatch_lyr(self) -> None:
+
+        map_lyr = self.sender()
+        self.watched_lyrs.discard(map_lyr.id())
+        map_lyr.featureAdded.disconnect(self.feature_added)
+        map_lyr.willBeDeleted.disconnect(self.unwatch_lyr)
+
+    def feature_added(self, fid) -> None:
+
+        if self.enabled and self.last_click_time is not None:
+            self.record('feature_added', perf_counter() - self.last_click_time)
+            self.last_click_time = None
+
+    def eventFilter(self, obj, event) -> bool:
+
+        if event.type() == QEvent.MouseButtonRelease:
+            self.last_click_time = perf_counter()
+
+        return False
+
+
+# Shared by the whole plugin
+tracer = LatencyTracer()
+
+
+def traced(name: str):
+
+    # Decorator recording the duration of each call to the decorated function under 'name'
+
+    def decorator(func):
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+
+            start_time = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(name, perf_counter() - start_time)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,81 @@
+# Project
+from quickfeatures.tracing import tracer
+
+# Misc
+from typing import Callable, List
+from collections import deque
+from time import perf_counter
+
+# PyQt
+from qgis.PyQt.QtCore import QObject, QTimer, pyqtSignal
+
+
+class LayerWarmUp(QObject):
+
+    # Runs 'warm_up_lyr' for a list of layers in idle time, one layer per turn of the event loop, so
+    # that the work that would otherwise happen on a template's first activation (opening the
+    # provider, reading the form configuration, preparing expressions) doesn't block the interface
+
+    progressChanged = pyqtSignal(int, int)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, parent, warm_up_lyr: Callable[[str], None]):
+        super().__init__(parent)
+
+        self.warm_up_lyr = warm_up_lyr
+
+        # IDs of the layers that haven't been warmed up yet
+        self.queue = deque()
+        self.done = 0
+        self.total = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.step)
+
+    def start(self, lyr_ids: List[str]) -> None:
+
+        self.cancel()
+
+        if not lyr_ids:
+            return
+
+        self.queue = deque(lyr_ids)
+        self.done = 0
+        self.total = len(lyr_ids)
+
+        self.progressChanged.emit(self.done, self.total)
+        self.timer.start()
+
+    def step(self) -> None:
+
+        if not self.queue:
+            return
+
+        lyr_id = self.queue.popleft()
+
+        start_time = perf_counter()
+        self.warm_up_lyr(lyr_id)
+
+        if tracer.enabled:
+            tracer.record('warm_up_lyr', perf_counter() - start_time)
+
+        self.done += 1
+        self.progressChanged.emit(self.done, self.total)
+
+        if self.queue:
+            self.timer.start()
+        else:
+            self.finished.emit(True)
+
+    def cancel(self) -> None:
+
+        if self.is_running():
+            self.timer.stop()
+            self.queue.clear()
+            self.finished.emit(False)
+
+    def is_running(self) -> bool:
+
+        return len(self.queue) > 0
@@ -0,0 +1,37 @@
+# Compiles the plugin's Qt Designer forms (quickfeatures/gui/*.ui) to Python modules
+# (quickfeatures/gui/ui_*.py), so that they don't need to be parsed every time QGIS starts.
+# Run this before packaging the plugin, and whenever a .ui file is edited:
+#
+#   python scripts/compile_ui.py
+
+# Standard
+from io import StringIO
+from pathlib import Path
+import os
+
+# PyQt
+from PyQt5 import uic
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+GUI_DIR = Path("quickfeatures") / "gui"
+
+
+def compile_ui(ui_path: Path) -> Path:
+
+    py_path = ui_path.with_name(f"ui_{ui_path.stem}.py")
+
+    code = StringIO()
+    uic.compileUi(ui_path.as_posix(), code)
+
+    # Import Qt through QGIS, as the rest of the plugin does
+    code = code.getvalue().replace("from PyQt5 import", "from qgis.PyQt import")
+
+    py_path.write_text(code, encoding="utf-8")
+
+    return py_path
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT_DIR)
+    for ui_path in sorted(GUI_DIR.glob("*.ui")):
+        print(f"Compiled '{ui_path.name}' to '{compile_ui(ui_path).name}'")
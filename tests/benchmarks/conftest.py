@@ -0,0 +1,145 @@
+# Timing harness for the benchmark suite.
+#
+# Each benchmark times a callable over several rounds and records its statistics. At the end of
+# the session, all results are written to a JSON file ('bench_output.json', or the path in the
+# QF_BENCH_OUTPUT environment variable). If a benchmark has a stored baseline in 'baselines.json',
+# its median time is compared against it, and the benchmark fails if it is slower than the
+# baseline by more than the regression threshold.
+#
+# To record new baselines from the current results, run the suite with QF_BENCH_UPDATE_BASELINES=1.
+# Benchmarks without a baseline aren't compared against anything: they raise a warning and are listed
+# at the end of the session. They fail instead if QF_BENCH_REQUIRE_BASELINES=1, which is the default on CI
+# (i.e., when the CI environment variable is set)
+
+# Standard
+from pathlib import Path
+from statistics import mean, median
+from time import perf_counter
+import json
+import os
+import platform
+import warnings
+
+# Misc
+import pytest
+
+# qgis
+from qgis.core import Qgis
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+OUTPUT_PATH = Path(os.environ.get("QF_BENCH_OUTPUT", "bench_output.json"))
+UPDATE_BASELINES = os.environ.get("QF_BENCH_UPDATE_BASELINES") == "1"
+REQUIRE_BASELINES = os.environ.get("QF_BENCH_REQUIRE_BASELINES", "1" if os.environ.get("CI") else "0") == "1"
+
+RESULTS = {}
+
+# Benchmarks that ran without a baseline to compare against
+MISSING_BASELINES = []
+
+
+class MissingBaselineWarning(UserWarning):
+    pass
+
+
+def load_baselines() -> dict:
+
+    if BASELINES_PATH.is_file():
+        with open(BASELINES_PATH) as f:
+            return json.load(f)
+
+    return {"thresholds": {"default": 0.25}, "benchmarks": {}}
+
+
+BASELINES = load_baselines()
+
+
+def regression_threshold(name: str) -> float:
+
+    thresholds = BASELINES.get("thresholds", {})
+
+    return float(os.environ.get("QF_BENCH_THRESHOLD", thresholds.get(name, thresholds.get("default", 0.25))))
+
+
+@pytest.fixture
+def benchmark(request):
+
+    def _benchmark(func, setup=None, rounds: int = 20, extra: dict = None) -> dict:
+
+        # 'setup' is called before each round and isn't timed. Its return value (if any) is
+        # passed on to 'func'
+
+        times = []
+
+        for _ in range(rounds):
+            args = setup() if setup is not None else None
+
+            start_time = perf_counter()
+            func() if args is None else func(args)
+            times.append(perf_counter() - start_time)
+
+        result = {
+            "rounds": rounds,
+            "min": min(times),
+            "max": max(times),
+            "mean": mean(times),
+            "median": median(times),
+        }
+
+        if extra:
+            result["extra"] = extra
+
+        name = request.node.nodeid.split("::", 1)[-1]
+        RESULTS[name] = result
+
+        baseline = BASELINES.get("benchmarks", {}).get(name)
+
+        if baseline is None and not UPDATE_BASELINES:
+            MISSING_BASELINES.append(name)
+            message = f"Benchmark '{name}' has no baseline, so it wasn't checked for regressions"
+            if REQUIRE_BASELINES:
+                pytest.fail(message)
+            warnings.warn(MissingBaselineWarning(message))
+
+        if baseline is not None and not UPDATE_BASELINES:
+            threshold = regression_threshold(name)
+            limit = baseline["median"] * (1 + threshold)
+            if result["median"] > limit:
+                pytest.fail(f"Benchmark '{name}' regressed: median {result['median'] * 1000:.3f} ms, "
+                            f"baseline {baseline['median'] * 1000:.3f} ms (threshold {threshold:.0%})")
+
+        return result
+
+    return _benchmark
+
+
+def pytest_sessionfinish(session, exitstatus):
+
+    if not RESULTS:
+        return
+
+    output = {
+        "qgis_version": Qgis.version(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "results": RESULTS,
+    }
+
+    with open(OUTPUT_PATH, "w") as f:
+        json.dump(output, f, indent=4)
+
+    if UPDATE_BASELINES:
+        baselines = load_baselines()
+        for name, result in RESULTS.items():
+            baselines.setdefault("benchmarks", {})[name] = {"median": result["median"]}
+
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(baselines, f, indent=4)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+
+    if MISSING_BASELINES:
+        terminalreporter.section("benchmarks without a baseline")
+        for name in MISSING_BASELINES:
+            terminalreporter.write_line(name)
+        terminalreporter.write_line("Record baselines with QF_BENCH_UPDATE_BASELINES=1 on a QGIS runner")
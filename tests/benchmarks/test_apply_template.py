@@ -0,0 +1,37 @@
+# Misc
+import pytest
+
+# Project
+from tests.conftest import add_features, make_memory_lyr
+
+SIZES = [1000, 10000, 100000]
+
+
+@pytest.mark.parametrize("default_values", [
+    {"field_1": "'constant'", "field_2": "42"},
+    {"field_1": "\"field_0\" || '_labelled'", "field_2": "$x"},
+], ids=["literals", "expressions"])
+@pytest.mark.parametrize("n_features", SIZES)
+def test_apply_to_selection(benchmark, template_model, qgs_project, n_features, default_values):
+
+    map_lyr = make_memory_lyr("layer", 5)
+    add_features(map_lyr, n_features)
+    qgs_project.addMapLayer(map_lyr)
+    map_lyr.selectAll()
+
+    template = template_model.create_template(name="template", shortcut_str=None, map_lyr=map_lyr,
+                                              default_values=default_values)
+    template_model.add_templates([template])
+
+    def setup():
+        map_lyr.rollBack()
+        map_lyr.startEditing()
+
+    result = benchmark(template.apply_to_selection, setup=setup, rounds=3)
+    result["extra"] = {"features_per_second": n_features / result["median"]}
+
+    # One undo entry for the whole selection
+    assert map_lyr.undoStack().count() == 1
+    assert len(map_lyr.editBuffer().changedAttributeValues()) == n_features
+
+    map_lyr.rollBack()
@@ -0,0 +1,30 @@
+# Misc
+import pytest
+
+# Project
+from tests.conftest import add_features
+
+
+@pytest.mark.parametrize("n_features", [10, 100, 1000])
+def test_auto_commit(benchmark, template_model, add_memory_lyr, n_features):
+
+    # Duration of one scheduled commit, for different edit buffer sizes
+
+    map_lyr = add_memory_lyr("layer", 10)
+    scheduler = template_model.commit_scheduler
+    scheduler.set_policy(map_lyr, n_features, 0)
+
+    map_lyr.startEditing()
+
+    def setup():
+        add_features(map_lyr, n_features, buffered=True)
+
+    benchmark(lambda: scheduler.commit(map_lyr), setup=setup, rounds=10)
+
+    # The layer stays in editing mode, and all features were committed
+    assert map_lyr.isEditable()
+    assert map_lyr.dataProvider().featureCount() == 10 * n_features
+    assert scheduler.get_metrics(map_lyr)["commits"] == 10
+    assert scheduler.get_metrics(map_lyr)["buffered_features"] == 0
+
+    map_lyr.rollBack()
@@ -0,0 +1,36 @@
+# Misc
+import pytest
+
+# Project
+from tests.conftest import make_default_values
+
+
+@pytest.mark.parametrize("n_templates", [10, 1000])
+def test_switch_templates_notifications(benchmark, template_model, add_memory_lyr, data_changed, n_templates):
+
+    # One switch deactivates the previous template and activates the next one. The view is notified once the
+    # event loop regains control
+
+    map_lyrs = [add_memory_lyr(f"layer_{i}", 20) for i in range(10)]
+
+    templates = [template_model.create_template(name=f"template_{i}", shortcut_str=None,
+                                                map_lyr=map_lyrs[i % len(map_lyrs)],
+                                                default_values=make_default_values(str(i)))
+                 for i in range(n_templates)]
+    template_model.add_templates(templates)
+
+    state = {"i": 0}
+
+    def switch():
+        state["i"] = (state["i"] + 1) % n_templates
+        templates[state["i"]].set_active(True)
+        template_model.changes.flush()
+
+    data_changed.clear()
+    rounds = 100
+    result = benchmark(switch, rounds=rounds)
+
+    result["extra"] = {"data_changed_per_switch": len(data_changed) / rounds}
+
+    # The two rows are notified together when they are next to each other, i.e., unless the switch wraps around
+    assert len(data_changed) == rounds + rounds // n_templates
@@ -0,0 +1,62 @@
+# Misc
+import pytest
+
+# Project
+from quickfeatures.default_value_editor import DefaultValueEditor
+from quickfeatures.default_value_option_table_model import DefaultValueOptionTableModel
+
+from tests.conftest import make_memory_lyr
+
+
+@pytest.mark.parametrize("n_fields", [100, 1000, 5000])
+def test_set_default_values(benchmark, n_fields):
+
+    map_lyr = make_memory_lyr("layer", n_fields)
+    default_values = {f"field_{i}": "'value'" for i in range(0, n_fields, 10)}
+
+    model = DefaultValueOptionTableModel(None)
+
+    benchmark(lambda: model.set_default_values(map_lyr, default_values), rounds=10)
+
+    assert model.rowCount() == n_fields
+    assert model.get_selected_default_values() == default_values
+
+
+@pytest.mark.parametrize("n_fields", [800, 5000])
+def test_open_default_value_editor(benchmark, n_fields):
+
+    # Populating the editor's table, as when the dialog is opened on a wide layer
+
+    map_lyr = make_memory_lyr("layer", n_fields)
+    default_values = {f"field_{i}": "'value'" for i in range(0, n_fields, 10)}
+
+    editor = DefaultValueEditor()
+
+    benchmark(lambda: editor.populate_table(map_lyr, default_values), rounds=10)
+
+    # Selected fields are listed first
+    assert editor.table_proxy_model.index(0, 1).data() == "field_0"
+    assert editor.table_proxy_model.index(len(default_values), 1).data() == "field_1"
+
+    editor.deleteLater()
+
+
+def test_filter_fields(benchmark):
+
+    map_lyr = make_memory_lyr("layer", 5000)
+
+    editor = DefaultValueEditor()
+    editor.populate_table(map_lyr, {})
+
+    # One keystroke at a time, as in the filter box
+    text = "field_1234"
+
+    def type_text():
+        for i in range(1, len(text) + 1):
+            editor.filter_box.setText(text[:i])
+
+    benchmark(type_text, setup=editor.filter_box.clear, rounds=5)
+
+    assert editor.table_proxy_model.rowCount() == 1
+
+    editor.deleteLater()
@@ -0,0 +1,109 @@
+# Misc
+import pytest
+
+# Project
+from quickfeatures.default_value_option_table_model import ValueCompleter
+from quickfeatures.distinct_values import DistinctValuesTask
+
+# qgis
+from qgis.core import QgsFeature
+from qgis.PyQt.QtCore import QEventLoop, QTimer
+from qgis.PyQt.QtWidgets import QLineEdit
+
+N_FEATURES = 100000
+N_VALUES = 500
+
+
+@pytest.fixture
+def map_lyr(add_memory_lyr):
+
+    map_lyr = add_memory_lyr("layer", 2)
+
+    features = []
+    for i in range(N_FEATURES):
+        feature = QgsFeature(map_lyr.fields())
+        feature.setAttributes([f"value_{i % N_VALUES}", None])
+        features.append(feature)
+
+    map_lyr.dataProvider().addFeatures(features)
+
+    return map_lyr
+
+
+def wait_for_values(cache, map_lyr, field_name: str):
+
+    # Values are read by the task manager, which reports back through the event loop
+    values = cache.get_values(map_lyr, field_name)
+
+    if values is None:
+        loop = QEventLoop()
+        cache.valuesReady.connect(loop.quit)
+        QTimer.singleShot(10000, loop.quit)
+        loop.exec_()
+        cache.valuesReady.disconnect(loop.quit)
+        values = cache.get_values(map_lyr, field_name)
+
+    return values
+
+
+def test_read_distinct_values(benchmark, map_lyr):
+
+    def read():
+        task = DistinctValuesTask(map_lyr, "field_0", 1000)
+        task.run()
+        return task
+
+    benchmark(read, rounds=5)
+
+    values = read().values
+    assert len(values) == N_VALUES
+    assert "'value_0'" in values
+
+
+def test_complete_value(benchmark, template_model, map_lyr):
+
+    cache = template_model.distinct_values
+    assert len(wait_for_values(cache, map_lyr, "field_0")) == N_VALUES
+
+    editor = QLineEdit()
+    completer = ValueCompleter(editor, cache, map_lyr, "field_0")
+
+    # What is typed, with or without the opening quote
+    prefixes = ["v", "'v", "value_1", "'value_12", "value_499"]
+
+    def complete():
+        for prefix in prefixes:
+            completer.setCompletionPrefix(prefix)
+            completer.completionCount()
+
+    benchmark(complete, rounds=20)
+
+    completer.setCompletionPrefix("value_12")
+    assert completer.completionCount() == 11
+    assert completer.currentCompletion() == "'value_12'"
+
+    editor.deleteLater()
+
+
+def test_cache_invalidation(template_model, map_lyr):
+
+    cache = template_model.distinct_values
+    wait_for_values(cache, map_lyr, "field_0")
+
+    map_lyr.startEditing()
+    map_lyr.addFeature(QgsFeature(map_lyr.fields()))
+
+    assert cache.get_values(map_lyr, "field_0") is None
+
+    map_lyr.rollBack()
+
+
+def test_lru_eviction(template_model, map_lyr, monkeypatch):
+
+    cache = template_model.distinct_values
+    monkeypatch.setattr(cache, "MAX_FIELDS", 1)
+
+    wait_for_values(cache, map_lyr, "field_0")
+    wait_for_values(cache, map_lyr, "field_1")
+
+    assert list(cache.values) == [(map_lyr.id(), "field_1")]
@@ -0,0 +1,33 @@
+# qgis
+from qgis.core import QgsFeature, QgsGeometry, QgsPointXY
+
+N_FEATURES = 1000
+
+
+def test_count_features(benchmark, template_model, add_memory_lyr):
+
+    # Cost of adding features while the counters attribute them to the active template
+
+    map_lyr = add_memory_lyr("layer", 10)
+    template = template_model.create_template(name="template", shortcut_str=None, map_lyr=map_lyr,
+                                              default_values={"field_0": "'value'"})
+    template_model.add_templates([template])
+    template.set_active(True)
+
+    def add_features():
+        for i in range(N_FEATURES):
+            feature = QgsFeature(map_lyr.fields())
+            feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(i, i)))
+            map_lyr.addFeature(feature)
+
+    def setup():
+        map_lyr.rollBack()
+        map_lyr.startEditing()
+
+    benchmark(add_features, setup=setup, rounds=5)
+
+    counter = template_model.feature_counters.get_counter(template.record)
+    assert counter.count == 5 * N_FEATURES
+    assert counter.features_per_minute() > 0
+
+    template.set_active(False)
@@ -0,0 +1,51 @@
+# Misc
+import pytest
+
+# qgis
+from qgis.core import QgsReadWriteContext
+
+# PyQt
+from qgis.PyQt.QtXml import QDomDocument
+
+
+@pytest.mark.parametrize("n_lyrs, n_templates", [(10, 10), (100, 100), (200, 1000)])
+def test_project_save(benchmark, qgs_project, template_model, add_memory_lyr, tmp_path, n_lyrs, n_templates):
+
+    # Saving a project while a template is active. Every layer goes through 'writeMapLayer'
+
+    map_lyrs = [add_memory_lyr(f"layer_{i}", 20) for i in range(n_lyrs)]
+
+    templates = [template_model.create_template(name=f"template_{i}", shortcut_str=None,
+                                                map_lyr=map_lyrs[i % n_lyrs],
+                                                default_values={"field_0": f"'value_{i}'"})
+                 for i in range(n_templates)]
+    template_model.add_templates(templates)
+
+    templates[0].set_active(True)
+
+    path = str(tmp_path / "project.qgs")
+
+    benchmark(lambda: qgs_project.write(path), rounds=5)
+
+    # The template's values must not have been saved
+    with open(path) as f:
+        assert "'value_0'" not in f.read()
+
+
+@pytest.mark.parametrize("n_fields", [10, 1000])
+def test_prevent_save(benchmark, template_model, add_memory_lyr, n_fields):
+
+    map_lyr = add_memory_lyr("layer", n_fields)
+
+    template = template_model.create_template(name="template", shortcut_str=None, map_lyr=map_lyr,
+                                              default_values={f"field_{i}": "'value'" for i in range(n_fields)})
+    template_model.add_templates([template])
+    template.set_active(True)
+
+    def setup():
+        doc = QDomDocument()
+        elem = doc.createElement("maplayer")
+        map_lyr.writeLayerXml(elem, doc, QgsReadWriteContext())
+        return map_lyr, elem, doc
+
+    benchmark(lambda args: template.prevent_save(*args), setup=setup, rounds=20)
@@ -0,0 +1,38 @@
+# Standard
+from pathlib import Path
+import json
+import os
+import subprocess
+import sys
+
+# Time (in seconds) the plugin may add to QGIS startup by being imported
+IMPORT_BUDGET = float(os.environ.get("QF_IMPORT_BUDGET", 0.05))
+
+# Modules that QGIS loads anyway are imported first, so that only the plugin's own imports are timed
+IMPORT_SCRIPT = """
+import json, sys, time
+from qgis.core import QgsProject
+from qgis.gui import QgisInterface
+from qgis.PyQt import QtCore, QtWidgets, QtXml
+
+start_time = time.perf_counter()
+import quickfeatures
+from quickfeatures.quick_features_plugin import QuickFeaturesPlugin
+seconds = time.perf_counter() - start_time
+
+print(json.dumps({'seconds': seconds, 'modules': sorted(name for name in sys.modules if name.startswith('quickfeatures'))}))
+"""
+
+
+def test_import_time():
+
+    # Run in a new interpreter, so that no plugin module has been imported yet
+    root = Path(__file__).parents[2]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(root), os.environ.get("PYTHONPATH", "")])}
+
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=root, env=env, capture_output=True,
+                            text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert result["modules"] == ["quickfeatures", "quickfeatures.__about__", "quickfeatures.quick_features_plugin"]
+    assert result["seconds"] < IMPORT_BUDGET
@@ -0,0 +1,70 @@
+# Standard
+import tracemalloc
+
+# Misc
+import pytest
+
+# Project
+from quickfeatures.layer_index import lyr_ref
+from quickfeatures.template_record import TemplateRecord
+
+# qgis
+from qgis.PyQt.QtCore import Qt
+
+N_TEMPLATES = 10000
+
+# Rows shown at once, and the roles a view asks for when it paints a cell
+VISIBLE_ROWS = 40
+PAINT_ROLES = [Qt.DisplayRole, Qt.DecorationRole, Qt.CheckStateRole, Qt.FontRole, Qt.TextAlignmentRole,
+               Qt.BackgroundRole, Qt.ForegroundRole, Qt.SizeHintRole]
+
+
+@pytest.fixture
+def table_model(template_model, add_memory_lyr):
+
+    map_lyrs = [add_memory_lyr(f"layer_{i}", 5) for i in range(10)]
+
+    template_model.add_templates([TemplateRecord(f"template {i}", lyr_ref(map_lyrs[i % 10]),
+                                                 None, {"field_0": f"'value_{i}'"})
+                                  for i in range(N_TEMPLATES)])
+
+    return template_model
+
+
+def paint_rows(model, first_row: int) -> None:
+
+    for row in range(first_row, first_row + VISIBLE_ROWS):
+        for column in range(model.columnCount()):
+            index = model.index(row, column)
+            for role in PAINT_ROLES:
+                model.data(index, role)
+
+
+def test_scroll_table(benchmark, table_model):
+
+    # One frame per row scrolled, from the top to the bottom of the table
+
+    def scroll():
+        for first_row in range(0, N_TEMPLATES - VISIBLE_ROWS, 50):
+            paint_rows(table_model, first_row)
+
+    benchmark(scroll, rounds=5)
+
+
+def test_repaint_allocations(benchmark, table_model):
+
+    # Repainting the same rows (e.g., while the table is resized) reads their cached display values
+
+    paint_rows(table_model, 0)
+
+    benchmark(lambda: paint_rows(table_model, 0), rounds=50)
+
+    tracemalloc.start()
+    paint_rows(table_model, 0)
+    start_size = tracemalloc.get_traced_memory()[0]
+    paint_rows(table_model, 0)
+    size = tracemalloc.get_traced_memory()[0] - start_size
+    tracemalloc.stop()
+
+    assert len(table_model.display_cache) == VISIBLE_ROWS
+    assert size < 1024
@@ -0,0 +1,79 @@
+# Misc
+import pytest
+
+# Project
+from tests.conftest import make_default_values
+
+
+@pytest.mark.parametrize("n_fields", [10, 100, 1000])
+def test_set_active_toggle(benchmark, template_model, add_memory_lyr, n_fields):
+
+    map_lyr = add_memory_lyr("layer", n_fields)
+    template = template_model.create_template(name="template", shortcut_str=None, map_lyr=map_lyr,
+                                              default_values=make_default_values("a"))
+    template_model.add_templates([template])
+
+    def toggle():
+        template.set_active(True)
+        template.set_active(False)
+
+    result = benchmark(toggle, rounds=50)
+
+    template.set_active(True)
+    result["extra"] = {"activation_timings": template.get_activation_timings()}
+
+    assert template.is_active()
+
+
+@pytest.mark.parametrize("n_templates", [10, 100, 1000])
+def test_switch_templates_across_layers(benchmark, template_model, add_memory_lyr, n_templates):
+
+    # Fan-out of 'deactivate_other_templates': every activation deactivates the previous template
+
+    map_lyrs = [add_memory_lyr(f"layer_{i}", 20) for i in range(10)]
+
+    templates = [template_model.create_template(name=f"template_{i}", shortcut_str=None,
+                                                map_lyr=map_lyrs[i % len(map_lyrs)],
+                                                default_values=make_default_values(str(i)))
+                 for i in range(n_templates)]
+    template_model.add_templates(templates)
+
+    state = {"i": 0}
+
+    def switch():
+        state["i"] = (state["i"] + 1) % n_templates
+        templates[state["i"]].set_active(True)
+
+    benchmark(switch, rounds=100)
+
+    assert sum(template.is_active() for template in templates) == 1
+
+
+@pytest.mark.parametrize("n_fields", [10, 1000])
+def test_switch_templates_same_layer(benchmark, template_model, add_memory_lyr, n_fields):
+
+    # Rapid keyboard switching between two templates of the same layer
+
+    map_lyr = add_memory_lyr("layer", n_fields)
+
+    template_1 = template_model.create_template(name="template_1", shortcut_str=None, map_lyr=map_lyr,
+                                                default_values=make_default_values("a"))
+    template_2 = template_model.create_template(name="template_2", shortcut_str=None, map_lyr=map_lyr,
+                                                default_values=make_default_values("b"))
+    template_model.add_templates([template_1, template_2])
+
+    template_1.set_active(True)
+    original_value = template_1.revert_values["field_0"].expression()
+
+    state = {"templates": [template_1, template_2]}
+
+    def switch():
+        state["templates"].reverse()
+        state["templates"][0].set_active(True)
+
+    benchmark(switch, rounds=200)
+
+    active_template = state["templates"][0]
+    active_template.set_active(False)
+
+    assert map_lyr.defaultValueDefinition(0).expression() == original_value
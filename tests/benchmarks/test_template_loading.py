@@ -0,0 +1,93 @@
+# Standard
+import json
+
+# Misc
+import pytest
+
+# PyQt
+from qgis.PyQt.QtXml import QDomDocument
+
+# Project
+from quickfeatures.template_library import write_library
+from quickfeatures.template_record import TemplateRecord
+
+SIZES = [10, 100, 1000, 2000, 5000]
+
+
+def template_records(n_templates: int, n_lyrs: int = 10) -> list:
+
+    return [{
+        "name": f"template_{i}",
+        "map_lyr_name": f"layer_{i % n_lyrs}",
+        "default_values": {"field_0": f"'value_{i}'", "field_1": str(i)},
+        "shortcut_str": f"Ctrl+Alt+Shift+F{i + 1}" if i < 12 else None,
+    } for i in range(n_templates)]
+
+
+@pytest.fixture
+def project_lyrs(add_memory_lyr):
+    return [add_memory_lyr(f"layer_{i}", 20) for i in range(10)]
+
+
+@pytest.mark.parametrize("n_templates", SIZES)
+def test_from_json(benchmark, template_model, project_lyrs, tmp_path, n_templates):
+
+    path = tmp_path / "templates.json"
+    with open(path, "w") as f:
+        json.dump(template_records(n_templates), f)
+
+    benchmark(lambda: template_model.from_json(path), rounds=5)
+
+    assert template_model.rowCount() == n_templates
+    assert all(template_model.is_valid(record) for record in template_model.get_templates())
+
+
+@pytest.mark.parametrize("n_templates", SIZES)
+def test_from_xml(benchmark, template_model, project_lyrs, tmp_path, n_templates):
+
+    # Write the templates to a project-like XML element first
+    path = tmp_path / "templates.json"
+    with open(path, "w") as f:
+        json.dump(template_records(n_templates), f)
+    template_model.from_json(path)
+
+    doc = QDomDocument()
+    templates_elem = doc.createElement("feature_templates")
+    for record in template_model.get_templates():
+        templates_elem.appendChild(record.to_xml(doc))
+
+    benchmark(lambda: template_model.from_xml(templates_elem), rounds=5)
+
+    assert template_model.rowCount() == n_templates
+
+
+@pytest.mark.parametrize("n_templates", [1000, 20000])
+def test_from_library(benchmark, template_model, project_lyrs, tmp_path, n_templates):
+
+    path = tmp_path / "templates.qftl"
+    write_library(path, [TemplateRecord.from_dict(d) for d in template_records(n_templates)])
+
+    benchmark(lambda: template_model.from_library(path), rounds=5)
+
+    assert template_model.rowCount() == n_templates
+
+    # Only the templates that are bound to a shortcut key are bound
+    assert len(template_model.bindings) == 12
+
+
+def test_library_entry_built_on_use(template_model, project_lyrs, tmp_path):
+
+    path = tmp_path / "templates.qftl"
+    write_library(path, [TemplateRecord.from_dict(d) for d in template_records(100)])
+    template_model.from_library(path)
+
+    template = template_model.get_template(50)
+
+    assert template.get_name() == "template_50"
+    assert template.get_default_values() == {"field_0": "'value_50'", "field_1": "50"}
+    assert template.is_valid()
+    assert template.record is template_model.get_templates()[50]
+
+    # Once idle again, the template is released
+    template_model.release_template(template.record)
+    assert template.record not in template_model.bindings
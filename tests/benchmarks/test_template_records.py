@@ -0,0 +1,74 @@
+# Standard
+import tracemalloc
+
+# Misc
+import pytest
+
+# Project
+from quickfeatures.layer_index import lyr_ref
+from quickfeatures.template_record import TemplateRecord
+
+N_TEMPLATES = 10000
+
+
+def default_values(i: int) -> dict:
+    return {f"field_{j}": f"'value_{i}_{j}'" for j in range(5)}
+
+
+def measure_memory(func) -> int:
+
+    # Python memory allocated by 'func' and still held by its return value. Memory allocated by
+    # Qt for bound templates (e.g., the QShortcut) isn't included
+    tracemalloc.start()
+    start_size = tracemalloc.get_traced_memory()[0]
+
+    result = func()
+
+    size = tracemalloc.get_traced_memory()[0] - start_size
+    tracemalloc.stop()
+
+    del result
+
+    return size
+
+
+@pytest.fixture
+def map_lyr(add_memory_lyr):
+    return add_memory_lyr("layer", 5)
+
+
+def test_create_records(benchmark, template_model, map_lyr):
+
+    def create():
+        return [TemplateRecord(f"template_{i}", lyr_ref(map_lyr), None, default_values(i)) for i in range(N_TEMPLATES)]
+
+    def add():
+        template_model.clear_templates()
+        template_model.add_templates(create())
+
+    size = measure_memory(create)
+
+    benchmark(add, rounds=5, extra={"bytes_per_template": size / N_TEMPLATES})
+
+    assert template_model.rowCount() == N_TEMPLATES
+    assert not template_model.bindings
+
+
+def test_create_bindings(benchmark, template_model, map_lyr):
+
+    def create():
+        return [template_model.create_template(name=f"template_{i}", shortcut_str=None, map_lyr=map_lyr,
+                                               default_values=default_values(i)) for i in range(N_TEMPLATES)]
+
+    def add():
+        template_model.clear_templates()
+        template_model.add_templates(create())
+
+    templates = []
+    size = measure_memory(lambda: templates.extend(create()))
+    for template in templates:
+        template.delete_template()
+
+    benchmark(add, rounds=3, extra={"bytes_per_template": size / N_TEMPLATES})
+
+    assert len(template_model.bindings) == N_TEMPLATES
@@ -0,0 +1,62 @@
+# Misc
+import pytest
+
+# Project
+from quickfeatures.layer_index import lyr_ref
+from quickfeatures.template_record import TemplateRecord
+from quickfeatures.template_search import TemplateFilterProxyModel
+
+N_TEMPLATES = 10000
+
+
+@pytest.fixture
+def proxy_model(template_model, add_memory_lyr):
+
+    map_lyrs = [add_memory_lyr(f"layer_{i}", 5) for i in range(10)]
+
+    records = [TemplateRecord(f"template {i}", lyr_ref(map_lyrs[i % 10]), None, {"field_0": f"'value_{i}'"})
+               for i in range(N_TEMPLATES)]
+    template_model.add_templates(records)
+
+    return TemplateFilterProxyModel(None, template_model)
+
+
+@pytest.mark.parametrize("text", ["t", "te", "template 12", "value_999", "layer_3 template 5"])
+def test_search(benchmark, proxy_model, text):
+
+    def search():
+        proxy_model.set_search_text(text)
+
+    benchmark(search, setup=lambda: proxy_model.set_search_text(""))
+
+    expected = [template for template in proxy_model.sourceModel().get_templates()
+                if proxy_model.search_index.matches(template, proxy_model.terms)]
+    assert proxy_model.rowCount() == len(expected)
+
+
+def test_search_typing(benchmark, proxy_model):
+
+    # One keystroke at a time, as in the search box
+    text = "template 1234"
+
+    def type_text():
+        for i in range(1, len(text) + 1):
+            proxy_model.set_search_text(text[:i])
+
+    benchmark(type_text, setup=lambda: proxy_model.set_search_text(""), rounds=5)
+
+    assert proxy_model.rowCount() == 1
+
+
+def test_search_index_maintenance(template_model, proxy_model):
+
+    proxy_model.set_search_text("renamed")
+    assert proxy_model.rowCount() == 0
+
+    template_model.setData(template_model.index(10, 1), "Renamed template")
+    assert proxy_model.rowCount() == 1
+
+    template_model.remove_template(template_model.get_templates()[10])
+    assert proxy_model.rowCount() == 0
+
+    assert proxy_model.top_template() is None
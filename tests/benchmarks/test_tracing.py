@@ -0,0 +1,28 @@
+# Misc
+import pytest
+
+# Project
+from quickfeatures.tracing import tracer, traced
+
+
+@traced('noop')
+def traced_noop():
+    pass
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_traced_call_overhead(benchmark, enabled):
+
+    # Cost of 10,000 calls to an instrumented function, with tracing disabled and enabled
+
+    tracer.set_enabled(enabled)
+
+    def call():
+        for _ in range(10000):
+            traced_noop()
+
+    try:
+        benchmark(call, rounds=20)
+    finally:
+        tracer.set_enabled(False)
+        tracer.reset()
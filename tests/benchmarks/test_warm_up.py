@@ -0,0 +1,27 @@
+# Misc
+import pytest
+
+# Project
+from tests.conftest import make_default_values
+
+
+@pytest.mark.parametrize("n_lyrs", [10, 100])
+def test_warm_up(benchmark, template_model, add_memory_lyr, n_lyrs):
+
+    # Idle time spent preparing the layers of loaded templates, run one step at a time as the event loop would
+
+    map_lyrs = [add_memory_lyr(f"layer_{i}", 20) for i in range(n_lyrs)]
+
+    templates = [template_model.create_template(name=f"template_{i}", shortcut_str=None, map_lyr=map_lyr,
+                                                default_values=make_default_values(str(i)))
+                 for i, map_lyr in enumerate(map_lyrs)]
+    template_model.add_templates(templates)
+
+    def warm_up():
+        template_model.start_warm_up()
+        while template_model.warm_up.is_running():
+            template_model.warm_up.step()
+
+    benchmark(warm_up, rounds=10)
+
+    assert template_model.warm_up.done == n_lyrs
@@ -0,0 +1,30 @@
+# Project
+from quickfeatures.default_value_editor import DefaultValueEditor
+from quickfeatures.quick_features_widget import QuickFeaturesWidget
+from quickfeatures.save_dispatcher import LayerSaveDispatcher
+from quickfeatures.shortcut_registry import ShortcutRegistry
+
+
+def test_widget_construction(benchmark, qgs_project):
+
+    # Cost of building the plugin's dock widget when QGIS starts
+
+    shortcut_registry = ShortcutRegistry()
+    save_dispatcher = LayerSaveDispatcher()
+
+    def build():
+        widget = QuickFeaturesWidget(shortcut_registry, save_dispatcher)
+        widget.clean_up()
+        widget.deleteLater()
+
+    benchmark(build, rounds=10)
+
+    save_dispatcher.clean_up()
+
+
+def test_default_value_editor_construction(benchmark):
+
+    def build():
+        DefaultValueEditor().deleteLater()
+
+    benchmark(build, rounds=10)
@@ -0,0 +1,117 @@
+# Tests run against a headless QGIS. The application and the mocked QGIS interface have to be
+# set up before the plugin's modules are imported, since they bind 'qgis.utils.iface' on import.
+
+# Standard
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# qgis
+from qgis.testing import start_app
+from qgis.testing.mocked import get_iface
+import qgis.utils
+
+QGIS_APP = start_app()
+qgis.utils.iface = get_iface()
+
+# Misc
+import pytest
+
+# qgis
+from qgis.core import QgsFeature, QgsField, QgsGeometry, QgsPointXY, QgsProject, QgsVectorLayer
+
+# PyQt
+from qgis.PyQt.QtCore import QVariant
+from qgis.PyQt.QtWidgets import QWidget
+
+# Project
+from quickfeatures.feature_template_table_model import FeatureTemplateTableModel
+from quickfeatures.save_dispatcher import LayerSaveDispatcher
+from quickfeatures.shortcut_registry import ShortcutRegistry
+
+# Number of default values given to the templates made by 'make_default_values'
+N_DEFAULT_VALUES = 10
+
+
+def make_memory_lyr(name: str, n_fields: int) -> QgsVectorLayer:
+
+    # Point layer with 'n_fields' string fields named 'field_0', 'field_1', etc.
+
+    map_lyr = QgsVectorLayer("Point?crs=EPSG:4326", name, "memory")
+    map_lyr.dataProvider().addAttributes([QgsField(f"field_{i}", QVariant.String) for i in range(n_fields)])
+    map_lyr.updateFields()
+
+    return map_lyr
+
+
+def make_default_values(prefix: str, n: int = N_DEFAULT_VALUES) -> dict:
+
+    # Constant default values for the fields 'field_0' to 'field_<n - 1>'
+
+    return {f"field_{i}": f"'{prefix}_{i}'" for i in range(n)}
+
+
+def add_features(map_lyr: QgsVectorLayer, n_features: int, buffered: bool = False) -> None:
+
+    # Adds point features whose fields hold their number. They are written to the data provider, or
+    # added to the layer's edit buffer if 'buffered' is set, in which case the layer must be editable
+
+    features = []
+    for i in range(n_features):
+        feature = QgsFeature(map_lyr.fields())
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(i, i)))
+        feature.setAttributes([str(i)] * map_lyr.fields().count())
+        features.append(feature)
+
+    if buffered:
+        map_lyr.addFeatures(features)
+    else:
+        map_lyr.dataProvider().addFeatures(features)
+
+
+@pytest.fixture
+def qgs_project():
+
+    qgs_project = QgsProject.instance()
+
+    yield qgs_project
+
+    qgs_project.removeAllMapLayers()
+
+
+@pytest.fixture
+def add_memory_lyr(qgs_project):
+
+    def _add_memory_lyr(name: str = "layer", n_fields: int = 10) -> QgsVectorLayer:
+        map_lyr = make_memory_lyr(name, n_fields)
+        qgs_project.addMapLayer(map_lyr)
+        return map_lyr
+
+    return _add_memory_lyr
+
+
+@pytest.fixture
+def template_model(qgs_project):
+
+    widget = QWidget()
+    shortcut_registry = ShortcutRegistry(widget)
+    save_dispatcher = LayerSaveDispatcher(widget)
+
+    model = FeatureTemplateTableModel(parent=widget, shortcut_registry=shortcut_registry,
+                                      save_dispatcher=save_dispatcher)
+
+    yield model
+
+    model.clean_up()
+    save_dispatcher.clean_up()
+    widget.deleteLater()
+
+
+@pytest.fixture
+def data_changed(template_model):
+
+    # Number of 'dataChanged' signals, i.e., of repaints requested from the view
+    signals = []
+    template_model.dataChanged.connect(lambda *args: signals.append(args))
+
+    return signals
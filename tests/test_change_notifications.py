@@ -0,0 +1,26 @@
+# Project
+from tests.conftest import make_default_values
+
+
+def test_schema_change_notifications(template_model, add_memory_lyr, data_changed):
+
+    # Removing a field that all of a layer's templates use makes them all invalid at once
+
+    map_lyr = add_memory_lyr("layer", 20)
+
+    template_model.add_templates([template_model.create_template(name=f"template_{i}", shortcut_str=None,
+                                                                 map_lyr=map_lyr,
+                                                                 default_values=make_default_values(str(i)))
+                                  for i in range(1000)])
+    template_model.changes.flush()
+    data_changed.clear()
+
+    map_lyr.dataProvider().deleteAttributes([0])
+    map_lyr.updateFields()
+
+    assert len(data_changed) == 0
+
+    template_model.changes.flush()
+
+    assert len(data_changed) == 1
+    assert not any(template_model.is_valid(record) for record in template_model.get_templates())
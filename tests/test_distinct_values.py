@@ -0,0 +1,13 @@
+# Project
+from quickfeatures.distinct_values import quote_value
+
+# qgis
+from qgis.PyQt.QtCore import QDate, QVariant
+
+
+def test_quote_value():
+
+    assert quote_value(12, QVariant.Int) == "12"
+    assert quote_value(1.5, QVariant.Double) == "1.5"
+    assert quote_value("John's", QVariant.String) == "'John''s'"
+    assert quote_value(QDate(2023, 6, 18), QVariant.Date) == "'2023-06-18'"
@@ -0,0 +1,27 @@
+# PyQt
+from qgis.PyQt.QtXml import QDomDocument
+
+# Project
+from quickfeatures.feature_counters import FeatureCounter, FeatureCounters
+from quickfeatures.template_record import TemplateRecord
+
+
+def test_counts_follow_templates():
+
+    # Saved counts are matched to templates by their ID, so they survive templates being reordered or renamed
+
+    records = [TemplateRecord(f"template_{i}", default_values={}) for i in range(3)]
+
+    counters = FeatureCounters(None)
+    counters.counters[records[0]] = FeatureCounter(5)
+    counters.counters[records[2]] = FeatureCounter(7)
+
+    doc = QDomDocument()
+    counts_elem = counters.to_xml(doc, records)
+
+    loaded = [TemplateRecord.from_dict(record.to_dict()) for record in reversed(records)]
+    loaded[0].name = "renamed"
+
+    counters.from_xml(counts_elem, loaded)
+
+    assert [counters.get_count(record) for record in loaded] == [7, 0, 5]
@@ -0,0 +1,34 @@
+# qgis
+from qgis.core import Qgis
+
+
+def test_form_config_changed_during_edit_session(template_model, add_memory_lyr):
+
+    # Changing the layer's form configuration (e.g., in its properties) while it is being edited is picked up, so that
+    # deactivating a template restores the layer's current setting
+
+    map_lyr = add_memory_lyr("layer", 5)
+    template = template_model.create_template(name="template", shortcut_str=None, map_lyr=map_lyr,
+                                              default_values={"field_0": "'value'"})
+    template_model.add_templates([template])
+
+    map_lyr.startEditing()
+
+    template.set_active(True)
+    template.set_active(False)
+
+    assert map_lyr.editFormConfig().suppress() == Qgis.AttributeFormSuppression.Default
+
+    edit_form = map_lyr.editFormConfig()
+    edit_form.setSuppress(Qgis.AttributeFormSuppression.SuppressOff)
+    map_lyr.setEditFormConfig(edit_form)
+
+    template.set_active(True)
+
+    assert map_lyr.editFormConfig().suppress() == Qgis.AttributeFormSuppression.SuppressOn
+
+    template.set_active(False)
+
+    assert map_lyr.editFormConfig().suppress() == Qgis.AttributeFormSuppression.SuppressOff
+
+    map_lyr.rollBack()
@@ -0,0 +1,51 @@
+# Project
+from quickfeatures.layer_index import lyr_ref
+from tests.conftest import make_memory_lyr
+
+
+def test_rebind_removed_layer(template_model, qgs_project, add_memory_lyr):
+
+    # A template whose layer is removed is orphaned, and bound again to a layer of the same name once one is added.
+    # The layer index is still connected, so it handles the removal of a layer that has already been deleted
+
+    map_lyr = add_memory_lyr("layer", 5)
+    template = template_model.create_template(name="template", shortcut_str=None, map_lyr=map_lyr,
+                                              default_values={"field_0": "'value'"})
+    template_model.add_templates([template])
+
+    lyr_id = map_lyr.id()
+    qgs_project.removeMapLayer(lyr_id)
+
+    assert template.get_map_lyr() is None
+    assert template.is_orphaned()
+    assert lyr_id not in template_model.lyr_index.lyrs_by_id
+    assert "layer" not in template_model.lyr_index.lyrs_by_name
+    assert not template_model.lyr_index.lyrs_by_source
+
+    new_lyr = make_memory_lyr("layer", 5)
+    qgs_project.addMapLayer(new_lyr)
+
+    assert template.get_map_lyr() is new_lyr
+    assert not template.is_orphaned()
+    assert template.is_valid()
+    assert template_model.lyr_index.resolve(name="layer") is new_lyr
+
+
+def test_rebind_by_id_before_name(template_model, qgs_project):
+
+    # When layers are added together (e.g., when a project is loaded), an orphaned template is bound to the layer
+    # with its layer's ID, even if a layer with the same name comes first
+
+    other_lyr = make_memory_lyr("layer", 5)
+    map_lyr = make_memory_lyr("layer", 5)
+
+    template = template_model.create_template(name="template", shortcut_str=None, map_lyr=None,
+                                              default_values={"field_0": "'value'"}, map_lyr_ref=lyr_ref(map_lyr))
+    template_model.add_templates([template])
+
+    assert template.is_orphaned()
+
+    qgs_project.addMapLayers([other_lyr, map_lyr])
+
+    assert template.get_map_lyr() is map_lyr
+    assert not template.is_orphaned()
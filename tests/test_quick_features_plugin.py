@@ -0,0 +1,29 @@
+# Project
+from quickfeatures.quick_features_plugin import QuickFeaturesPlugin
+
+# qgis
+from qgis.testing.mocked import get_iface
+from qgis.PyQt.QtXml import QDomDocument
+
+
+def test_widget_built_on_demand(qgs_project):
+
+    plugin = QuickFeaturesPlugin(get_iface())
+    plugin.initGui()
+
+    # Projects without templates don't build the widget
+    doc = QDomDocument()
+    doc.appendChild(doc.createElement("qgis"))
+    plugin.project_load(doc)
+
+    assert plugin.dock_widget.widget() is None
+    assert plugin.shortcut_registry is None
+
+    plugin_elem = doc.createElement("quick_features")
+    plugin_elem.appendChild(doc.createElement("feature_templates"))
+    doc.documentElement().appendChild(plugin_elem)
+    plugin.project_load(doc)
+
+    assert plugin.dock_widget.widget() is not None
+
+    plugin.unload()
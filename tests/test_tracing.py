@@ -0,0 +1,23 @@
+# Misc
+import pytest
+
+# Project
+from quickfeatures.tracing import tracer
+
+
+def test_histogram_percentiles():
+
+    tracer.reset()
+    tracer.set_enabled(True)
+
+    for i in range(1, 101):
+        tracer.record('operation', i / 1000)
+
+    tracer.set_enabled(False)
+    summary = tracer.summary()['operation']
+    tracer.reset()
+
+    assert summary['count'] == 100
+    assert summary['p50'] == pytest.approx(0.050, rel=0.15)
+    assert summary['p99'] == pytest.approx(0.099, rel=0.15)
+    assert summary['max'] == pytest.approx(0.1)
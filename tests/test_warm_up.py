@@ -0,0 +1,18 @@
+def test_cancel_warm_up(template_model, add_memory_lyr):
+
+    map_lyrs = [add_memory_lyr(f"layer_{i}", 20) for i in range(5)]
+
+    template_model.add_templates([template_model.create_template(name=f"template_{i}", shortcut_str=None,
+                                                                 map_lyr=map_lyr, default_values={})
+                                  for i, map_lyr in enumerate(map_lyrs)])
+
+    finished = []
+    template_model.warm_up.finished.connect(finished.append)
+
+    template_model.start_warm_up()
+    template_model.warm_up.step()
+    template_model.warm_up.cancel()
+
+    assert finished == [False]
+    assert template_model.warm_up.done == 1
+    assert not template_model.warm_up.is_running()